@@ -0,0 +1,151 @@
+"""
+Shared helpers for the benchmarks: synthetic OSM data and measurements.
+
+The benchmarks are plain scripts, run them from the repository root, e.g.
+`python benchmarks/parse_osm.py`, or all of them with `make benchmark`.
+"""
+
+import gc
+import json
+import random
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from typing import Any
+
+# The API refuses a map request with more than 50'000 nodes
+MAX_MAP_NODES = 50_000
+
+_TAGS = [
+    ("highway", ["residential", "service", "footway", "primary"]),
+    ("building", ["yes", "house", "apartments"]),
+    ("name", [f"Street {i}" for i in range(50)]),
+    ("amenity", ["bench", "waste_basket", "parking"]),
+    ("surface", ["asphalt", "gravel"]),
+]
+
+
+def _tags(rnd: random.Random, count: int) -> str:
+    return "".join(
+        f'<tag k="{k}" v="{rnd.choice(values)}"/>'
+        for k, values in rnd.sample(_TAGS, count)
+    )
+
+
+def _attributes(rnd: random.Random, id: int) -> str:
+    return (
+        f'id="{id}" visible="true" version="{rnd.randint(1, 9)}" '
+        f'changeset="{rnd.randint(1, 10**8)}" timestamp="2024-05-{rnd.randint(10, 28)}'
+        f'T12:{rnd.randint(10, 59)}:{rnd.randint(10, 59)}Z" user="mapper" uid="42"'
+    )
+
+
+def make_map(nodes: int = MAX_MAP_NODES, seed: int = 1) -> bytes:
+    """
+    Returns a `map` response with `nodes` nodes, a way for every ten nodes and a
+    relation for every ten ways, tagged like a typical urban bounding box.
+    """
+    rnd = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<osm version="0.6" generator="osmapi benchmark">\n'
+        '  <bounds minlat="47.0" minlon="8.0" maxlat="47.1" maxlon="8.1"/>\n'
+    ]
+    for i in range(1, nodes + 1):
+        lat, lon = 47 + rnd.random() / 10, 8 + rnd.random() / 10
+        tags = _tags(rnd, rnd.choice([0, 0, 0, 1, 2]))
+        node = f'  <node {_attributes(rnd, i)} lat="{lat:.7f}" lon="{lon:.7f}"'
+        parts.append(f"{node}>{tags}</node>\n" if tags else f"{node}/>\n")
+    ways = nodes // 10
+    for i in range(1, ways + 1):
+        nds = "".join(f'<nd ref="{n}"/>' for n in range(i * 10 - 9, i * 10 + 1))
+        parts.append(f"  <way {_attributes(rnd, i)}>{nds}{_tags(rnd, 2)}</way>\n")
+    for i in range(1, ways // 10 + 1):
+        members = "".join(
+            f'<member type="way" ref="{w}" role="outer"/>'
+            for w in range(i * 10 - 9, i * 10 + 1)
+        )
+        parts.append(
+            f"  <relation {_attributes(rnd, i)}>{members}"
+            f'<tag k="type" v="multipolygon"/></relation>\n'
+        )
+    parts.append("</osm>\n")
+    return "".join(parts).encode("utf-8")
+
+
+_JSON_TYPES: dict[str, Callable[[str], Any]] = {
+    "id": int,
+    "version": int,
+    "changeset": int,
+    "uid": int,
+    "lat": float,
+    "lon": float,
+    "visible": lambda v: v == "true",
+}
+
+
+def to_json(data: bytes) -> bytes:
+    """
+    Returns the `<osm>` document `data` in the JSON format of the API, i.e. as
+    the `.json` variant of the same endpoint would return it.
+    """
+    elements = []
+    for elem in ET.fromstring(data):
+        if elem.tag not in ("node", "way", "relation"):
+            continue
+        element: dict[str, Any] = {"type": elem.tag}
+        for k, v in elem.attrib.items():
+            if k != "visible" or v == "false":
+                element[k] = _JSON_TYPES.get(k, str)(v)
+        if elem.tag == "way":
+            element["nodes"] = [int(nd.attrib["ref"]) for nd in elem.iter("nd")]
+        if elem.tag == "relation":
+            element["members"] = [
+                {
+                    "type": m.attrib["type"],
+                    "ref": int(m.attrib["ref"]),
+                    "role": m.attrib["role"],
+                }
+                for m in elem.iter("member")
+            ]
+        tags = {tag.attrib["k"]: tag.attrib["v"] for tag in elem.iter("tag")}
+        if tags:
+            element["tags"] = tags
+        elements.append(element)
+    return json.dumps({"version": "0.6", "elements": elements}).encode("utf-8")
+
+
+def measure(func: Callable[[], Any], repeat: int = 3) -> tuple[float, int]:
+    """
+    Returns the best wall time (in seconds) of `repeat` runs of `func` and the
+    peak memory (in bytes) allocated by one run of it.
+    """
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def report(title: str, results: dict[str, tuple[float, int]]) -> None:
+    """
+    Prints the `results` of `measure` as a table, relative to the first entry.
+    """
+    print(title)
+    base_time, base_peak = next(iter(results.values()))
+    for name, (seconds, peak) in results.items():
+        print(
+            f"  {name:<28} {seconds * 1000:9.1f} ms ({seconds / base_time:5.2f}x)"
+            f" {peak / 2**20:9.1f} MiB peak ({peak / max(base_peak, 1):5.2f}x)"
+        )
@@ -0,0 +1,38 @@
+"""
+Compares `parse_osm` with `parse_osm_columns` (the columns behind
+`map_columns`), with `array.array` columns and with NumPy arrays, on a `map`
+response at the 50'000 node limit: the time to parse it and the peak memory
+while the result is held.
+"""
+
+import sys
+
+from osmapi import parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    data = make_map(nodes)
+    result = parser.parse_osm_columns(data, use_numpy=False)
+    assert list(result.node_id) == [
+        e["data"]["id"] for e in parser.parse_osm(data) if e["type"] == "node"
+    ]
+
+    report(
+        f"map response, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            "parse_osm": measure(lambda: parser.parse_osm(data)),
+            "parse_osm_columns, array": measure(
+                lambda: parser.parse_osm_columns(data, use_numpy=False)
+            ),
+            "parse_osm_columns, numpy": measure(
+                lambda: parser.parse_osm_columns(data, use_numpy=True)
+            ),
+            "parse_osm_columns, tags": measure(
+                lambda: parser.parse_osm_columns(
+                    data, tags=["highway", "name"], use_numpy=True
+                )
+            ),
+        },
+    )
@@ -0,0 +1,59 @@
+"""
+Compares assigning the ids and versions of a `<diffResult>` to the uploaded
+elements by position (the entries parsed into a list, sliced from the offset
+of every change, as it was done before) with `diff.DiffResult`, which keys
+the entries on their `old_id`, for an upload of 10'000 elements in a change
+per element (what a batched changeset alternating nodes and ways uploads).
+"""
+
+import sys
+
+from osmapi import diff, dom
+
+from _common import measure, report
+
+
+def make_upload(elements: int) -> tuple[list[dict], bytes]:
+    changes_data = []
+    entries = []
+    for i in range(1, elements + 1):
+        osm_type = "node" if i % 2 else "way"
+        changes_data.append(
+            {"type": osm_type, "action": "create", "data": [{"id": -i, "tag": {}}]}
+        )
+        entries.append(f'<{osm_type} old_id="-{i}" new_id="{i}" new_version="1"/>')
+    body = "<diffResult>" + "".join(entries) + "</diffResult>"
+    return changes_data, body.encode("utf-8")
+
+
+def by_position(changes_data: list[dict], body: bytes) -> None:
+    diff_result = dom.response_root(body, "diffResult")
+    result_elements = [x for x in diff_result if isinstance(x.tag, str)]
+    offset = 0
+    for change in changes_data:
+        for response, element in zip(result_elements[offset:], change["data"]):
+            element["id"] = int(response.attrib["new_id"])
+            element["version"] = int(response.attrib["new_version"])
+        offset += len(change["data"])
+
+
+def by_old_id(changes_data: list[dict], body: bytes) -> None:
+    diff.DiffResult.parse(body).apply(changes_data)
+
+
+if __name__ == "__main__":
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    _, body = make_upload(elements)
+
+    def run(assign):
+        # the ids are assigned in place, so every run gets a fresh upload
+        return lambda: assign(make_upload(elements)[0], body)
+
+    report(
+        f"diffResult of {elements} elements, a change each",
+        {
+            "by position": measure(run(by_position)),
+            "DiffResult": measure(run(by_old_id)),
+        },
+    )
@@ -0,0 +1,25 @@
+"""
+Compares decoding a `map` response in the XML and in the JSON format
+(`OsmApi(format="json")`), on the same data at the 50'000 node limit.
+"""
+
+import sys
+
+from osmapi import parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report, to_json
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    xml_data = make_map(nodes)
+    json_data = to_json(xml_data)
+    assert parser.parse_osm_json(json_data) == parser.parse_osm(xml_data)
+
+    report(
+        f"map, {nodes} nodes, {len(xml_data) / 2**20:.1f} MiB of XML, "
+        f"{len(json_data) / 2**20:.1f} MiB of JSON",
+        {
+            "parse_osm (xml)": measure(lambda: parser.parse_osm(xml_data)),
+            "parse_osm_json (json)": measure(lambda: parser.parse_osm_json(json_data)),
+        },
+    )
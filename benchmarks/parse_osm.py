@@ -0,0 +1,48 @@
+"""
+Compares the streaming `parser.parse_osm` with the minidom based parser it
+replaced, on a `map` response at the 50'000 node limit of the API.
+
+`iter_osm` is measured twice: collecting the elements in a list (which is
+what `parse_osm` does), and consuming them one at a time without keeping
+them, which is what a pipeline that processes elements as they come costs.
+"""
+
+import sys
+import xml.dom.minidom
+
+from osmapi import dom, parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+
+def parse_osm_minidom(data: bytes) -> list[dict]:
+    osm = xml.dom.minidom.parseString(data).getElementsByTagName("osm")[0]
+    result = []
+    for elem in osm.childNodes:
+        if elem.nodeName == "node":
+            result.append({"type": "node", "data": dom.dom_parse_node(elem)})
+        elif elem.nodeName == "way":
+            result.append({"type": "way", "data": dom.dom_parse_way(elem)})
+        elif elem.nodeName == "relation":
+            result.append({"type": "relation", "data": dom.dom_parse_relation(elem)})
+    return result
+
+
+def consume(data: bytes) -> None:
+    for _ in parser.iter_osm(data):
+        pass
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    data = make_map(nodes)
+    assert parser.parse_osm(data) == parse_osm_minidom(data)
+
+    report(
+        f"parse_osm, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            "minidom (before)": measure(lambda: parse_osm_minidom(data)),
+            "parse_osm (iterparse)": measure(lambda: parser.parse_osm(data)),
+            "iter_osm, not collected": measure(lambda: consume(data)),
+        },
+    )
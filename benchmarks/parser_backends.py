@@ -0,0 +1,38 @@
+"""
+Compares the XML parser backends of `osmapi.backends` on a `map` response at
+the 50'000 node limit of the API, for the streaming `parse_osm` and for the
+tree based `dom.response_elements` used by the single element reads.
+"""
+
+import sys
+
+from osmapi import backends, dom, parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+
+def parse_tree(data: bytes, backend: str) -> list[dict]:
+    return [
+        dom.dom_parse_node(elem)
+        for elem in dom.response_elements(data, tag="node", backend=backend)
+    ]
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    data = make_map(nodes)
+    available = backends.available_backends()[::-1]
+    if "lxml" not in available:
+        print("lxml is not installed, only the etree backend is measured")
+
+    report(
+        f"parse_osm, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            name: measure(lambda name=name: parser.parse_osm(data, backend=name))
+            for name in available
+        },
+    )
+    report(
+        "response_elements + dom_parse_node",
+        {name: measure(lambda name=name: parse_tree(data, name)) for name in available},
+    )
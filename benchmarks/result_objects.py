@@ -0,0 +1,33 @@
+"""
+Compares the memory of the results of `parse_osm` with the default
+`result_type="dicts"` and with `result_type="objects"` (the `__slots__`
+classes of `osmapi.elements`), on a `map` response at the 50'000 node limit.
+
+The results are kept until the measurement ends, so the peak is what it takes
+to hold the whole response in memory.
+"""
+
+import sys
+
+from osmapi import parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    data = make_map(nodes)
+    objects = parser.parse_osm(data, result_type="objects")
+    assert [e["data"].to_dict() for e in objects] == [
+        e["data"] for e in parser.parse_osm(data)
+    ]
+
+    report(
+        f"parse_osm, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            "dicts": measure(lambda: parser.parse_osm(data)),
+            "objects": measure(lambda: parser.parse_osm(data, result_type="objects")),
+            "objects, raw timestamps": measure(
+                lambda: parser.parse_osm(data, result_type="objects", timestamps="raw")
+            ),
+        },
+    )
@@ -0,0 +1,42 @@
+"""
+Measures the memory saved by interning the tags (`dom.TagTable`) and by
+sharing the tag mappings (`shared_tags=True`), on a `map` response at the
+50'000 node limit.
+
+The first row has the interning switched off (a table that keeps no strings),
+which is how the tags were parsed before: a new string for every key and
+value of every element.
+"""
+
+import sys
+
+from osmapi import dom, parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+
+def parse_without_interning(data: bytes) -> list:
+    max_entries = dom.TagTable.MAX_ENTRIES
+    dom.TagTable.MAX_ENTRIES = 0
+    try:
+        return parser.parse_osm(data)
+    finally:
+        dom.TagTable.MAX_ENTRIES = max_entries
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    data = make_map(nodes)
+    assert parse_without_interning(data) == parser.parse_osm(data)
+
+    report(
+        f"parse_osm, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            "without interning": measure(lambda: parse_without_interning(data)),
+            "interned": measure(lambda: parser.parse_osm(data)),
+            "shared_tags": measure(lambda: parser.parse_osm(data, shared_tags=True)),
+            "objects, shared_tags": measure(
+                lambda: parser.parse_osm(data, result_type="objects", shared_tags=True)
+            ),
+        },
+    )
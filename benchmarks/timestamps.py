@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of the timestamp decoding modes of `OsmApi(timestamps=...)`.
+
+Decodes 100'000 timestamps in both layouts of the API with every mode and
+with the `datetime.strptime` loop `dom._parse_date` used before its fast
+path, then parses a `map` response at the 50'000 node limit with every mode,
+to show what the timestamps cost in a whole response.
+"""
+
+import random
+import sys
+from datetime import datetime
+
+from osmapi import dom, parser
+
+from _common import MAX_MAP_NODES, make_map, measure, report
+
+
+def parse_date_strptime(date_string: str) -> datetime | str:
+    for date_format in ["%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%dT%H:%M:%SZ"]:
+        try:
+            return datetime.strptime(date_string, date_format)
+        except ValueError:
+            pass
+    return date_string
+
+
+def make_timestamps(count: int, seed: int = 1) -> list[str]:
+    rnd = random.Random(seed)
+    layouts = ["%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d %H:%M:%S UTC"]
+    return [
+        datetime.fromtimestamp(rnd.randint(10**9, 2 * 10**9)).strftime(
+            rnd.choice(layouts)
+        )
+        for _ in range(count)
+    ]
+
+
+if __name__ == "__main__":
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_MAP_NODES
+    timestamps = make_timestamps(100_000)
+    for timestamp in timestamps[:1000]:
+        assert dom._parse_date(timestamp) == parse_date_strptime(timestamp)
+
+    results = {
+        "strptime (before)": measure(
+            lambda: [parse_date_strptime(t) for t in timestamps]
+        )
+    }
+    for mode in dom.TIMESTAMP_DECODERS:
+        decode = dom.timestamp_decoder(mode)
+        results[mode] = measure(lambda decode=decode: [decode(t) for t in timestamps])
+    report(f"timestamp decoding, {len(timestamps)} timestamps", results)
+
+    data = make_map(nodes)
+    report(
+        f"parse_osm, {nodes} nodes, {len(data) / 2**20:.1f} MiB of XML",
+        {
+            mode: measure(lambda mode=mode: parser.parse_osm(data, timestamps=mode))
+            for mode in dom.TIMESTAMP_DECODERS
+        },
+    )
@@ -0,0 +1,69 @@
+"""
+Compares building the `<osmChange>` body of `changeset_upload` as one string
+(by repeated `str +=`, then encoded to bytes, as it was done before) with
+streaming it through `xmlbuilder.OsmChangeBody`, for an upload of 10'000
+elements: the time to produce the whole body and the peak memory while doing
+so. The streamed chunks are dropped as they are produced, like `requests`
+does while sending them. Both are indented (`pretty=True`) as they were
+before, `benchmarks/xml_build.py` compares with the compact default.
+"""
+
+import sys
+
+import osmapi
+from osmapi import xmlbuilder
+
+from _common import measure, report
+
+
+def make_changes(elements: int) -> list[dict]:
+    nodes = [
+        {"id": -i, "lat": 47 + i / 10**6, "lon": 8 + i / 10**6, "tag": {}}
+        for i in range(1, elements + 1)
+    ]
+    for i, node in enumerate(nodes):
+        if i % 3 == 0:
+            node["tag"] = {"amenity": "bench", "name": f"Bench {i}"}
+    return [{"type": "node", "action": "create", "data": nodes}]
+
+
+def build_string(api: osmapi.OsmApi, changes_data: list[dict]) -> bytes:
+    data = ""
+    data += '<?xml version="1.0" encoding="UTF-8"?>\n'
+    data += '<osmChange version="0.6" generator="'
+    data += api._created_by + '">\n'
+    for change in changes_data:
+        data += "<" + change["action"] + ">\n"
+        for element in change["data"]:
+            element["changeset"] = api._current_changeset_id
+            xml = xmlbuilder._xml_build(
+                change["type"], element, False, data=api, pretty=True
+            )
+            data += xml.decode("utf-8")
+        data += "</" + change["action"] + ">\n"
+    data += "</osmChange>"
+    return data.encode("utf-8")
+
+
+def stream(api: osmapi.OsmApi, changes_data: list[dict]) -> int:
+    size = 0
+    for chunk in xmlbuilder.OsmChangeBody(changes_data, data=api, pretty=True):
+        size += len(chunk)
+    return size
+
+
+if __name__ == "__main__":
+    elements = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    api = osmapi.OsmApi()
+    api._current_changeset_id = 4444
+    changes = make_changes(elements)
+    body = build_string(api, changes)
+    assert body == b"".join(xmlbuilder.OsmChangeBody(changes, data=api, pretty=True))
+
+    report(
+        f"osmChange body, {elements} nodes, {len(body) / 2**20:.1f} MiB",
+        {
+            "str +=": measure(lambda: build_string(api, changes)),
+            "OsmChangeBody": measure(lambda: stream(api, changes)),
+        },
+    )
@@ -0,0 +1,73 @@
+"""
+Compares serializing the elements of an upload with an indented
+`xml.etree.ElementTree` tree (`pretty=True`, as it was done before), with a
+tree serialized without indentation, and with the direct writer of the
+compact default, for 10'000 elements each of nodes, ways and relations: the
+time for all of them and the bytes per element.
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+
+import osmapi
+from osmapi import xmlbuilder
+
+from _common import measure, report
+
+
+def make_elements(osm_type: str, count: int) -> list[dict]:
+    tags = {"highway": "residential", "name": "Bahnhofstrasse", "note": "a\nb"}
+    if osm_type == "node":
+        return [
+            {"id": -i, "lat": 47 + i / 10**6, "lon": 8 + i / 10**6, "tag": {}}
+            for i in range(1, count + 1)
+        ]
+    if osm_type == "way":
+        return [
+            {"id": -i, "nd": list(range(i * 10, i * 10 + 8)), "tag": tags}
+            for i in range(1, count + 1)
+        ]
+    members = [{"type": "way", "ref": r, "role": "outer"} for r in range(1, 6)]
+    return [
+        {"id": -i, "member": members, "tag": {"type": "multipolygon"}}
+        for i in range(1, count + 1)
+    ]
+
+
+def indented(api: osmapi.OsmApi, osm_type: str, elements: list[dict]) -> int:
+    return sum(
+        len(xmlbuilder._xml_build(osm_type, e, False, data=api, pretty=True))
+        for e in elements
+    )
+
+
+def tree(api: osmapi.OsmApi, osm_type: str, elements: list[dict]) -> int:
+    return sum(
+        len(ET.tostring(xmlbuilder._xml_element(osm_type, e, data=api)))
+        for e in elements
+    )
+
+
+def direct(api: osmapi.OsmApi, osm_type: str, elements: list[dict]) -> int:
+    return sum(
+        len(xmlbuilder._xml_build(osm_type, e, False, data=api)) for e in elements
+    )
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    api = osmapi.OsmApi()
+    api._current_changeset_id = 4444
+    for osm_type in ("node", "way", "relation"):
+        elements = make_elements(osm_type, count)
+        results = {}
+        for name, serialize in [
+            ("ElementTree, indented", indented),
+            ("ElementTree, compact", tree),
+            ("direct writer", direct),
+        ]:
+            size = serialize(api, osm_type, elements)
+            results[f"{name} ({size / count:.0f} B)"] = measure(
+                lambda: serialize(api, osm_type, elements)
+            )
+        report(f"{count} {osm_type}s, bytes per element in brackets", results)
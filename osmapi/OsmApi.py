@@ -26,15 +26,21 @@ Find all information about changes of the different versions of this module
 (e.g. `NodeGet`) were removed in version 6.0.
 """
 
+import os
 import re
 import logging
-from typing import Any, NoReturn
-from xml.dom.minidom import Element
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import IO, TYPE_CHECKING, Any, NoReturn
 import requests
 
 from osmapi import __version__
+from . import backends
+from . import dom
+from . import elements
 from . import errors
 from . import http
+from . import parser
 from . import xmlbuilder
 from .node import NodeMixin
 from .way import WayMixin
@@ -43,8 +49,43 @@ from .changeset import ChangesetMixin
 from .note import NoteMixin
 from .capabilities import CapabilitiesMixin
 
+if TYPE_CHECKING:
+    from .aio import AsyncOsmApi
+
 logger = logging.getLogger(__name__)
 
+# The URIs of the reads available unparsed (`*_raw` and `download_to`)
+_RAW_READS = {
+    "map": "/api/0.6/map?bbox={:f},{:f},{:f},{:f}",
+    "way_full": "/api/0.6/way/{}/full",
+    "relation_full": "/api/0.6/relation/{}/full",
+    "changeset_download": "/api/0.6/changeset/{}/download",
+}
+
+
+def _id_batches(
+    url: str, id_list: list[int], max_ids: int, max_url_length: int
+) -> list[list[int]]:
+    """
+    Returns the ids of `id_list` (without duplicates) split into batches of
+    at most `max_ids` ids, that make URLs of at most `max_url_length`
+    characters when they are appended to `url`, separated by commas.
+    """
+    batches: list[list[int]] = []
+    length = max_url_length
+    for element_id in dict.fromkeys(id_list):
+        id_length = len(str(element_id)) + 1
+        if (
+            not batches
+            or len(batches[-1]) == max_ids
+            or length + id_length > max_url_length
+        ):
+            batches.append([])
+            length = len(url) - 1
+        batches[-1].append(element_id)
+        length += id_length
+    return batches
+
 
 class OsmApi(
     NodeMixin,
@@ -58,6 +99,12 @@ class OsmApi(
     Main class of osmapi, instanciate this class to use osmapi
     """
 
+    MULTI_FETCH_MAX_IDS = 1000
+    """Maximum number of ids per request of `nodes_get` & co. (default: 1000)"""
+
+    MULTI_FETCH_MAX_URL_LENGTH = 8000
+    """Maximum length of the URL of a request of `nodes_get` & co. (default: 8000)"""
+
     def __init__(
         self,
         appid: str = "",
@@ -65,6 +112,17 @@ class OsmApi(
         api: str = "https://www.openstreetmap.org",
         session: requests.Session | None = None,
         timeout: int = 30,
+        format: str = "xml",
+        parser_backend: str | backends.ParserBackend | None = None,
+        timestamps: str = "datetime",
+        result_type: str = "dicts",
+        shared_tags: bool = False,
+        gzip_requests: bool = False,
+        gzip_min_size: int = http.GZIP_MIN_SIZE,
+        rate_limiter: http.RateLimiter | None = None,
+        retry_policy: http.RetryPolicy | None = None,
+        pool_maxsize: int | None = None,
+        pool_block: bool = False,
     ) -> None:
         """
         Initialized the OsmApi object.
@@ -104,7 +162,88 @@ class OsmApi(
         Finally the `timeout` parameter is used by the http session to
         throw an expcetion if the the timeout (in seconds) has passed without
         an answer from the server.
+
+        The `format` parameter selects the response format for reading
+        elements and notes: with `"json"`, the element reads (`node_get`,
+        `nodes_get`, `way_full`, `relation_full`, `map`, the `*_history` calls,
+        …) and the note reads (`notes_get`, `note_get`, `notes_search`) use
+        the JSON endpoints of the API, which are decoded considerably faster
+        than XML. The results are exactly the same dicts as with the default
+        `"xml"`. Changesets, capabilities, writes, the streaming generators
+        (`iter_map`, `iter_changeset_download`) and the unparsed reads
+        (`map_raw`, …, `download_to`) always use XML.
+
+        XML responses are parsed with the fastest parser backend available:
+        lxml if it is installed, the `xml.etree.ElementTree` parser of the
+        standard library otherwise. Use `parser_backend` to pin a backend by
+        name (`"lxml"` or `"etree"`) or to pass a custom
+        `osmapi.backends.ParserBackend`, see `osmapi.backends`.
+
+        The `timestamps` parameter selects how the timestamps of the results
+        (`timestamp`, `created_at`, `closed_at`, the dates of notes and
+        comments) are decoded: `"datetime"` (the default) returns naive
+        `datetime` objects in UTC, `"epoch"` the seconds since the epoch as
+        `int`, `"raw"` the strings as sent by the API, which is the fastest,
+        and `"lazy"` a `osmapi.dom.LazyTimestamp`, the string with
+        `to_datetime()` and `to_epoch()` to decode it when it is needed.
+
+        With `result_type="objects"` the element and changeset reads return
+        the compact, frozen `osmapi.elements.Node`, `Way`, `Relation` and
+        `Changeset` objects instead of dicts, which take a fraction of the
+        memory. Their `to_dict()` returns the dict of the default
+        `result_type="dicts"`. `map`, `way_full`, `relation_full` and
+        `changeset_download` keep their `{"type", "data"}` records, with an
+        object as `data`. Notes and the results of writes are always dicts.
+
+        The tag keys and values of the reads returning many elements (`map`,
+        `iter_map`, `way_full`, `relation_full`, `changeset_download` and
+        `iter_changeset_download`) are interned, so each distinct string is
+        kept once. With `shared_tags=True` the elements with the same tags of
+        such a read also share one read-only mapping (e.g. all untagged
+        nodes one empty mapping), see `osmapi.dom.TagTable`.
+
+        With `gzip_requests=True` request bodies of at least `gzip_min_size`
+        bytes (e.g. the `<osmChange>` of `changeset_upload`) are sent
+        gzip-compressed, with `Content-Encoding: gzip`. A streamed upload is
+        compressed incrementally while it is sent. Only use it with a server
+        that decodes compressed requests.
+
+        A `rate_limiter` (an `osmapi.http.RateLimiter`) limits the number of
+        requests per second, of all requests or of the reads and the writes
+        separately, and the bytes per second they transfer. It slows down
+        when the API answers with a 429. It can be shared by several `OsmApi`
+        objects (also in several threads), the workers of
+        `changeset_upload_parallel` share the one of the object they were
+        started from.
+
+        The `retry_policy` (an `osmapi.http.RetryPolicy`) decides which
+        failed requests are sent again and how long to wait before: by
+        default idempotent requests that failed with a server error or a 429
+        are sent up to 5 times, with exponential backoff and jitter, following
+        a `Retry-After` header of the response.
+
+        All requests (and their retries) go over one `requests.Session`, which
+        keeps the connections to the API alive for the next request. With
+        `pool_maxsize` an `HTTPAdapter` keeping up to that many connections
+        to the API is mounted on the session created here (the default of
+        `requests` is 10), e.g. for more `workers` of `nodes_get`. With
+        `pool_block=True` a request waits for a free connection instead of
+        opening one that is not kept afterwards. The adapters of a `session`
+        passed in are left as they are, mount an `HTTPAdapter` on it instead:
+        with a `session`, `pool_maxsize` raises a `ValueError`.
         """
+        if format not in ("xml", "json"):
+            raise ValueError(f"format must be 'xml' or 'json', got {format!r}")
+        self._format: str = format
+        self._parser_backend: backends.ParserBackend = backends.get_backend(
+            parser_backend
+        )
+        dom.timestamp_decoder(timestamps)
+        self._timestamps: str = timestamps
+        self._to_result = elements.result_converter(result_type)
+        self._result_type: str = result_type
+        self._shared_tags: bool = shared_tags
+
         # Get API
         self._api: str = api.strip("/")
 
@@ -116,38 +255,209 @@ class OsmApi(
 
         # Initialisation
         self._current_changeset_id: int = 0
+        self._write_batch = None
 
         # Http connection
         self.http_session: requests.Session | None = session
         self._timeout: int = timeout
-        self._session: http.OsmApiSession = http.OsmApiSession(
-            self._api,
-            self._created_by,
-            session=self.http_session,
-            timeout=self._timeout,
+        self._gzip_min_size: int | None = gzip_min_size if gzip_requests else None
+        self._rate_limiter: http.RateLimiter | None = rate_limiter
+        self._retry_policy: http.RetryPolicy | None = retry_policy
+        if pool_maxsize is not None and session is not None:
+            raise ValueError(
+                "pool_maxsize only applies to the session OsmApi creates, "
+                "mount an HTTPAdapter on the session passed instead"
+            )
+        # mounted on every session created for this object (e.g. of the
+        # workers of `changeset_upload_parallel`), which share its pool
+        self._pool_adapter: requests.adapters.HTTPAdapter | None = (
+            None
+            if pool_maxsize is None
+            else http._pool_adapter(pool_maxsize, pool_block)
         )
+        self._session: http.OsmApiSession = self._new_session()
 
     def __enter__(self) -> "OsmApi":
-        self._session = http.OsmApiSession(
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def _new_session(self) -> http.OsmApiSession:
+        """
+        Returns a new `http.OsmApiSession` with the settings of this object.
+        """
+        return http.OsmApiSession(
             self._api,
             self._created_by,
             session=self.http_session,
             timeout=self._timeout,
+            gzip_min_size=self._gzip_min_size,
+            rate_limiter=self._rate_limiter,
+            retry_policy=self._retry_policy,
+            adapter=self._pool_adapter,
         )
-        return self
-
-    def __exit__(self, *args: Any) -> None:
-        self.close()
 
     def close(self) -> None:
         if self._session:
             self._session.close()
 
+    def download_to(
+        self,
+        path_or_file: "str | os.PathLike[str] | IO[bytes]",
+        read: str,
+        *args: Any,
+    ) -> int:
+        """
+        Downloads the response of the read `read` unparsed to `path_or_file`
+        and returns its size in bytes.
+
+        `read` is one of `"map"`, `"way_full"`, `"relation_full"` and
+        `"changeset_download"`, `args` are the arguments of that read:
+
+            #!python
+            api.download_to("map.osm", "map", 8.765, 47.287, 8.767, 47.289)
+            with open("changesets.osc", "ab") as f:
+                api.download_to(f, "changeset_download", 23123)
+
+        The response is written in chunks while it is being downloaded, so
+        it is never held in memory as a whole and nothing is parsed. It is
+        always in the XML format. `path_or_file` is either a file name, which
+        is created (or replaced) only once the download is complete, or a
+        binary file-like object, which is written to as is.
+
+        If `read` is none of the reads above, `ValueError` is raised. The
+        errors of the API are raised as they are by the read itself (e.g.
+        `OsmApi.ElementNotFoundApiError`).
+        """
+        return self._session._download_to(self._raw_uri(read, *args), path_or_file)
+
     ##################################################
     # Internal method                                #
     ##################################################
 
-    def _raise_write_error(self, e: errors.ApiError) -> NoReturn:
+    def _raw_uri(self, read: str, *args: Any) -> str:
+        """
+        Returns the URI of the read `read` with the arguments `args`, see
+        `download_to`.
+        """
+        try:
+            uri = _RAW_READS[read]
+        except KeyError:
+            raise ValueError(
+                f"read must be one of {', '.join(map(repr, _RAW_READS))}, "
+                f"got {read!r}"
+            ) from None
+        return uri.format(*args)
+
+    def _multi_get(
+        self, osm_type: str, id_list: list[int], workers: int
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Returns the elements of `osm_type` with the ids in `id_list` by id,
+        fetched in batches, see `nodes_get`.
+        """
+        result: dict[int, dict[str, Any]] = {}
+        for batch in self._iter_multi_get(osm_type, id_list, workers, ordered=True):
+            result.update(batch)
+        return result
+
+    def _iter_multi_get(
+        self, osm_type: str, id_list: list[int], workers: int, ordered: bool = False
+    ) -> Iterator[dict[int, dict[str, Any]]]:
+        """
+        Yields the elements of each batch of the ids in `id_list` (see
+        `_id_batches`), fetched by up to `workers` threads at the same time,
+        as the batches are completed (or in the order of the batches if
+        `ordered`).
+
+        Once a batch failed, the batches that have not been started are
+        cancelled and its error is raised.
+        """
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}")
+        batches = _multi_get_batches(self, osm_type, id_list)
+        if len(batches) <= 1 or workers == 1:
+            for batch in batches:
+                yield self._elements_get(osm_type, batch)
+            return
+
+        executor = ThreadPoolExecutor(min(workers, len(batches)))
+        futures = [
+            executor.submit(self._elements_get, osm_type, batch) for batch in batches
+        ]
+        try:
+            for future in futures if ordered else as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+
+    def _elements_get(
+        self, osm_type: str, id_list: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Returns the elements of `osm_type` with the ids in `id_list` by id, of
+        one request.
+        """
+        found = self._get_elements(_multi_get_uri(osm_type, id_list), osm_type)
+        return {element["id"]: self._to_result(osm_type, element) for element in found}
+
+    def _element_get(
+        self, osm_type: str, element_id: int, version: int
+    ) -> dict[str, Any]:
+        """
+        Returns the element of `osm_type` with `element_id`, in `version` or
+        the current one (-1).
+        """
+        uri = _element_uri(osm_type, element_id, version)
+        return self._to_result(osm_type, self._get_elements(uri, osm_type)[0])
+
+    def _element_history(
+        self, osm_type: str, element_id: int
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Returns the versions of the element of `osm_type` with `element_id`
+        by version.
+        """
+        uri = f"/api/0.6/{osm_type}/{element_id}/history"
+        return {
+            element["version"]: self._to_result(osm_type, element)
+            for element in self._get_elements(uri, osm_type)
+        }
+
+    def _elements(self, uri: str, osm_type: str) -> list[dict[str, Any]]:
+        """
+        Returns the (possibly no) elements of `osm_type` of the response to
+        the read `uri`, e.g. the ways of a node.
+        """
+        return [
+            self._to_result(osm_type, element)
+            for element in self._get_elements(uri, osm_type, allow_empty=True)
+        ]
+
+    def _get_elements(
+        self, uri: str, osm_type: str, allow_empty: bool = False
+    ) -> list[dict[str, Any]]:
+        """
+        Returns the elements of `osm_type` of the response to the read `uri`
+        as dicts, in the format of this object.
+        """
+        data = self._session._get(parser._read_uri(self, uri))
+        return parser._parse_elements(self, data, osm_type, allow_empty=allow_empty)
+
+    def _get_osm(self, uri: str) -> list[dict[str, Any]]:
+        """
+        Returns the elements of the `<osm>` document of the response to the
+        read `uri`, in the format of this object.
+        """
+        return parser._parse_osm_read(
+            self, self._session._get(parser._read_uri(self, uri))
+        )
+
+    @staticmethod
+    def _raise_write_error(e: errors.ApiError) -> NoReturn:
         """
         Translate an `ApiError` raised by an element write into a typed error.
 
@@ -167,72 +477,104 @@ class OsmApi(
             ) from e
         raise e
 
-    def _do(  # type: ignore[return-value]
+    def _do(
         self, action: str, osm_type: str, osm_data: dict[str, Any]
     ) -> dict[str, Any]:
-        if not self._current_changeset_id:
-            raise errors.NoChangesetOpenError(
-                "You need to open a changeset before uploading data"
-            )
-        if "timestamp" in osm_data:
-            osm_data.pop("timestamp")
-        osm_data["changeset"] = self._current_changeset_id
-        if action == "create":
-            return self._do_create(osm_type, osm_data)
-        elif action == "modify":
-            return self._do_modify(osm_type, osm_data)
-        elif action == "delete":
-            return self._do_delete(osm_type, osm_data)
-
-    def _do_create(self, osm_type: str, osm_data: dict[str, Any]) -> dict[str, Any]:
-        if osm_data.get("id", -1) > 0:
-            raise errors.OsmTypeAlreadyExistsError(f"This {osm_type} already exists")
+        _prepare_write(self, osm_data)
+        if self._write_batch is not None:
+            return self._queue_write(action, osm_type, osm_data)
+        method, path, body = _write_request(self, action, osm_type, osm_data)
         try:
-            result = self._session._put(
-                f"/api/0.6/{osm_type}/create",
-                xmlbuilder._xml_build(osm_type, osm_data, data=self),
-            )
+            result = self._session._http(method, path, True, body)
         except errors.ApiError as e:
+            if action == "modify":
+                logger.error(e.reason)
             self._raise_write_error(e)
-        osm_data["id"] = int(result.strip())
-        osm_data["version"] = 1
-        return osm_data
+        return _write_result(action, osm_data, result)
 
-    def _do_modify(self, osm_type: str, osm_data: dict[str, Any]) -> dict[str, Any]:
-        try:
-            result = self._session._put(
-                f"/api/0.6/{osm_type}/{osm_data['id']}",
-                xmlbuilder._xml_build(osm_type, osm_data, data=self),
-            )
-        except errors.ApiError as e:
-            logger.error(e.reason)
-            self._raise_write_error(e)
-        osm_data["version"] = int(result.strip())
-        return osm_data
 
-    def _do_delete(self, osm_type: str, osm_data: dict[str, Any]) -> dict[str, Any]:
-        try:
-            result = self._session._delete(
-                f"/api/0.6/{osm_type}/{osm_data['id']}",
-                xmlbuilder._xml_build(osm_type, osm_data, data=self),
-            )
-        except errors.ApiError as e:
-            self._raise_write_error(e)
+def _multi_get_batches(
+    api: "OsmApi | AsyncOsmApi", osm_type: str, id_list: list[int]
+) -> list[list[int]]:
+    """
+    Returns the batches of `id_list` that `api` fetches with a request each,
+    within its `MULTI_FETCH_MAX_IDS` and `MULTI_FETCH_MAX_URL_LENGTH`, see
+    `_id_batches` and `OsmApi.nodes_get`.
+    """
+    return _id_batches(
+        f"{api._api}/api/0.6/{osm_type}s.json?{osm_type}s=",
+        id_list,
+        api.MULTI_FETCH_MAX_IDS,
+        api.MULTI_FETCH_MAX_URL_LENGTH,
+    )
+
+
+def _element_uri(osm_type: str, element_id: int, version: int = -1) -> str:
+    """
+    Returns the URI of the read of the element of `osm_type` with
+    `element_id`, in `version` or the current one (-1).
+    """
+    uri = f"/api/0.6/{osm_type}/{element_id}"
+    if version != -1:
+        uri += f"/{version}"
+    return uri
+
+
+def _multi_get_uri(osm_type: str, id_list: list[int]) -> str:
+    """
+    Returns the URI of the read of the elements of `osm_type` with the ids
+    in `id_list`.
+    """
+    return f"/api/0.6/{osm_type}s?{osm_type}s={','.join(map(str, id_list))}"
+
+
+def _prepare_write(api: "OsmApi | AsyncOsmApi", osm_data: dict[str, Any]) -> None:
+    """
+    Assigns the open changeset of `api` to the element `osm_data` of a
+    write and removes its timestamp.
+
+    If there is no open changeset, `OsmApi.NoChangesetOpenError` is raised.
+    """
+    if not api._current_changeset_id:
+        raise errors.NoChangesetOpenError(
+            "You need to open a changeset before uploading data"
+        )
+    osm_data.pop("timestamp", None)
+    osm_data["changeset"] = api._current_changeset_id
+
+
+def _write_request(
+    api: "OsmApi | AsyncOsmApi", action: str, osm_type: str, osm_data: dict[str, Any]
+) -> tuple[str, str, bytes]:
+    """
+    Returns the HTTP method, the path and the body of the write `action`
+    (`"create"`, `"modify"` or `"delete"`) of the element `osm_data`.
+
+    If an element with a (positive) id is to be created,
+    `OsmApi.OsmTypeAlreadyExistsError` is raised.
+    """
+    if action == "create":
+        if osm_data.get("id", -1) > 0:
+            raise errors.OsmTypeAlreadyExistsError(f"This {osm_type} already exists")
+        path = f"/api/0.6/{osm_type}/create"
+    else:
+        path = f"/api/0.6/{osm_type}/{osm_data['id']}"
+    method = "DELETE" if action == "delete" else "PUT"
+    return method, path, xmlbuilder._xml_build(osm_type, osm_data, data=api)
+
+
+def _write_result(
+    action: str, osm_data: dict[str, Any], result: bytes
+) -> dict[str, Any]:
+    """
+    Assigns the id and version of the response `result` to a write to the
+    element `osm_data` and returns it.
+    """
+    if action == "create":
+        osm_data["id"] = int(result.strip())
+        osm_data["version"] = 1
+    else:
         osm_data["version"] = int(result.strip())
+    if action == "delete":
         osm_data["visible"] = False
-        return osm_data
-
-    def _add_changeset_data(self, change_data: list[dict[str, Any]], type: str) -> str:
-        data = ""
-        for changed_element in change_data:
-            changed_element["changeset"] = self._current_changeset_id
-            xml_data = xmlbuilder._xml_build(type, changed_element, False, data=self)
-            data += xml_data.decode("utf-8")
-        return data
-
-    def _assign_id_and_version(
-        self, response_data: list[Element], request_data: list[dict[str, Any]]
-    ) -> None:
-        for response, element in zip(response_data, request_data):
-            element["id"] = int(response.getAttribute("new_id"))
-            element["version"] = int(response.getAttribute("new_version"))
+    return osm_data
@@ -4,9 +4,16 @@ from typing import Any
 
 from .OsmApi import *  # noqa
 from .errors import *  # noqa
+from .aio import AsyncOsmApi  # noqa
+from . import aio  # noqa
+from . import backends  # noqa
+from . import columns  # noqa
+from . import diff  # noqa
 from . import dom  # noqa
+from . import elements  # noqa
 from . import errors  # noqa
 from . import http  # noqa
+from . import journal  # noqa
 from . import parser  # noqa
 from . import xmlbuilder  # noqa
 
@@ -0,0 +1,847 @@
+"""
+An asyncio client for the OpenStreetMap API.
+
+`AsyncOsmApi` has the methods of `OsmApi` for elements, changesets, notes,
+the capabilities and the map as coroutines:
+
+    #!python
+    import asyncio
+    import osmapi
+
+    async def main():
+        async with osmapi.AsyncOsmApi() as api:
+            nodes = await asyncio.gather(*(api.node_get(i) for i in node_ids))
+
+    asyncio.run(main())
+
+The requests are sent by `AsyncOsmApiSession` with an `httpx.AsyncClient`,
+which keeps a pool of up to `max_connections` keep-alive connections, so
+hundreds of concurrent reads need neither a thread each nor a connection
+each. Like the `requests` session of `OsmApi` it follows redirects and takes
+proxies and CA bundles from the environment. It requires
+[httpx](https://www.python-httpx.org), install it with
+`pip install osmapi[async]`. The responses are parsed and the requests built
+by the same code as for `OsmApi` (`osmapi.parser`, `osmapi.dom`,
+`osmapi.xmlbuilder`), the results are the same.
+
+Authentication is by an OAuth 2.0 access token (`token`) or any other
+`Authorization` header passed in `headers`. The batched writes, the bulk and
+parallel uploads, the streaming reads (`iter_map`, the columns, …) and
+`download_to` are only available on `OsmApi`.
+"""
+
+import asyncio
+import datetime
+import itertools as it
+import logging
+import os
+import ssl
+import time
+import urllib.parse
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from typing import Any
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+from osmapi import __version__
+
+from . import backends, diff, dom, elements, errors, http, parser, xmlbuilder
+from .OsmApi import (
+    OsmApi,
+    _element_uri,
+    _multi_get_batches,
+    _multi_get_uri,
+    _prepare_write,
+    _write_request,
+    _write_result,
+)
+from .changeset import (
+    _changeset_create_body,
+    _changeset_update_body,
+    _changesets_uri,
+    _copy_ids,
+    _prepare,
+    _raise_upload_error,
+)
+from .note import _note_params
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncOsmApiSession:
+    """
+    Sends the requests of `AsyncOsmApi` to the API at `base_url` with an
+    `httpx.AsyncClient`, see the module documentation.
+
+    `headers` are sent with every request, the request needs authentication
+    if they contain an `Authorization` header.
+
+    Requires [httpx](https://www.python-httpx.org), install it with
+    `pip install osmapi[async]`, `ImportError` is raised otherwise.
+    """
+
+    MAX_RETRY_LIMIT = 5
+    """Maximum attempts of a request without a `retry_policy` (default: 5)"""
+
+    MAX_CONNECTIONS = 100
+    """Maximum number of connections open at the same time (default: 100)"""
+
+    def __init__(
+        self,
+        base_url: str,
+        created_by: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: int = 30,
+        max_connections: int = MAX_CONNECTIONS,
+        retry_policy: http.RetryPolicy | None = None,
+    ) -> None:
+        if httpx is None:
+            raise ImportError(
+                "AsyncOsmApi requires httpx, "
+                "install it with `pip install osmapi[async]`"
+            )
+        url = urllib.parse.urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError(f"api must be an http(s) URL, got {base_url!r}")
+        self._api = base_url
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._retry_policy = retry_policy or http.RetryPolicy(
+            max_attempts=self.MAX_RETRY_LIMIT
+        )
+        self._headers = {"User-Agent": created_by, **(headers or {})}
+        self._can_authenticate = any(
+            name.lower() == "authorization" for name in self._headers
+        )
+        self._client = self._new_client()
+
+    def _new_client(self) -> "httpx.AsyncClient":
+        """
+        Returns the client for the requests, which keeps up to
+        `max_connections` keep-alive connections, follows redirects and takes
+        proxies and certificates from the environment, as `requests` does.
+        """
+        return httpx.AsyncClient(
+            headers=self._headers,
+            timeout=self._timeout,
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+            ),
+            verify=_ssl_context(),
+            follow_redirects=True,
+        )
+
+    async def close(self) -> None:
+        """
+        Closes the connections.
+        """
+        await self._client.aclose()
+
+    async def _http_request(
+        self,
+        method: str,
+        path: str,
+        auth: bool,
+        send: http.Body,
+        return_value: bool = True,
+        params: dict | None = None,
+    ) -> bytes:
+        """
+        Returns the body of the response to an HTTP request, as
+        `OsmApiSession._http_request` does, with the same errors.
+        """
+        logger.debug(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {method} {path}")
+        if auth and not self._can_authenticate:
+            raise errors.AuthenticationMissingError(
+                "Authentication missing, this request requires an "
+                "authenticated session, but no token was provided"
+            )
+        content: Any = send
+        if send is not None and not isinstance(send, (str, bytes)):
+            # an iterable body (e.g. an `OsmChangeBody`) is sent with chunked
+            # transfer encoding while it is being produced
+            content = _async_chunks(send)
+        try:
+            response = await self._client.request(
+                method, self._api + path, content=content, params=params
+            )
+        except httpx.TimeoutException as e:
+            raise errors.TimeoutApiError(
+                0, f"Request timed out (timeout={self._timeout})", ""
+            ) from e
+        except httpx.TransportError as e:
+            raise errors.ConnectionApiError(0, f"Connection error: {str(e)}", "") from e
+        except httpx.HTTPError as e:
+            raise errors.ApiError(0, str(e), "") from e
+
+        if response.status_code != 200:
+            error = http._status_error(
+                response.status_code, response.reason_phrase, response.content.strip()
+            )
+            if response.status_code in (429, 503):
+                error.retry_after = http._retry_after(
+                    response.headers.get("retry-after")
+                )
+            raise error
+        if return_value and not response.content:
+            raise errors.ResponseEmptyApiError(
+                response.status_code, response.reason_phrase, ""
+            )
+        return response.content
+
+    async def _http(
+        self,
+        cmd: str,
+        path: str,
+        auth: bool,
+        send: http.Body,
+        return_value: bool = True,
+        params: dict | None = None,
+    ) -> bytes:
+        """
+        Returns the body of the response to an HTTP request, which is sent
+        again if it fails as long as the `http.RetryPolicy` of the session
+        allows it.
+
+        If an unexpected exception persists, it is raised as
+        `OsmApi.MaximumRetryLimitReachedError`.
+        """
+        retry = self._retry_policy.retries(cmd, path)
+        start = time.monotonic()
+        for attempt in it.count(1):
+            try:
+                return await self._http_request(
+                    cmd, path, auth, send, return_value=return_value, params=params
+                )
+            except Exception as e:
+                if not retry or not self._retry_policy.retryable(e):
+                    raise
+                if not isinstance(e, errors.ApiError):
+                    logger.exception("General exception occured")
+                wait = self._retry_policy.wait(attempt, e, time.monotonic() - start)
+                if wait is None:
+                    if isinstance(e, errors.OsmApiError):
+                        raise
+                    raise errors.MaximumRetryLimitReachedError(
+                        f"Give up after {attempt} retries"
+                    ) from e
+                if self._retry_policy.resets(e):
+                    # a closed client can't be used again
+                    await self.close()
+                    self._client = self._new_client()
+            await self._sleep(wait)
+        raise AssertionError("unreachable")
+
+    async def _sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    async def _get(self, path: str, params: dict | None = None) -> bytes:
+        return await self._http("GET", path, False, None, params=params)
+
+    async def _put(
+        self, path: str, data: str | bytes | None, return_value: bool = True
+    ) -> bytes:
+        return await self._http("PUT", path, True, data, return_value=return_value)
+
+    async def _post(
+        self,
+        path: str,
+        data: http.Body,
+        optionalAuth: bool = False,
+        forceAuth: bool = False,
+        params: dict | None = None,
+    ) -> bytes:
+        # the Notes API allows certain POSTs by non-authenticated users
+        auth = (optionalAuth and self._can_authenticate) or forceAuth
+        return await self._http("POST", path, auth, data, params=params)
+
+    async def _delete(self, path: str, data: str | bytes | None) -> bytes:
+        return await self._http("DELETE", path, True, data)
+
+
+async def _async_chunks(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Returns the chunks of bytes of `chunks` as an async iterator, as a body
+    for `httpx.AsyncClient`.
+    """
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def _ssl_context() -> "ssl.SSLContext | bool":
+    """
+    Returns the certificates to verify the API with: the bundle of
+    `REQUESTS_CA_BUNDLE` or `CURL_CA_BUNDLE` like `requests`, otherwise
+    `True` (`httpx` takes `SSL_CERT_FILE` and `SSL_CERT_DIR` into account).
+    """
+    bundle = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+    if bundle:
+        return ssl.create_default_context(cafile=bundle)
+    return True
+
+
+class AsyncOsmApi:
+    """
+    The methods of `OsmApi` as coroutines, see the module documentation.
+    """
+
+    MULTI_FETCH_MAX_IDS = OsmApi.MULTI_FETCH_MAX_IDS
+    """Maximum number of ids per request of `nodes_get` & co. (default: 1000)"""
+
+    MULTI_FETCH_MAX_URL_LENGTH = OsmApi.MULTI_FETCH_MAX_URL_LENGTH
+    """Maximum length of the URL of a request of `nodes_get` & co. (default: 8000)"""
+
+    def __init__(
+        self,
+        appid: str = "",
+        created_by: str = f"osmapi/{__version__}",
+        api: str = "https://www.openstreetmap.org",
+        token: str | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: int = 30,
+        max_connections: int = AsyncOsmApiSession.MAX_CONNECTIONS,
+        retry_policy: http.RetryPolicy | None = None,
+        format: str = "xml",
+        parser_backend: str | backends.ParserBackend | None = None,
+        timestamps: str = "datetime",
+        result_type: str = "dicts",
+        shared_tags: bool = False,
+    ) -> None:
+        """
+        Initializes the AsyncOsmApi object, with the parameters of `OsmApi`.
+
+        Instead of an authenticated `session`, pass the OAuth 2.0 access
+        `token` to make authenticated requests (it is sent as an
+        `Authorization: Bearer` header), or the `headers` to send with every
+        request. At most `max_connections` requests are sent at the same
+        time, the others wait for a connection. Failed requests are sent
+        again as the `retry_policy` allows, see `osmapi.http.RetryPolicy`.
+
+        The object has to be closed, with `close` or by using it as an async
+        context manager (`async with osmapi.AsyncOsmApi() as api:`).
+        """
+        if format not in ("xml", "json"):
+            raise ValueError(f"format must be 'xml' or 'json', got {format!r}")
+        self._format: str = format
+        self._parser_backend: backends.ParserBackend = backends.get_backend(
+            parser_backend
+        )
+        dom.timestamp_decoder(timestamps)
+        self._timestamps: str = timestamps
+        self._to_result = elements.result_converter(result_type)
+        self._result_type: str = result_type
+        self._shared_tags: bool = shared_tags
+        self._api: str = api.strip("/")
+        if not appid:
+            self._created_by: str = created_by
+        else:
+            self._created_by = f"{appid} ({created_by})"
+        self._current_changeset_id: int = 0
+
+        headers = dict(headers or {})
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        self._session = AsyncOsmApiSession(
+            self._api,
+            self._created_by,
+            headers=headers,
+            timeout=timeout,
+            max_connections=max_connections,
+            retry_policy=retry_policy,
+        )
+
+    async def __aenter__(self) -> "AsyncOsmApi":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        await self._session.close()
+
+    ##################################################
+    # Capabilities and map                           #
+    ##################################################
+
+    async def capabilities(self) -> dict[str, dict[str, Any]]:
+        """See `OsmApi.capabilities`."""
+        data = await self._session._get("/api/capabilities")
+        return parser._parse_capabilities(self, data)
+
+    async def map(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> list[dict[str, Any]]:
+        """See `OsmApi.map`."""
+        bbox = f"{min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}"
+        return await self._get_osm(f"/api/0.6/map?bbox={bbox}")
+
+    async def map_raw(
+        self, min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> bytes:
+        """See `OsmApi.map_raw`."""
+        bbox = f"{min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}"
+        return await self._session._get(f"/api/0.6/map?bbox={bbox}")
+
+    ##################################################
+    # Nodes, ways and relations                      #
+    ##################################################
+
+    async def node_get(self, node_id: int, node_version: int = -1) -> dict[str, Any]:
+        """See `OsmApi.node_get`."""
+        return await self._element_get("node", node_id, node_version)
+
+    async def node_create(self, node_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.node_create`."""
+        return await self._do("create", "node", node_data)
+
+    async def node_update(self, node_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.node_update`."""
+        return await self._do("modify", "node", node_data)
+
+    async def node_delete(self, node_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.node_delete`."""
+        return await self._do("delete", "node", node_data)
+
+    async def node_history(self, node_id: int) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.node_history`."""
+        return await self._element_history("node", node_id)
+
+    async def node_ways(self, node_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.node_ways`."""
+        return await self._elements(f"/api/0.6/node/{node_id}/ways", "way")
+
+    async def node_relations(self, node_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.node_relations`."""
+        return await self._elements(f"/api/0.6/node/{node_id}/relations", "relation")
+
+    async def nodes_get(self, node_id_list: list[int]) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.nodes_get`."""
+        return await self._elements_get("node", node_id_list)
+
+    async def way_get(self, way_id: int, way_version: int = -1) -> dict[str, Any]:
+        """See `OsmApi.way_get`."""
+        return await self._element_get("way", way_id, way_version)
+
+    async def way_create(self, way_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.way_create`."""
+        return await self._do("create", "way", way_data)
+
+    async def way_update(self, way_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.way_update`."""
+        return await self._do("modify", "way", way_data)
+
+    async def way_delete(self, way_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.way_delete`."""
+        return await self._do("delete", "way", way_data)
+
+    async def way_history(self, way_id: int) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.way_history`."""
+        return await self._element_history("way", way_id)
+
+    async def way_relations(self, way_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.way_relations`."""
+        return await self._elements(f"/api/0.6/way/{way_id}/relations", "relation")
+
+    async def way_full(self, way_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.way_full`."""
+        return await self._get_osm(f"/api/0.6/way/{way_id}/full")
+
+    async def way_full_raw(self, way_id: int) -> bytes:
+        """See `OsmApi.way_full_raw`."""
+        return await self._session._get(f"/api/0.6/way/{way_id}/full")
+
+    async def ways_get(self, way_id_list: list[int]) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.ways_get`."""
+        return await self._elements_get("way", way_id_list)
+
+    async def relation_get(
+        self, relation_id: int, relation_version: int = -1
+    ) -> dict[str, Any]:
+        """See `OsmApi.relation_get`."""
+        return await self._element_get("relation", relation_id, relation_version)
+
+    async def relation_create(self, relation_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.relation_create`."""
+        return await self._do("create", "relation", relation_data)
+
+    async def relation_update(self, relation_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.relation_update`."""
+        return await self._do("modify", "relation", relation_data)
+
+    async def relation_delete(self, relation_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.relation_delete`."""
+        return await self._do("delete", "relation", relation_data)
+
+    async def relation_history(self, relation_id: int) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.relation_history`."""
+        return await self._element_history("relation", relation_id)
+
+    async def relation_relations(self, relation_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.relation_relations`."""
+        return await self._elements(
+            f"/api/0.6/relation/{relation_id}/relations", "relation"
+        )
+
+    async def relation_full(self, relation_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.relation_full`."""
+        return await self._get_osm(f"/api/0.6/relation/{relation_id}/full")
+
+    async def relation_full_recur(self, relation_id: int) -> list[dict[str, Any]]:
+        """
+        See `OsmApi.relation_full_recur`. The relations of each level of the
+        hierarchy are downloaded at the same time.
+        """
+        data: list[dict[str, Any]] = []
+        done: set[int] = set()
+        todo = [relation_id]
+        while todo:
+            done.update(todo)
+            results = await asyncio.gather(*map(self.relation_full, todo))
+            todo = []
+            for result in results:
+                for item in result:
+                    if item["type"] != "relation":
+                        continue
+                    relation = item["data"]
+                    if isinstance(relation, elements.Relation):
+                        child_id = relation.id
+                    else:
+                        child_id = relation["id"]
+                    if child_id not in done and child_id not in todo:
+                        todo.append(child_id)
+                data += result
+        return data
+
+    async def relation_full_raw(self, relation_id: int) -> bytes:
+        """See `OsmApi.relation_full_raw`."""
+        return await self._session._get(f"/api/0.6/relation/{relation_id}/full")
+
+    async def relations_get(
+        self, relation_id_list: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.relations_get`."""
+        return await self._elements_get("relation", relation_id_list)
+
+    ##################################################
+    # Changesets                                     #
+    ##################################################
+
+    @asynccontextmanager
+    async def changeset(
+        self, changeset_tags: dict[str, str] | None = None
+    ) -> AsyncGenerator[int, None]:
+        """
+        Async context manager for a changeset, see `OsmApi.changeset`:
+
+            #!python
+            async with api.changeset({"comment": "Import"}) as changeset_id:
+                await api.node_create({"lon": 1, "lat": 1, "tag": {}})
+
+        There are no batched writes (`batch=True`).
+        """
+        changeset_id = await self.changeset_create(changeset_tags)
+        try:
+            yield changeset_id
+        finally:
+            await self.changeset_close()
+
+    async def changeset_get(
+        self, changeset_id: int, include_discussion: bool = False
+    ) -> dict[str, Any]:
+        """See `OsmApi.changeset_get`."""
+        path = f"/api/0.6/changeset/{changeset_id}"
+        if include_discussion:
+            path = f"{path}?include_discussion=true"
+        data = await self._session._get(path)
+        return parser._parse_changeset(
+            self, data, include_discussion=include_discussion
+        )
+
+    async def changeset_update(
+        self, changeset_tags: dict[str, str] | None = None
+    ) -> int:
+        """See `OsmApi.changeset_update`."""
+        body = _changeset_update_body(self, changeset_tags)
+        try:
+            await self._session._put(
+                f"/api/0.6/changeset/{self._current_changeset_id}",
+                body,
+                return_value=False,
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
+        return self._current_changeset_id
+
+    async def changeset_create(
+        self, changeset_tags: dict[str, str] | None = None
+    ) -> int:
+        """See `OsmApi.changeset_create`."""
+        body = _changeset_create_body(self, changeset_tags)
+        result = await self._session._put("/api/0.6/changeset/create", body)
+        self._current_changeset_id = int(result)
+        return self._current_changeset_id
+
+    async def changeset_close(self) -> int:
+        """See `OsmApi.changeset_close`."""
+        if not self._current_changeset_id:
+            raise errors.NoChangesetOpenError("No changeset currently opened")
+        try:
+            await self._session._put(
+                f"/api/0.6/changeset/{self._current_changeset_id}/close",
+                None,
+                return_value=False,
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
+        current_changeset_id = self._current_changeset_id
+        self._current_changeset_id = 0
+        return current_changeset_id
+
+    async def changeset_upload(
+        self,
+        changes_data: list[dict[str, Any]],
+        *,
+        order: bool = False,
+        compact: bool = False,
+        current: dict[str, dict[int, dict[str, Any]]] | None = None,
+    ) -> list[dict[str, Any]]:
+        """See `OsmApi.changeset_upload`."""
+        upload, folded = _prepare(changes_data, order, compact, current)
+        try:
+            response_data = await self._session._post(
+                f"/api/0.6/changeset/{self._current_changeset_id}/upload",
+                xmlbuilder.OsmChangeBody(upload, data=self),
+                forceAuth=True,
+            )
+        except errors.ApiError as e:
+            _raise_upload_error(e)
+        diff_result = diff.DiffResult.parse(response_data, backend=self._parser_backend)
+        diff_result.apply(upload)
+        _copy_ids(folded)
+        return changes_data
+
+    async def changeset_download(self, changeset_id: int) -> list[dict[str, Any]]:
+        """See `OsmApi.changeset_download`."""
+        data = await self._session._get(f"/api/0.6/changeset/{changeset_id}/download")
+        return parser._parse_osc_read(self, data)
+
+    async def changeset_download_raw(self, changeset_id: int) -> bytes:
+        """See `OsmApi.changeset_download_raw`."""
+        return await self._session._get(f"/api/0.6/changeset/{changeset_id}/download")
+
+    async def changesets_get(
+        self,
+        min_lon: float | None = None,
+        min_lat: float | None = None,
+        max_lon: float | None = None,
+        max_lat: float | None = None,
+        userid: int | None = None,
+        username: str | None = None,
+        closed_after: str | None = None,
+        created_before: str | None = None,
+        only_open: bool = False,
+        only_closed: bool = False,
+    ) -> dict[int, dict[str, Any]]:
+        """See `OsmApi.changesets_get`."""
+        uri = _changesets_uri(
+            min_lon,
+            min_lat,
+            max_lon,
+            max_lat,
+            userid,
+            username,
+            closed_after,
+            created_before,
+            only_open,
+            only_closed,
+        )
+        return parser._parse_changesets(self, await self._session._get(uri))
+
+    async def changeset_comment(
+        self, changeset_id: int, comment: str
+    ) -> dict[str, Any]:
+        """See `OsmApi.changeset_comment`."""
+        params = urllib.parse.urlencode({"text": comment})
+        try:
+            data = await self._session._post(
+                f"/api/0.6/changeset/{changeset_id}/comment", params, forceAuth=True
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
+        return parser._parse_changeset(self, data)
+
+    async def changeset_subscribe(self, changeset_id: int) -> dict[str, Any]:
+        """See `OsmApi.changeset_subscribe`."""
+        try:
+            data = await self._session._post(
+                f"/api/0.6/changeset/{changeset_id}/subscribe", None, forceAuth=True
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 409, errors.AlreadySubscribedApiError)
+        return parser._parse_changeset(self, data)
+
+    async def changeset_unsubscribe(self, changeset_id: int) -> dict[str, Any]:
+        """See `OsmApi.changeset_unsubscribe`."""
+        try:
+            data = await self._session._post(
+                f"/api/0.6/changeset/{changeset_id}/unsubscribe", None, forceAuth=True
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 404, errors.NotSubscribedApiError)
+        return parser._parse_changeset(self, data)
+
+    ##################################################
+    # Notes                                          #
+    ##################################################
+
+    async def notes_get(
+        self,
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float,
+        limit: int = 100,
+        closed: int = 7,
+    ) -> list[dict[str, Any]]:
+        """See `OsmApi.notes_get`."""
+        params = {
+            "bbox": f"{min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}",
+            "limit": limit,
+            "closed": closed,
+        }
+        return await self._notes("/api/0.6/notes", params)
+
+    async def note_get(self, note_id: int) -> dict[str, Any]:
+        """See `OsmApi.note_get`."""
+        uri = f"/api/0.6/notes/{note_id}"
+        data = await self._session._get(parser._read_uri(self, uri))
+        return parser._parse_note(self, data, format=self._format)
+
+    async def note_create(self, note_data: dict[str, Any]) -> dict[str, Any]:
+        """See `OsmApi.note_create`."""
+        return await self._note_action("/api/0.6/notes", params=note_data)
+
+    async def note_comment(self, note_id: int, comment: str) -> dict[str, Any]:
+        """See `OsmApi.note_comment`."""
+        return await self._note_action(f"/api/0.6/notes/{note_id}/comment", comment)
+
+    async def note_close(
+        self, note_id: int, comment: str | None = None
+    ) -> dict[str, Any]:
+        """See `OsmApi.note_close`."""
+        return await self._note_action(
+            f"/api/0.6/notes/{note_id}/close", comment, optional_auth=False
+        )
+
+    async def note_reopen(
+        self, note_id: int, comment: str | None = None
+    ) -> dict[str, Any]:
+        """See `OsmApi.note_reopen`."""
+        return await self._note_action(
+            f"/api/0.6/notes/{note_id}/reopen", comment, optional_auth=False
+        )
+
+    async def notes_search(
+        self, query: str, limit: int = 100, closed: int = 7
+    ) -> list[dict[str, Any]]:
+        """See `OsmApi.notes_search`."""
+        params = {"q": query, "limit": limit, "closed": closed}
+        return await self._notes("/api/0.6/notes/search", params)
+
+    ##################################################
+    # Internal method                                #
+    ##################################################
+
+    async def _get_elements(
+        self, uri: str, osm_type: str, allow_empty: bool = False
+    ) -> list[dict[str, Any]]:
+        """See `OsmApi._get_elements`."""
+        data = await self._session._get(parser._read_uri(self, uri))
+        return parser._parse_elements(self, data, osm_type, allow_empty=allow_empty)
+
+    async def _get_osm(self, uri: str) -> list[dict[str, Any]]:
+        """See `OsmApi._get_osm`."""
+        data = await self._session._get(parser._read_uri(self, uri))
+        return parser._parse_osm_read(self, data)
+
+    async def _elements(self, uri: str, osm_type: str) -> list[dict[str, Any]]:
+        dicts = await self._get_elements(uri, osm_type, allow_empty=True)
+        return [self._to_result(osm_type, element) for element in dicts]
+
+    async def _element_get(
+        self, osm_type: str, element_id: int, version: int
+    ) -> dict[str, Any]:
+        uri = _element_uri(osm_type, element_id, version)
+        return self._to_result(osm_type, (await self._get_elements(uri, osm_type))[0])
+
+    async def _element_history(
+        self, osm_type: str, element_id: int
+    ) -> dict[int, dict[str, Any]]:
+        uri = f"/api/0.6/{osm_type}/{element_id}/history"
+        return {
+            element["version"]: self._to_result(osm_type, element)
+            for element in await self._get_elements(uri, osm_type)
+        }
+
+    async def _elements_get(
+        self, osm_type: str, id_list: list[int]
+    ) -> dict[int, dict[str, Any]]:
+        """
+        Returns the elements of `osm_type` with the ids in `id_list` by id,
+        fetched in batches (as by `OsmApi.nodes_get`) at the same time.
+        """
+        results = await asyncio.gather(
+            *(
+                self._get_elements(_multi_get_uri(osm_type, batch), osm_type)
+                for batch in _multi_get_batches(self, osm_type, id_list)
+            )
+        )
+        return {
+            element["id"]: self._to_result(osm_type, element)
+            for elements_of_batch in results
+            for element in elements_of_batch
+        }
+
+    async def _notes(
+        self, uri: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        data = await self._session._get(parser._read_uri(self, uri), params=params)
+        return parser._parse_notes(self, data)
+
+    async def _note_action(
+        self,
+        path: str,
+        comment: str | None = None,
+        optional_auth: bool = True,
+        params: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        try:
+            result = await self._session._post(
+                path,
+                None,
+                optionalAuth=optional_auth,
+                params=_note_params(comment, params),
+            )
+        except errors.ApiError as e:
+            errors._raise_as(e, 409, errors.NoteAlreadyClosedApiError)
+        return parser._parse_note(self, result)
+
+    async def _do(
+        self, action: str, osm_type: str, osm_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        _prepare_write(self, osm_data)
+        method, path, body = _write_request(self, action, osm_type, osm_data)
+        try:
+            result = await self._session._http(method, path, True, body)
+        except errors.ApiError as e:
+            if action == "modify":
+                logger.error(e.reason)
+            OsmApi._raise_write_error(e)
+        return _write_result(action, osm_data, result)
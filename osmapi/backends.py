@@ -0,0 +1,149 @@
+"""
+XML parser backends for the OpenStreetMap API.
+
+All responses are parsed through a `ParserBackend`, an XML parser with the
+API of `xml.etree.ElementTree`. Two backends are available:
+
+* `"etree"`: `xml.etree.ElementTree` of the standard library (expat based),
+  always available
+* `"lxml"`: [lxml](https://lxml.de), considerably faster, used automatically
+  if it is installed (`pip install osmapi[lxml]`)
+
+Pass `parser_backend="etree"` or `parser_backend="lxml"` to `OsmApi` to pin a
+backend instead of using the fastest one available.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Any
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover
+    lxml_etree = None
+
+
+class ParserBackend:
+    """
+    Interface of an XML parser backend.
+
+    The elements a backend returns must have the `xml.etree.ElementTree` API
+    (`tag`, `attrib`, `text`, `iter`, `find`, `remove` and iteration over the
+    children), that is what `osmapi.dom` and `osmapi.parser` use.
+    """
+
+    name = ""
+    """Name of the backend, as accepted by `get_backend`"""
+
+    parse_errors: tuple[type[Exception], ...] = ()
+    """The exceptions raised by the backend for a malformed document"""
+
+    def fromstring(self, data: bytes) -> Any:
+        """
+        Returns the root element of the document `data`.
+        """
+        raise NotImplementedError
+
+    def pull_parser(self) -> Any:
+        """
+        Returns a new incremental parser with the API of
+        `xml.etree.ElementTree.XMLPullParser` (`feed`, `read_events` and
+        `close`), reporting the `start` and `end` events.
+        """
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.name!r}>"
+
+
+class EtreeBackend(ParserBackend):
+    """
+    Parser backend using `xml.etree.ElementTree` of the standard library.
+    """
+
+    name = "etree"
+    parse_errors = (ET.ParseError,)
+
+    def fromstring(self, data: bytes) -> ET.Element:
+        return ET.fromstring(data)
+
+    def pull_parser(self) -> ET.XMLPullParser:
+        return ET.XMLPullParser(events=("start", "end"))
+
+
+class LxmlBackend(ParserBackend):
+    """
+    Parser backend using `lxml.etree`.
+
+    Entities are not resolved and nothing is loaded from the network. lxml
+    parsers must not be shared between threads, so every document gets a
+    parser of its own.
+    """
+
+    name = "lxml"
+
+    def __init__(self) -> None:
+        if lxml_etree is None:
+            raise ImportError(
+                "The lxml parser backend requires lxml, "
+                "install it with `pip install osmapi[lxml]`"
+            )
+        self.parse_errors = (lxml_etree.XMLSyntaxError,)
+
+    def fromstring(self, data: bytes) -> Any:
+        parser = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+        return lxml_etree.fromstring(data, parser=parser)
+
+    def pull_parser(self) -> Any:
+        return lxml_etree.XMLPullParser(
+            events=("start", "end"), resolve_entities=False, no_network=True
+        )
+
+
+BACKENDS: dict[str, type[ParserBackend]] = {
+    "lxml": LxmlBackend,
+    "etree": EtreeBackend,
+}
+"""The known parser backends by name, the fastest first"""
+
+
+def available_backends() -> list[str]:
+    """
+    Returns the names of the backends that can be used, the fastest first.
+    """
+    return [name for name in BACKENDS if name != "lxml" or lxml_etree is not None]
+
+
+def get_backend(backend: "str | ParserBackend | None" = None) -> ParserBackend:
+    """
+    Returns the parser backend `backend`.
+
+    `backend` is the name of a backend, a `ParserBackend` instance (which is
+    returned as is) or `None` for the fastest backend available.
+
+    If there is no backend with the given name, `ValueError` is raised. If the
+    backend is not available (e.g. `"lxml"` without lxml installed),
+    `ImportError` is raised.
+    """
+    if isinstance(backend, ParserBackend):
+        return backend
+    if backend is None:
+        backend = available_backends()[0]
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown parser backend {backend!r}, "
+            f"choose one of {', '.join(repr(name) for name in BACKENDS)}"
+        )
+    return _instance(backend)
+
+
+_instances: dict[str, ParserBackend] = {}
+
+
+def _instance(name: str) -> ParserBackend:
+    """
+    Returns the shared instance of the backend `name`, the backends are
+    stateless, so there is no need to create them over and over again.
+    """
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -2,10 +2,10 @@
 Capabilities and miscellaneous operations for the OpenStreetMap API.
 """
 
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
+from collections.abc import Iterable, Iterator
+from typing import Any, TYPE_CHECKING
 
-from . import dom, parser
+from . import columns, parser
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
@@ -23,19 +23,7 @@ class CapabilitiesMixin:
         """
         uri = "/api/capabilities"
         data = self._session._get(uri)
-
-        api_element = cast(Element, dom.OsmResponseToDom(data, tag="api", single=True))
-        result: dict[str, Any] = {}
-        for elem in api_element.childNodes:
-            if elem.nodeType != elem.ELEMENT_NODE:
-                continue
-            result[elem.nodeName] = {}
-            for k, v in elem.attributes.items():
-                try:
-                    result[elem.nodeName][k] = float(v)
-                except Exception:
-                    result[elem.nodeName][k] = v
-        return result
+        return parser._parse_capabilities(self, data)
 
     def map(
         self: "OsmApi", min_lon: float, min_lat: float, max_lon: float, max_lat: float
@@ -45,6 +33,78 @@ class CapabilitiesMixin:
 
         Returns list of dict with type and data.
         """
+        bbox = f"{min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}"
+        return self._get_osm(f"/api/0.6/map?bbox={bbox}")
+
+    def iter_map(
+        self: "OsmApi", min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Download data in bounding box, element by element.
+
+        Yields the same dicts with type and data as `map` returns, but parses
+        the response while it is still being downloaded: the first element is
+        available as soon as it has arrived, and the memory used stays the same
+        for any size of bounding box.
+
+            #!python
+            for element in api.iter_map(8.765, 47.287, 8.767, 47.289):
+                print(element["type"], element["data"]["id"])
+
+        The request is only sent when the iteration starts, and the connection
+        is held until it is finished (or the generator is closed).
+        """
         uri = f"/api/0.6/map?bbox={min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}"
-        data = self._session._get(uri)
-        return parser.parse_osm(data)
+        with self._session._get_stream(uri) as body:
+            yield from parser.iter_osm(
+                body,
+                backend=self._parser_backend,
+                timestamps=self._timestamps,
+                result_type=self._result_type,
+                shared_tags=self._shared_tags,
+            )
+
+    def map_columns(
+        self: "OsmApi",
+        min_lon: float,
+        min_lat: float,
+        max_lon: float,
+        max_lat: float,
+        *,
+        tags: Iterable[str] = (),
+        use_numpy: bool | None = None,
+    ) -> columns.Columns:
+        """
+        Download data in bounding box, as columns.
+
+        Returns a `osmapi.columns.Columns`: the ids, versions and fixed-point
+        coordinates of the nodes, the ids and node ids of the ways and the ids
+        of the relations as flat arrays, plus the values of the tags with the
+        keys in `tags`. The arrays are NumPy arrays if NumPy is installed (or
+        `use_numpy` is set), `array.array` otherwise.
+
+            #!python
+            cols = api.map_columns(8.765, 47.287, 8.767, 47.289, tags=["highway"])
+            lat = cols.node_lat / osmapi.columns.COORDINATE_SCALE
+
+        The response is streamed into the columns without building a dict per
+        element, always in the XML format.
+        """
+        uri = f"/api/0.6/map?bbox={min_lon:f},{min_lat:f},{max_lon:f},{max_lat:f}"
+        with self._session._get_stream(uri) as body:
+            return parser.parse_osm_columns(
+                body, backend=self._parser_backend, tags=tags, use_numpy=use_numpy
+            )
+
+    def map_raw(
+        self: "OsmApi", min_lon: float, min_lat: float, max_lon: float, max_lat: float
+    ) -> bytes:
+        """
+        Download data in bounding box, unparsed.
+
+        Returns the XML response of `map` as `bytes`, as sent by the API. To
+        store it in a file without holding it in memory, use
+        `download_to(path_or_file, "map", min_lon, min_lat, max_lon, max_lat)`.
+        """
+        uri = self._raw_uri("map", min_lon, min_lat, max_lon, max_lat)
+        return self._session._get(uri)
@@ -2,27 +2,64 @@
 Changeset operations for the OpenStreetMap API.
 """
 
+import copy
+import itertools
+import os
+import queue
 import re
+import threading
 import urllib.parse
-import xml.dom.minidom
-import xml.parsers.expat
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from collections.abc import Generator
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
+from collections.abc import Generator, Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any, NoReturn, TYPE_CHECKING, cast
 
-from . import dom, errors, xmlbuilder, parser
+from . import diff, errors, xmlbuilder, parser
+from .journal import UploadJournal, diff_entries, payload_hash, reconcile
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
+    from .aio import AsyncOsmApi
+
+DEFAULT_MAX_CHANGESET_ELEMENTS = 10_000
+"""Elements per changeset if the API does not report a maximum"""
+
+BATCH_SIZE = 1000
+"""Number of queued writes a batched changeset uploads at once (default)"""
+
+
+@dataclass
+class WriteBatch:
+    """
+    The writes queued in a changeset opened with `batch=True`, see
+    `ChangesetMixin.changeset`.
+    """
+
+    size: int
+    """Number of writes after which the queue is uploaded"""
+    pending: list[tuple[str, str, dict[str, Any]]] = field(default_factory=list)
+    """The queued `(action, type, data)` writes"""
+    ids: dict[str, dict[int, int]] = field(
+        default_factory=lambda: {"node": {}, "way": {}, "relation": {}}
+    )
+    """The ids assigned to the placeholder ids so far, by type"""
+    last_placeholder: int = 0
+    """The smallest placeholder id of a created element so far"""
 
 
 class ChangesetMixin:
     """Mixin providing changeset-related operations with pythonic method names."""
 
+    _write_batch: WriteBatch | None
+
     @contextmanager
     def changeset(
-        self: "OsmApi", changeset_tags: dict[str, str] | None = None
+        self: "OsmApi",
+        changeset_tags: dict[str, str] | None = None,
+        *,
+        batch: bool = False,
+        batch_size: int = BATCH_SIZE,
     ) -> Generator[int, None, None]:
         """
         Context manager for a Changeset.
@@ -50,16 +87,105 @@ class ChangesetMixin:
 
         If there is already an open changeset,
         `OsmApi.ChangesetAlreadyOpenError` is raised.
+
+        With `batch=True` the writes (`node_create`, `way_update`,
+        `relation_delete`, …) are not sent one by one, but queued and
+        uploaded with `changeset_upload`, `batch_size` writes at a time, and
+        whatever is left at the end of the `with` block:
+
+            #!python
+            with api.changeset({"comment": "Import"}, batch=True):
+                for lon, lat in benches:
+                    api.node_create({"lon": lon, "lat": lat, "tag": {}})
+
+        The writes return their dict right away. A created element gets a
+        placeholder id (a negative number below the placeholder ids used so
+        far, unless it already has one) that can be used to refer to it, e.g.
+        in the `nd` of a way; the real ids
+        and versions are filled into the returned dicts when the queue is
+        uploaded, and references to the placeholder ids in later writes are
+        replaced. Call `changeset_flush` to upload the queue earlier.
+
+        If the `with` block raises, the writes still queued are dropped.
         """
         if changeset_tags is None:
             changeset_tags = {}
         # Create a new changeset
         changeset_id = self.changeset_create(changeset_tags)
+        if batch:
+            self._write_batch = WriteBatch(batch_size)
         try:
             yield changeset_id
+            self.changeset_flush()
         finally:
+            self._write_batch = None
             self.changeset_close()
 
+    def changeset_flush(self: "OsmApi") -> list[dict[str, Any]]:
+        """
+        Uploads the writes queued in a changeset opened with `batch=True`
+        (see `changeset`) and fills in the ids and versions of their dicts.
+
+        Returns the uploaded changes, like `changeset_upload`. Without a
+        batch, or with nothing queued, nothing is uploaded.
+
+        The deleted elements get the version of their deletion, as from
+        `node_delete` without a batch. The errors are the same as for the
+        writes without a batch, e.g. `OsmApi.VersionMismatchApiError` for an
+        update or delete of an outdated version.
+        """
+        batch = self._write_batch
+        if batch is None or not batch.pending:
+            return []
+        changes_data = _group_writes(batch.pending)
+        batch.pending = []
+        placeholders = _replace_placeholders(changes_data, batch.ids)
+        deleted = [
+            (element, element.get("version"))
+            for change in changes_data
+            if change["action"] == "delete"
+            for element in change["data"]
+        ]
+        try:
+            self.changeset_upload(changes_data)
+        except errors.ChangesetClosedApiError:
+            raise
+        except errors.ApiError as e:
+            self._raise_write_error(e)
+        for osm_type, placeholder, element in placeholders:
+            batch.ids[osm_type][placeholder] = element["id"]
+        # the <diffResult> has no version for a deletion, which is the next
+        # one of the element (the API answers a single delete with it)
+        for element, version in deleted:
+            element["visible"] = False
+            if version is not None:
+                element["version"] = int(version) + 1
+        return changes_data
+
+    def _queue_write(
+        self: "OsmApi", action: str, osm_type: str, osm_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """
+        Queues a write in the batch of the open changeset, and uploads the
+        queue once it is full.
+        """
+        batch = cast(WriteBatch, self._write_batch)
+        if action == "create":
+            if osm_data.get("id", -1) > 0:
+                raise errors.OsmTypeAlreadyExistsError(
+                    f"This {osm_type} already exists"
+                )
+            if "id" in osm_data:
+                # the next placeholder must not be one the caller already used
+                batch.last_placeholder = min(batch.last_placeholder, osm_data["id"])
+            else:
+                batch.last_placeholder -= 1
+                osm_data["id"] = batch.last_placeholder
+        batch.pending.append((action, osm_type, osm_data))
+        if len(batch.pending) >= batch.size:
+            self.changeset_flush()
+        return osm_data
+
     def changeset_get(
         self: "OsmApi", changeset_id: int, include_discussion: bool = False
     ) -> dict[str, Any]:
@@ -75,10 +201,9 @@ class ChangesetMixin:
         if include_discussion:
             path = f"{path}?include_discussion=true"
         data = self._session._get(path)
-        changeset = cast(
-            Element, dom.OsmResponseToDom(data, tag="changeset", single=True)
+        return parser._parse_changeset(
+            self, data, include_discussion=include_discussion
         )
-        return dom.dom_parse_changeset(changeset, include_discussion=include_discussion)
 
     def changeset_update(
         self: "OsmApi", changeset_tags: dict[str, str] | None = None
@@ -95,25 +220,15 @@ class ChangesetMixin:
         If the changeset is already closed,
         `OsmApi.ChangesetClosedApiError` is raised.
         """
-        if changeset_tags is None:
-            changeset_tags = {}
-        if not self._current_changeset_id:
-            raise errors.NoChangesetOpenError("No changeset currently opened")
-        if "created_by" not in changeset_tags:
-            changeset_tags["created_by"] = self._created_by
+        body = _changeset_update_body(self, changeset_tags)
         try:
             self._session._put(
                 f"/api/0.6/changeset/{self._current_changeset_id}",
-                xmlbuilder._xml_build("changeset", {"tag": changeset_tags}, data=self),
+                body,
                 return_value=False,
             )
         except errors.ApiError as e:
-            if e.status == 409:
-                raise errors.ChangesetClosedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
-                raise
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
         return self._current_changeset_id
 
     def changeset_create(
@@ -132,26 +247,8 @@ class ChangesetMixin:
         If there is already an open changeset,
         `OsmApi.ChangesetAlreadyOpenError` is raised.
         """
-        if changeset_tags is None:
-            changeset_tags = {}
-        if self._current_changeset_id:
-            raise errors.ChangesetAlreadyOpenError("Changeset already opened")
-        if "created_by" not in changeset_tags:
-            changeset_tags["created_by"] = self._created_by
-
-        # check if someone tries to create a test changeset to PROD
-        if (
-            self._api == "https://www.openstreetmap.org"
-            and changeset_tags.get("comment") == "My first test"
-        ):
-            raise errors.OsmApiError(
-                "DO NOT CREATE test changesets on the production server"
-            )
-
-        result = self._session._put(
-            "/api/0.6/changeset/create",
-            xmlbuilder._xml_build("changeset", {"tag": changeset_tags}, data=self),
-        )
+        body = _changeset_create_body(self, changeset_tags)
+        result = self._session._put("/api/0.6/changeset/create", body)
         self._current_changeset_id = int(result)
         return self._current_changeset_id
 
@@ -181,72 +278,396 @@ class ChangesetMixin:
             current_changeset_id = self._current_changeset_id
             self._current_changeset_id = 0
         except errors.ApiError as e:
-            if e.status == 409:
-                raise errors.ChangesetClosedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
-                raise
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
         return current_changeset_id
 
     def changeset_upload(
-        self: "OsmApi", changes_data: list[dict[str, Any]]
+        self: "OsmApi",
+        changes_data: list[dict[str, Any]],
+        *,
+        order: bool = False,
+        compact: bool = False,
+        current: dict[str, dict[int, dict[str, Any]]] | None = None,
     ) -> list[dict[str, Any]]:
         """
         Upload data with the `changes_data` list of dicts.
 
         Returns list with updated ids.
 
+        The changes are uploaded in the order of `changes_data`. With
+        `order=True` they are sorted by their dependencies first, see
+        `order_changes`, so that e.g. a way is not created before its nodes
+        or a node not deleted before the way using it.
+
+        With `compact=True` the changes are folded into the net change of
+        each element before they are uploaded (a create and the modifies
+        after it into one create, several modifies into one, a create and a
+        delete into nothing), and with the current versions of elements in
+        `current` the modifies that don't change anything are left out, see
+        `compact_changes`. The ids and versions of the uploaded elements are
+        also filled into the element dicts folded into them.
+
+        The `<osmChange>` document is serialized element by element while it
+        is being sent (with chunked transfer encoding), see
+        `osmapi.xmlbuilder.OsmChangeBody`. The ids and versions of the
+        `<diffResult>` are assigned by the id an element was uploaded with
+        (its `old_id`), see `osmapi.diff.DiffResult`.
+
         If no session is provided to authenticate the request,
         `OsmApi.AuthenticationMissingError` is raised.
 
         If the changeset is already closed,
         `OsmApi.ChangesetClosedApiError` is raised.
+
+        If the response has no entry for an uploaded element,
+        `OsmApi.XmlResponseInvalidError` is raised.
+        """
+        upload, folded = _prepare(changes_data, order, compact, current)
+        self._upload(upload)
+        _copy_ids(folded)
+        return changes_data
+
+    def _upload(
+        self: "OsmApi", changes_data: list[dict[str, Any]], retry: bool | None = None
+    ) -> None:
+        """
+        Uploads `changes_data` to the open changeset and assigns the ids and
+        versions of the `diffResult`, see `changeset_upload`. With
+        `retry=False` a failed upload is not sent again, even if the retry
+        policy of the session allows it.
         """
-        data = ""
-        data += '<?xml version="1.0" encoding="UTF-8"?>\n'
-        data += '<osmChange version="0.6" generator="'
-        data += self._created_by + '">\n'
-        for change in changes_data:
-            data += "<" + change["action"] + ">\n"
-            change_data = change["data"]
-            data += self._add_changeset_data(change_data, change["type"])
-            data += "</" + change["action"] + ">\n"
-        data += "</osmChange>"
         try:
             response_data = self._session._post(
                 f"/api/0.6/changeset/{self._current_changeset_id}/upload",
-                data.encode("utf-8"),
+                xmlbuilder.OsmChangeBody(changes_data, data=self),
                 forceAuth=True,
+                retry=retry,
             )
         except errors.ApiError as e:
-            if e.status == 409 and re.search(
-                r"The changeset .* was closed at .*", e.payload_str
-            ):
-                raise errors.ChangesetClosedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
+            _raise_upload_error(e)
+        diff_result = diff.DiffResult.parse(response_data, backend=self._parser_backend)
+        diff_result.apply(changes_data)
+
+    def changeset_upload_bulk(
+        self: "OsmApi",
+        changes_data: list[dict[str, Any]],
+        changeset_tags: dict[str, str] | None = None,
+        *,
+        max_elements: int | None = None,
+        order: bool = True,
+        compact: bool = False,
+        current: dict[str, dict[int, dict[str, Any]]] | None = None,
+        journal: "str | os.PathLike[str] | UploadJournal | None" = None,
+    ) -> dict[str, dict[int, int]]:
+        """
+        Upload the `changes_data` list of dicts of any size, in as many
+        changesets as needed.
+
+        `changes_data` is the same as for `changeset_upload`. It is split into
+        parts of at most `max_elements` elements, by default the maximum
+        number of elements of a changeset the API reports in `capabilities`.
+        For every part a changeset with the tags `changeset_tags` is opened,
+        the part is uploaded and the changeset is closed again:
+
+            #!python
+            ids = api.changeset_upload_bulk(changes, {"comment": "Import"})
+            ids["node"][-1]  # the id of the node created as -1
+
+        Returns the ids assigned to the created elements, by type and
+        placeholder id (the negative `id` of the element in `changes_data`):
+        `{"node": {-1: 4295832900, ...}, "way": {...}, "relation": {...}}`.
+        As with `changeset_upload`, the ids and versions are also updated in
+        `changes_data`.
+
+        The changes are sorted by their dependencies before they are split
+        (see `order_changes`), so an element is never uploaded in an earlier
+        changeset than the elements it refers to. With `order=False` the
+        order of `changes_data` is kept, and elements have to come after the
+        elements they refer to. References to elements created in an earlier
+        part (the `nd` of a way, the `member`s of a relation, the `id` of an
+        element that is modified or deleted) are replaced by the assigned ids
+        before a part is uploaded.
+
+        With `compact=True` (and `current`) the changes are compacted before
+        they are sorted and split, as with `changeset_upload`.
+
+        If an upload fails, its changeset is closed and the error is raised;
+        the parts uploaded before it keep their ids in `changes_data`.
+
+        With `journal` (the name of a file, or an `osmapi.journal.UploadJournal`)
+        every part is recorded in an append-only journal before and after it
+        is uploaded, and a bulk upload that was interrupted (the process died,
+        an upload failed) continues where it stopped when it is run again
+        with the same changes and the same journal, without creating
+        anything twice, see `osmapi.journal`. Journaled parts are not sent
+        again by the automatic retries: after a server or connection error
+        the changeset is downloaded to find out whether the part was applied.
+
+        If no session is provided to authenticate the request,
+        `OsmApi.AuthenticationMissingError` is raised.
+
+        If there is already an open changeset,
+        `OsmApi.ChangesetAlreadyOpenError` is raised.
+
+        If the journal belongs to other changes, or a part it records as
+        started can't be matched with its changeset,
+        `OsmApi.UploadJournalError` is raised.
+        """
+        if self._current_changeset_id:
+            raise errors.ChangesetAlreadyOpenError("Changeset already opened")
+        if max_elements is None:
+            max_elements = self._max_changeset_elements()
+        changes_data, folded = _prepare(changes_data, order, compact, current)
+        if journal is not None and not isinstance(journal, UploadJournal):
+            journal = UploadJournal(journal)
+        try:
+            return self._upload_parts(
+                _split_changes(changes_data, max_elements), changeset_tags, journal
+            )
+        finally:
+            _copy_ids(folded)
+
+    def changeset_upload_parallel(
+        self: "OsmApi",
+        changes_data: list[dict[str, Any]],
+        changeset_tags: dict[str, str] | None = None,
+        *,
+        workers: int = 4,
+        max_elements: int | None = None,
+        order: bool = True,
+        compact: bool = False,
+        current: dict[str, dict[int, dict[str, Any]]] | None = None,
+    ) -> dict[str, dict[int, int]]:
+        """
+        Upload the `changes_data` list of dicts of any size like
+        `changeset_upload_bulk`, but with up to `workers` uploads at the same
+        time:
+
+            #!python
+            api = osmapi.OsmApi(session=session, rate_limiter=http.RateLimiter(2))
+            ids = api.changeset_upload_parallel(changes, {"comment": "Import"})
+
+        `changes_data` is split into parts of at most `max_elements` elements
+        that don't refer to each other: the elements that refer to one another
+        (a way and its nodes, a relation and its members, the changes of the
+        same element) always end up in the same part, and the parts are
+        filled in the spatial order of their nodes, so that each of them
+        covers a small area. Every part is uploaded in a changeset of its own
+        by one of `workers` threads, each with a session and a changeset of
+        its own. Related elements that don't fit into one changeset are
+        uploaded in several parts, one after the other, by the same worker,
+        as with `changeset_upload_bulk`. The deletes are uploaded the same way
+        once all the other parts are: a modify may drop the references to an
+        element that is deleted (e.g. a way that no longer has a node), which
+        can't be told from the changes alone.
+
+        All workers send their requests through the `rate_limiter` of this
+        object (see `OsmApi`), so together they keep to its rate. The
+        `session` of this object is shared by the workers.
+
+        Returns the ids assigned to the created elements, as
+        `changeset_upload_bulk` does, and updates the ids and versions in
+        `changes_data`. `order`, `compact` and `current` are the same as for
+        `changeset_upload_bulk`.
+
+        If an upload fails, the parts that have not been started are not
+        uploaded anymore, the ones being uploaded are finished and the error
+        of the first part that failed is raised; the uploaded parts keep their
+        ids in `changes_data`.
+
+        The other errors are the same as for `changeset_upload_bulk`.
+        """
+        if self._current_changeset_id:
+            raise errors.ChangesetAlreadyOpenError("Changeset already opened")
+        if max_elements is None:
+            max_elements = self._max_changeset_elements()
+        changes_data, folded = _prepare(changes_data, order, compact, current)
+        writes, deletes = _split_deletes(changes_data)
+        try:
+            ids = self._upload_sequences(
+                _independent_parts(writes, max_elements), changeset_tags, workers
+            )
+            if deletes:
+                _replace_placeholders(deletes, ids)
+                sequences = _independent_parts(deletes, max_elements)
+                for osm_type, assigned in self._upload_sequences(
+                    sequences, changeset_tags, workers
+                ).items():
+                    ids[osm_type].update(assigned)
+            return ids
+        finally:
+            _copy_ids(folded)
+
+    def _upload_sequences(
+        self: "OsmApi",
+        sequences: list[list[list[dict[str, Any]]]],
+        changeset_tags: dict[str, str] | None,
+        workers: int,
+    ) -> dict[str, dict[int, int]]:
+        """
+        Uploads the `sequences` of parts with `workers` threads, the parts of
+        a sequence one after the other, see `changeset_upload_parallel`.
+        Returns the ids assigned to the placeholder ids.
+        """
+        workers = max(1, min(workers, len(sequences)))
+        pool = [self._parallel_worker() for _ in range(workers)]
+        idle: "queue.SimpleQueue[OsmApi]" = queue.SimpleQueue()
+        for worker in pool:
+            idle.put(worker)
+
+        # once an upload failed, the parts that have not been started are
+        # skipped, and the error of the first one that failed is raised
+        failed = threading.Event()
+        failures: list[BaseException] = []
+
+        def upload(parts: list[list[dict[str, Any]]]) -> dict[str, dict[int, int]]:
+            if failed.is_set():
+                return {}
+            worker = idle.get()
+            try:
+                return worker._upload_parts(parts, changeset_tags)
+            except BaseException as e:
+                failures.append(e)
+                failed.set()
                 raise
+            finally:
+                idle.put(worker)
+
         try:
-            result_dom = xml.dom.minidom.parseString(response_data)
-            diff_result = result_dom.getElementsByTagName("diffResult")[0]
-            result_elements = [
-                x for x in diff_result.childNodes if x.nodeType == x.ELEMENT_NODE
-            ]
-        except (xml.parsers.expat.ExpatError, IndexError) as e:
-            raise errors.XmlResponseInvalidError(
-                f"The XML response from the OSM API is invalid: {e!r}"
-            ) from e
-
-        for change in changes_data:
-            if change["action"] == "delete":
-                for change_element in change["data"]:
-                    change_element.pop("version")
+            with ThreadPoolExecutor(workers) as executor:
+                futures = [executor.submit(upload, parts) for parts in sequences]
+        finally:
+            for worker in pool:
+                worker._session._release()
+        if failures:
+            raise failures[0]
+        ids: dict[str, dict[int, int]] = {"node": {}, "way": {}, "relation": {}}
+        for future in futures:
+            for osm_type, assigned in future.result().items():
+                ids[osm_type].update(assigned)
+        return ids
+
+    def _parallel_worker(self: "OsmApi") -> "OsmApi":
+        """
+        Returns a copy of this object with a session and a changeset of its
+        own, see `changeset_upload_parallel`.
+        """
+        worker = copy.copy(self)
+        worker._session = self._new_session()
+        worker._current_changeset_id = 0
+        worker._write_batch = None
+        return worker
+
+    def _upload_parts(
+        self: "OsmApi",
+        parts: Iterable[list[dict[str, Any]]],
+        changeset_tags: dict[str, str] | None,
+        journal: UploadJournal | None = None,
+    ) -> dict[str, dict[int, int]]:
+        """
+        Uploads `parts` one after the other, each in a changeset of its own,
+        see `changeset_upload_bulk`. Returns the ids assigned to the
+        placeholder ids.
+        """
+        ids: dict[str, dict[int, int]] = {"node": {}, "way": {}, "relation": {}}
+        for number, part in enumerate(parts):
+            placeholders = _replace_placeholders(part, ids)
+            if journal is None:
+                with self.changeset(dict(changeset_tags or {})):
+                    self.changeset_upload(part)
             else:
-                self._assign_id_and_version(result_elements, change["data"])
+                self._upload_journaled(part, number, journal, changeset_tags)
+            for osm_type, placeholder, element in placeholders:
+                ids[osm_type][placeholder] = element["id"]
+        return ids
 
-        return changes_data
+    def _upload_journaled(
+        self: "OsmApi",
+        part: list[dict[str, Any]],
+        number: int,
+        journal: UploadJournal,
+        changeset_tags: dict[str, str] | None,
+    ) -> None:
+        """
+        Uploads the `number`-th part `part` of a bulk upload in a changeset of
+        its own, recording it in `journal`, or takes its ids and versions
+        from the journal or its changeset if it has been uploaded before.
+        """
+        part_hash = payload_hash(part)
+        journal.check(number, part_hash)
+        done = journal.done.get(number)
+        if done is not None:
+            diff.DiffResult.from_entries(done["diff"]).apply(part)
+            return
+        started = journal.started.get(number)
+        if started is not None:
+            applied = self._reconcile_part(
+                part, number, part_hash, journal, started["changeset"]
+            )
+            self._close_changeset_quietly(started["changeset"])
+            if applied:
+                return
+
+        with self.changeset(dict(changeset_tags or {})) as changeset_id:
+            journal.start(number, part_hash, changeset_id)
+            old_ids = [e.get("id", 0) for change in part for e in change["data"]]
+            try:
+                self._upload(part, retry=False)
+            except errors.ApiError as e:
+                # the upload may have been applied before a server or
+                # connection error, the changeset tells
+                if 0 < e.status < 500:
+                    raise
+                if not self._reconcile_part(
+                    part, number, part_hash, journal, changeset_id
+                ):
+                    raise
+                return
+            journal.finish(number, part_hash, changeset_id, diff_entries(part, old_ids))
+
+    def _reconcile_part(
+        self: "OsmApi",
+        part: list[dict[str, Any]],
+        number: int,
+        part_hash: str,
+        journal: UploadJournal,
+        changeset_id: int,
+    ) -> bool:
+        """
+        Takes the ids and versions of the `number`-th part `part` (with the
+        hash `part_hash`) of a bulk upload from its changeset `changeset_id`
+        and records it as done in `journal`. Returns whether the part was
+        applied.
+        """
+        data = self._session._get(f"/api/0.6/changeset/{changeset_id}/download")
+        downloaded = parser.parse_osc(
+            data, backend=self._parser_backend, timestamps="raw"
+        )
+        entries = reconcile(part, downloaded)
+        if entries is None:
+            return False
+        diff.DiffResult.from_entries(entries).apply(part)
+        journal.finish(number, part_hash, changeset_id, entries)
+        return True
+
+    def _close_changeset_quietly(self: "OsmApi", changeset_id: int) -> None:
+        """
+        Closes the changeset `changeset_id`, if it is still open.
+        """
+        try:
+            self._session._put(
+                f"/api/0.6/changeset/{changeset_id}/close", None, return_value=False
+            )
+        except errors.ApiError:
+            pass
+
+    def _max_changeset_elements(self: "OsmApi") -> int:
+        """
+        Returns the maximum number of elements of a changeset, as reported by
+        `capabilities`.
+        """
+        limits = self.capabilities().get("changesets", {})
+        return int(limits.get("maximum_elements", DEFAULT_MAX_CHANGESET_ELEMENTS))
 
     def changeset_download(self: "OsmApi", changeset_id: int) -> list[dict[str, Any]]:
         """
@@ -255,10 +676,40 @@ class ChangesetMixin:
         Returns list of dict with type, action, and data.
         """
         uri = f"/api/0.6/changeset/{changeset_id}/download"
-        data = self._session._get(uri)
-        return parser.parse_osc(data)
+        return parser._parse_osc_read(self, self._session._get(uri))
+
+    def iter_changeset_download(
+        self: "OsmApi", changeset_id: int
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Download data from changeset `changeset_id`, element by element.
+
+        Yields the same dicts with type, action, and data as
+        `changeset_download` returns, parsing the response while it is being
+        downloaded, so that even the largest changesets need little memory.
+
+        The request is only sent when the iteration starts.
+        """
+        uri = f"/api/0.6/changeset/{changeset_id}/download"
+        with self._session._get_stream(uri) as body:
+            yield from parser.iter_osc(
+                body,
+                backend=self._parser_backend,
+                timestamps=self._timestamps,
+                result_type=self._result_type,
+                shared_tags=self._shared_tags,
+            )
 
-    def changesets_get(  # noqa: C901
+    def changeset_download_raw(self: "OsmApi", changeset_id: int) -> bytes:
+        """
+        Returns the osmChange response of `changeset_download` for changeset
+        `changeset_id` unparsed, as `bytes`. See `download_to` to store it in
+        a file.
+        """
+        uri = self._raw_uri("changeset_download", changeset_id)
+        return self._session._get(uri)
+
+    def changesets_get(
         self: "OsmApi",
         min_lon: float | None = None,
         min_lat: float | None = None,
@@ -280,43 +731,19 @@ class ChangesetMixin:
         If only some of the bounding box values are given,
         `ValueError` is raised.
         """
-        uri = "/api/0.6/changesets"
-        params: dict[str, Any] = {}
-        bbox = (min_lon, min_lat, max_lon, max_lat)
-        if any(coord is not None for coord in bbox):
-            if any(coord is None for coord in bbox):
-                raise ValueError(
-                    "A bounding box needs all of min_lon, min_lat, max_lon "
-                    "and max_lat, got "
-                    f"min_lon={min_lon}, min_lat={min_lat}, "
-                    f"max_lon={max_lon}, max_lat={max_lat}"
-                )
-            params["bbox"] = ",".join(str(coord) for coord in bbox)
-        if userid:
-            params["user"] = userid
-        if username:
-            params["display_name"] = username
-        if closed_after and not created_before:
-            params["time"] = closed_after
-        if created_before:
-            if not closed_after:
-                closed_after = "1970-01-01T00:00:00Z"
-            params["time"] = f"{closed_after},{created_before}"
-        if only_open:
-            params["open"] = 1
-        if only_closed:
-            params["closed"] = 1
-
-        if params:
-            uri += "?" + urllib.parse.urlencode(params)
-
-        data = self._session._get(uri)
-        changesets = cast(list[Element], dom.OsmResponseToDom(data, tag="changeset"))
-        result: dict[int, dict[str, Any]] = {}
-        for cur_changeset in changesets:
-            tmp_cs = dom.dom_parse_changeset(cur_changeset)
-            result[tmp_cs["id"]] = tmp_cs
-        return result
+        uri = _changesets_uri(
+            min_lon,
+            min_lat,
+            max_lon,
+            max_lat,
+            userid,
+            username,
+            closed_after,
+            created_before,
+            only_open,
+            only_closed,
+        )
+        return parser._parse_changesets(self, self._session._get(uri))
 
     def changeset_comment(
         self: "OsmApi", changeset_id: int, comment: str
@@ -342,17 +769,8 @@ class ChangesetMixin:
                 forceAuth=True,
             )
         except errors.ApiError as e:
-            if e.status == 409:
-                raise errors.ChangesetClosedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
-                raise
-        changeset = cast(
-            Element,
-            dom.OsmResponseToDom(data, tag="changeset", single=True),
-        )
-        return dom.dom_parse_changeset(changeset, include_discussion=False)
+            errors._raise_as(e, 409, errors.ChangesetClosedApiError)
+        return parser._parse_changeset(self, data)
 
     def changeset_subscribe(self: "OsmApi", changeset_id: int) -> dict[str, Any]:
         """
@@ -373,17 +791,8 @@ class ChangesetMixin:
                 forceAuth=True,
             )
         except errors.ApiError as e:
-            if e.status == 409:
-                raise errors.AlreadySubscribedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
-                raise
-        changeset = cast(
-            Element,
-            dom.OsmResponseToDom(data, tag="changeset", single=True),
-        )
-        return dom.dom_parse_changeset(changeset, include_discussion=False)
+            errors._raise_as(e, 409, errors.AlreadySubscribedApiError)
+        return parser._parse_changeset(self, data)
 
     def changeset_unsubscribe(self: "OsmApi", changeset_id: int) -> dict[str, Any]:
         """
@@ -404,12 +813,504 @@ class ChangesetMixin:
                 forceAuth=True,
             )
         except errors.ApiError as e:
-            if e.status == 404:
-                raise errors.NotSubscribedApiError(e.status, e.reason, e.payload) from e
-            else:
-                raise
-        changeset = cast(
-            Element,
-            dom.OsmResponseToDom(data, tag="changeset", single=True),
+            errors._raise_as(e, 404, errors.NotSubscribedApiError)
+        return parser._parse_changeset(self, data)
+
+
+def _changeset_create_body(
+    api: "OsmApi | AsyncOsmApi", changeset_tags: dict[str, str] | None
+) -> bytes:
+    """
+    Returns the body of the request of `api` to open a changeset with
+    `changeset_tags`, see `OsmApi.changeset_create`.
+
+    If there is already an open changeset,
+    `OsmApi.ChangesetAlreadyOpenError` is raised.
+    """
+    if changeset_tags is None:
+        changeset_tags = {}
+    if api._current_changeset_id:
+        raise errors.ChangesetAlreadyOpenError("Changeset already opened")
+    if "created_by" not in changeset_tags:
+        changeset_tags["created_by"] = api._created_by
+
+    # check if someone tries to create a test changeset to PROD
+    if (
+        api._api == "https://www.openstreetmap.org"
+        and changeset_tags.get("comment") == "My first test"
+    ):
+        raise errors.OsmApiError(
+            "DO NOT CREATE test changesets on the production server"
         )
-        return dom.dom_parse_changeset(changeset, include_discussion=False)
+    return xmlbuilder._xml_build("changeset", {"tag": changeset_tags}, data=api)
+
+
+def _changeset_update_body(
+    api: "OsmApi | AsyncOsmApi", changeset_tags: dict[str, str] | None
+) -> bytes:
+    """
+    Returns the body of the request of `api` to update the open changeset
+    with `changeset_tags`, see `OsmApi.changeset_update`.
+
+    If there is no open changeset, `OsmApi.NoChangesetOpenError` is raised.
+    """
+    if changeset_tags is None:
+        changeset_tags = {}
+    if not api._current_changeset_id:
+        raise errors.NoChangesetOpenError("No changeset currently opened")
+    if "created_by" not in changeset_tags:
+        changeset_tags["created_by"] = api._created_by
+    return xmlbuilder._xml_build("changeset", {"tag": changeset_tags}, data=api)
+
+
+def _raise_upload_error(e: errors.ApiError) -> NoReturn:
+    """
+    Raises the error `e` of an upload as `OsmApi.ChangesetClosedApiError` if
+    the changeset was closed, and as it is otherwise.
+    """
+    if e.status == 409 and re.search(
+        r"The changeset .* was closed at .*", e.payload_str
+    ):
+        raise errors.ChangesetClosedApiError(e.status, e.reason, e.payload) from e
+    raise e
+
+
+def _changesets_uri(  # noqa: C901
+    min_lon: float | None,
+    min_lat: float | None,
+    max_lon: float | None,
+    max_lat: float | None,
+    userid: int | None,
+    username: str | None,
+    closed_after: str | None,
+    created_before: str | None,
+    only_open: bool,
+    only_closed: bool,
+) -> str:
+    """
+    Returns the URI of the changeset query of `OsmApi.changesets_get`.
+    """
+    uri = "/api/0.6/changesets"
+    params: dict[str, Any] = {}
+    bbox = (min_lon, min_lat, max_lon, max_lat)
+    if any(coord is not None for coord in bbox):
+        if any(coord is None for coord in bbox):
+            raise ValueError(
+                "A bounding box needs all of min_lon, min_lat, max_lon "
+                "and max_lat, got "
+                f"min_lon={min_lon}, min_lat={min_lat}, "
+                f"max_lon={max_lon}, max_lat={max_lat}"
+            )
+        params["bbox"] = ",".join(str(coord) for coord in bbox)
+    if userid:
+        params["user"] = userid
+    if username:
+        params["display_name"] = username
+    if closed_after and not created_before:
+        params["time"] = closed_after
+    if created_before:
+        if not closed_after:
+            closed_after = "1970-01-01T00:00:00Z"
+        params["time"] = f"{closed_after},{created_before}"
+    if only_open:
+        params["open"] = 1
+    if only_closed:
+        params["closed"] = 1
+
+    if params:
+        uri += "?" + urllib.parse.urlencode(params)
+    return uri
+
+
+_UPLOAD_ORDER = [  # the (action, type) of the changes, in upload order
+    ("create", "node"),
+    ("create", "way"),
+    ("create", "relation"),
+    ("modify", "node"),
+    ("modify", "way"),
+    ("modify", "relation"),
+    ("delete", "relation"),
+    ("delete", "way"),
+    ("delete", "node"),
+]
+
+
+def order_changes(changes_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Returns the changes of `changes_data` (see `OsmApi.changeset_upload`) in
+    an order the API can apply them in: the created nodes, ways and
+    relations, then the modified ones in the same order, then the deleted
+    relations, ways and nodes.
+
+    A created relation comes after the created relations that are its
+    members, a deleted relation before the deleted relations that are its
+    members. Apart from that the elements keep their order, changes with an
+    unknown action are kept at the end.
+
+    There is one change per action and type, holding the element dicts of
+    `changes_data` (they are not copied).
+    """
+    grouped: dict[tuple[str, str], list[dict[str, Any]]] = {}
+    for change in changes_data:
+        key = (change["action"], change["type"])
+        grouped.setdefault(key, []).extend(change["data"])
+    result = []
+    for action, osm_type in _UPLOAD_ORDER:
+        elements = grouped.pop((action, osm_type), None)
+        if not elements:
+            continue
+        if osm_type == "relation" and action != "modify":
+            elements = _order_relations(elements, members_first=action == "create")
+        result.append({"type": osm_type, "action": action, "data": elements})
+    for (action, osm_type), elements in grouped.items():
+        result.append({"type": osm_type, "action": action, "data": elements})
+    return result
+
+
+def _order_relations(
+    relations: list[dict[str, Any]], members_first: bool
+) -> list[dict[str, Any]]:
+    """
+    Returns `relations` in topological order: every relation after the
+    relations of the list that are its members if `members_first` is set,
+    before them otherwise. Relations in a cycle keep their order.
+    """
+    index = {r["id"]: i for i, r in enumerate(relations) if "id" in r}
+    before: list[list[int]] = [[] for _ in relations]
+    for i, relation in enumerate(relations):
+        for member in relation.get("member", ()):
+            j = index.get(member["ref"]) if member["type"] == "relation" else None
+            if j is None or j == i:
+                continue
+            if members_first:
+                before[i].append(j)
+            else:
+                before[j].append(i)
+
+    # depth-first, without recursion, deep relation hierarchies are common
+    ordered: list[dict[str, Any]] = []
+    seen = [False] * len(relations)
+    for start in range(len(relations)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        stack = [(start, iter(before[start]))]
+        while stack:
+            i, pending = stack[-1]
+            for j in pending:
+                if not seen[j]:
+                    seen[j] = True
+                    stack.append((j, iter(before[j])))
+                    break
+            else:
+                stack.pop()
+                ordered.append(relations[i])
+    return ordered
+
+
+_GEOMETRY = {"node": ("lat", "lon"), "way": ("nd",), "relation": ("member",)}
+
+
+def compact_changes(
+    changes_data: list[dict[str, Any]],
+    current: dict[str, dict[int, dict[str, Any]]] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Returns the changes of `changes_data` (see `OsmApi.changeset_upload`)
+    folded into the net change of each element:
+
+    * an element that is created and then modified is created as it was
+      modified last,
+    * an element that is modified several times is modified once, as it was
+      modified last,
+    * an element that is modified and then deleted is deleted,
+    * an element that is created and then deleted is left out.
+
+    A folded modify or delete gets the version of the first modify, the one
+    the API expects. A created element takes the place of its creation, the
+    other elements the place of their last change (use `order_changes` on
+    the result if an element was changed to refer to an element created
+    after it). The changes of an element that can't be folded (e.g. a change
+    after its deletion) and elements without an `id` are kept as they are.
+
+    `current` holds the current versions of elements, by type and id, e.g.
+    `{"node": api.nodes_get(ids)}`: a modify that changes neither the tags
+    nor the geometry (`lat` and `lon`, `nd`, `member`) of the current version
+    of its element is left out.
+
+    The result holds the element dicts of `changes_data` (the last change of
+    each element), a folded modify or delete with another version is a copy.
+    """
+    return _compact(changes_data, current)[0]
+
+
+def _compact(
+    changes_data: list[dict[str, Any]],
+    current: dict[str, dict[int, dict[str, Any]]] | None,
+) -> tuple[list[dict[str, Any]], list[tuple[dict[str, Any], list[dict[str, Any]]]]]:
+    """
+    Compacts `changes_data`, see `compact_changes`. Also returns each created
+    or modified element of the result with the element dicts folded into it.
+    """
+    changes: dict[tuple[str, Any], list[tuple[int, str, dict[str, Any]]]] = {}
+    position = 0
+    for change in changes_data:
+        for element in change["data"]:
+            key = (change["type"], element.get("id") or f"#{position}")
+            changes.setdefault(key, []).append((position, change["action"], element))
+            position += 1
+
+    writes = []
+    folded = []
+    for (osm_type, _), ops in changes.items():
+        net = _fold(ops)
+        if len(net) == 1 and len(ops) > 1 and net[0][1] != "delete":
+            folded.append((net[0][2], [element for _, _, element in ops]))
+        for position, action, element in net:
+            if action == "modify" and _unchanged(osm_type, element, current):
+                continue
+            writes.append((position, action, osm_type, element))
+    writes.sort(key=lambda write: write[0])
+    return _group_writes([write[1:] for write in writes]), folded
+
+
+def _fold(
+    ops: list[tuple[int, str, dict[str, Any]]],
+) -> list[tuple[int, str, dict[str, Any]]]:
+    """
+    Returns the `(position, action, element)` changes `ops` of one element
+    folded into its net change, see `compact_changes`.
+    """
+    actions = [action for _, action, _ in ops]
+    if (
+        len(ops) == 1
+        or not set(actions) <= {"create", "modify", "delete"}
+        or "create" in actions[1:]
+        or "delete" in actions[:-1]
+    ):
+        return ops
+    (first_position, _, first), (last_position, _, last) = ops[0], ops[-1]
+    if actions[0] == "create":
+        return [] if actions[-1] == "delete" else [(first_position, "create", last)]
+    if last.get("version") != first.get("version"):
+        last = {**last, "version": first.get("version")}
+    return [(last_position, actions[-1], last)]
+
+
+def _unchanged(
+    osm_type: str,
+    element: dict[str, Any],
+    current: dict[str, dict[int, dict[str, Any]]] | None,
+) -> bool:
+    """
+    Returns whether the modified `element` has the tags and the geometry of
+    its version in `current`.
+    """
+    known = (current or {}).get(osm_type, {}).get(element.get("id", 0))
+    if known is None:
+        return False
+    if (element.get("tag") or {}) != (known.get("tag") or {}):
+        return False
+    return all(
+        element.get(key) == known.get(key) for key in _GEOMETRY.get(osm_type, ())
+    )
+
+
+def _prepare(
+    changes_data: list[dict[str, Any]],
+    order: bool,
+    compact: bool,
+    current: dict[str, dict[int, dict[str, Any]]] | None,
+) -> tuple[list[dict[str, Any]], list[tuple[dict[str, Any], list[dict[str, Any]]]]]:
+    """
+    Returns `changes_data` compacted (see `_compact`) and sorted, as selected
+    by `compact` and `order`, and the folded element dicts.
+    """
+    folded: list[tuple[dict[str, Any], list[dict[str, Any]]]] = []
+    if compact:
+        changes_data, folded = _compact(changes_data, current)
+    if order:
+        changes_data = order_changes(changes_data)
+    return changes_data, folded
+
+
+def _copy_ids(folded: list[tuple[dict[str, Any], list[dict[str, Any]]]]) -> None:
+    """
+    Copies the id and version of each uploaded element of `folded` (see
+    `_compact`) to the element dicts folded into it.
+    """
+    for element, originals in folded:
+        for original in originals:
+            original["id"] = element["id"]
+            if "version" in element:
+                original["version"] = element["version"]
+
+
+def _split_changes(
+    changes_data: list[dict[str, Any]], size: int
+) -> Iterator[list[dict[str, Any]]]:
+    """
+    Yields `changes_data` in parts of at most `size` elements, in order. A
+    change that doesn't fit into a part is split between two of them.
+    """
+    part: list[dict[str, Any]] = []
+    count = 0
+    for change in changes_data:
+        elements = change["data"]
+        start = 0
+        while start < len(elements):
+            end = start + size - count
+            part.append({**change, "data": elements[start:end]})
+            count += len(part[-1]["data"])
+            start = end
+            if count == size:
+                yield part
+                part, count = [], 0
+    if part:
+        yield part
+
+
+def _split_deletes(
+    changes_data: list[dict[str, Any]],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Returns the changes of `changes_data` other than deletes and the
+    deletes, each in the order of `changes_data`.
+    """
+    writes = [change for change in changes_data if change["action"] != "delete"]
+    deletes = [change for change in changes_data if change["action"] == "delete"]
+    return writes, deletes
+
+
+def _independent_parts(
+    changes_data: list[dict[str, Any]], size: int
+) -> list[list[list[dict[str, Any]]]]:
+    """
+    Splits `changes_data` (in upload order) into sequences of parts of at
+    most `size` elements, which can be uploaded independently of each other.
+
+    Elements that refer to each other (by `nd`, by `member` or by having the
+    same type and id) end up in the same sequence. The groups of such
+    elements are packed into parts in the order of the position of their
+    first node on a Z-order curve, so that a part covers a small area. A
+    group of more than `size` elements is split into a sequence of parts
+    that have to be uploaded in order.
+    """
+    elements = [element for change in changes_data for element in change["data"]]
+    owners = [c for c, change in enumerate(changes_data) for _ in change["data"]]
+    groups = _related_groups(changes_data)
+
+    def location(group: list[int]) -> tuple[int, int]:
+        for i in group:
+            if "lat" in elements[i] and "lon" in elements[i]:
+                return 0, _z_order(elements[i]["lat"], elements[i]["lon"])
+        return 1, 0
+
+    def regroup(positions: list[int]) -> list[dict[str, Any]]:
+        return [
+            {**changes_data[c], "data": [elements[i] for i in run]}
+            for c, run in itertools.groupby(positions, owners.__getitem__)
+        ]
+
+    sequences: list[list[list[dict[str, Any]]]] = []
+    packed: list[int] = []
+    for group in sorted(groups, key=location):
+        if len(group) > size:
+            sequences.append(list(_split_changes(regroup(group), size)))
+            continue
+        if len(packed) + len(group) > size:
+            sequences.append([regroup(sorted(packed))])
+            packed = []
+        packed += group
+    if packed:
+        sequences.append([regroup(sorted(packed))])
+    return sequences
+
+
+def _related_groups(changes_data: list[dict[str, Any]]) -> list[list[int]]:
+    """
+    Returns the groups of the elements of `changes_data` that refer to each
+    other, directly or indirectly, as lists of their positions (counting all
+    the elements of `changes_data` in order).
+    """
+    types = [change["type"] for change in changes_data for _ in change["data"]]
+    elements = [element for change in changes_data for element in change["data"]]
+    first: dict[tuple[str, int], int] = {}
+    for i, element in enumerate(elements):
+        if element.get("id", 0):
+            first.setdefault((types[i], element["id"]), i)
+
+    parent = list(range(len(elements)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, element in enumerate(elements):
+        refs = [(types[i], element.get("id", 0))]
+        refs += [("node", ref) for ref in element.get("nd", ())]
+        refs += [(m["type"], m["ref"]) for m in element.get("member", ())]
+        for ref in refs:
+            if ref in first:
+                parent[root(i)] = root(first[ref])
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(elements)):
+        groups.setdefault(root(i), []).append(i)
+    return list(groups.values())
+
+
+def _z_order(lat: float, lon: float) -> int:
+    """
+    Returns the position of `lat`/`lon` on a Z-order curve through a grid of
+    65536 x 65536 cells, on which close positions are mostly close together.
+    """
+    x = min(max(int((float(lon) + 180) / 360 * 0x10000), 0), 0xFFFF)
+    y = min(max(int((float(lat) + 90) / 180 * 0x10000), 0), 0xFFFF)
+    z = 0
+    for bit in range(16):
+        z |= (x >> bit & 1) << 2 * bit | (y >> bit & 1) << 2 * bit + 1
+    return z
+
+
+def _replace_placeholders(
+    changes_data: list[dict[str, Any]], ids: dict[str, dict[int, int]]
+) -> list[tuple[str, int, dict[str, Any]]]:
+    """
+    Replaces the references to the placeholder ids in `ids` (the elements
+    created by an earlier upload) in `changes_data` by the assigned ids.
+
+    Returns `(type, placeholder id, element)` for each element that
+    `changes_data` creates with a placeholder id.
+    """
+    created = []
+    for change in changes_data:
+        osm_type = change["type"]
+        for element in change["data"]:
+            element_id = element.get("id", 0)
+            if change["action"] == "create":
+                if element_id < 0:
+                    created.append((osm_type, element_id, element))
+            elif element_id in ids[osm_type]:
+                element["id"] = ids[osm_type][element_id]
+            if "nd" in element:
+                element["nd"] = [ids["node"].get(ref, ref) for ref in element["nd"]]
+            for member in element.get("member", ()):
+                member["ref"] = ids[member["type"]].get(member["ref"], member["ref"])
+    return created
+
+
+def _group_writes(
+    writes: list[tuple[str, str, dict[str, Any]]],
+) -> list[dict[str, Any]]:
+    """
+    Returns the `(action, type, data)` writes as the change list of
+    `changeset_upload`, with one change for each run of writes of the same
+    action and type.
+    """
+    return [
+        {"type": osm_type, "action": action, "data": [data for _, _, data in run]}
+        for (action, osm_type), run in itertools.groupby(writes, lambda w: w[:2])
+    ]
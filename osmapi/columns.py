@@ -0,0 +1,171 @@
+"""
+Columnar results for the OpenStreetMap API.
+
+`OsmApi.map_columns` and `OsmApi.nodes_get_columns` return a `Columns`
+instead of a list of dicts: one flat array per attribute, e.g. all node ids
+in `node_id` and all latitudes in `node_lat`, which is what vectorised
+filters and computations work on.
+
+The arrays are NumPy arrays if NumPy is installed, `array.array` otherwise
+(pass `use_numpy` to choose). Coordinates are fixed-point integers in units
+of `1 / COORDINATE_SCALE` degrees (10⁻⁷ degrees, the precision the API stores
+them with), divide by `COORDINATE_SCALE` to get degrees. The node ids of all
+ways are the single array `way_refs`, the ones of way `i` are
+`way_refs[way_offsets[i]:way_offsets[i + 1]]`.
+
+Tags are only collected for the keys passed as `tags`, as one list per key
+with the value of every element, `None` where it doesn't have the tag.
+"""
+
+import array
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None  # type: ignore[assignment]
+
+COORDINATE_SCALE = 10_000_000
+"""Fixed-point coordinates are in units of `1 / COORDINATE_SCALE` degrees"""
+
+# The `array.array` type codes of the columns
+_INT64 = "q"
+_INT32 = "i"
+_BOOL = "b"
+
+_OSM_TYPES = ("node", "way", "relation")
+
+
+@dataclass
+class Columns:
+    """
+    The nodes, ways and relations of a response as columns, see the module
+    documentation. All columns of a type have one entry per element, in the
+    order of the response, apart from `way_offsets` which has one more.
+    """
+
+    node_id: Any
+    node_version: Any
+    node_visible: Any
+    node_lat: Any
+    """Latitudes in 10⁻⁷ degrees, 0 for nodes that are not visible"""
+    node_lon: Any
+    """Longitudes in 10⁻⁷ degrees, 0 for nodes that are not visible"""
+    node_tags: dict[str, list[str | None]]
+    way_id: Any
+    way_version: Any
+    way_offsets: Any
+    way_refs: Any
+    way_tags: dict[str, list[str | None]]
+    relation_id: Any
+    relation_version: Any
+    relation_tags: dict[str, list[str | None]]
+
+    def way_nodes(self, index: int) -> Any:
+        """
+        Returns the node ids of the `index`-th way.
+        """
+        return self.way_refs[self.way_offsets[index] : self.way_offsets[index + 1]]
+
+
+class ColumnsBuilder:
+    """
+    Collects parsed `ElementTree` elements into a `Columns`, element by
+    element, without building a dict per element.
+    """
+
+    def __init__(self, tags: Iterable[str] = ()) -> None:
+        self._tags = tuple(tags)
+        self._columns: dict[str, array.array] = {
+            "node_id": array.array(_INT64),
+            "node_version": array.array(_INT32),
+            "node_visible": array.array(_BOOL),
+            "node_lat": array.array(_INT32),
+            "node_lon": array.array(_INT32),
+            "way_id": array.array(_INT64),
+            "way_version": array.array(_INT32),
+            "way_offsets": array.array(_INT64, [0]),
+            "way_refs": array.array(_INT64),
+            "relation_id": array.array(_INT64),
+            "relation_version": array.array(_INT32),
+        }
+        self._tag_columns: dict[str, dict[str, list[str | None]]] = {
+            osm_type: {key: [] for key in self._tags} for osm_type in _OSM_TYPES
+        }
+        self._ids = {t: self._columns[f"{t}_id"] for t in _OSM_TYPES}
+        self._versions = {t: self._columns[f"{t}_version"] for t in _OSM_TYPES}
+
+    def add(self, element: Any) -> None:
+        """
+        Adds the `<node>`, `<way>` or `<relation>` element `element`, other
+        elements are ignored.
+        """
+        osm_type = element.tag
+        if osm_type not in self._tag_columns:
+            return
+        attributes = element.attrib
+        self._ids[osm_type].append(int(attributes["id"]))
+        self._versions[osm_type].append(int(attributes.get("version", 0)))
+        if osm_type == "node":
+            self._add_coordinates(attributes)
+        elif osm_type == "way":
+            refs = self._columns["way_refs"]
+            refs.extend(int(nd.attrib["ref"]) for nd in element.iter("nd"))
+            self._columns["way_offsets"].append(len(refs))
+        if self._tags:
+            self._add_tags(self._tag_columns[osm_type], element)
+
+    def _add_coordinates(self, attributes: Any) -> None:
+        columns = self._columns
+        visible = attributes.get("visible", "true") == "true"
+        lat = attributes.get("lat")
+        lon = attributes.get("lon")
+        columns["node_visible"].append(visible)
+        columns["node_lat"].append(_fixed_point(lat) if lat else 0)
+        columns["node_lon"].append(_fixed_point(lon) if lon else 0)
+
+    def _add_tags(self, tag_columns: dict[str, list[str | None]], element: Any) -> None:
+        tags = {t.attrib["k"]: t.attrib["v"] for t in element.iter("tag")}
+        for key, values in tag_columns.items():
+            values.append(tags.get(key))
+
+    def build(self, use_numpy: bool | None = None) -> Columns:
+        """
+        Returns the `Columns` of the elements added so far, as NumPy arrays
+        if `use_numpy` is set, or if it is `None` and NumPy is installed.
+
+        If `use_numpy` is set but NumPy is not installed, `ImportError` is
+        raised.
+        """
+        if use_numpy is None:
+            use_numpy = numpy is not None
+        if use_numpy and numpy is None:
+            raise ImportError("NumPy arrays require numpy, install it first")
+        columns = {
+            name: _to_numpy(column) if use_numpy else column
+            for name, column in self._columns.items()
+        }
+        return Columns(
+            **columns,
+            node_tags=self._tag_columns["node"],
+            way_tags=self._tag_columns["way"],
+            relation_tags=self._tag_columns["relation"],
+        )
+
+
+def _fixed_point(coordinate: str) -> int:
+    """
+    Returns the coordinate `coordinate` (in degrees) in 10⁻⁷ degrees.
+    """
+    return round(float(coordinate) * COORDINATE_SCALE)
+
+
+def _to_numpy(column: array.array) -> Any:
+    """
+    Returns the NumPy array sharing the buffer of `column`.
+    """
+    if column.typecode == _BOOL:
+        return numpy.frombuffer(column, dtype=bool)
+    return numpy.frombuffer(column, dtype=column.typecode)
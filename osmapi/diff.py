@@ -0,0 +1,111 @@
+"""
+The `<diffResult>` of a changeset upload.
+
+The API answers an upload with one entry per uploaded element, e.g.
+`<node old_id="-1" new_id="4295832900" new_version="1"/>`. `DiffResult`
+keys these entries on the type and `old_id` (the id the element was uploaded
+with), so the ids and versions are assigned to the uploaded elements by
+looking them up instead of by the position of the entries, in one pass over
+the upload however it is split into changes.
+
+Elements uploaded without an id (`old_id="0"`) share a key, their entries
+are assigned in the order of the upload.
+"""
+
+from collections import deque
+from collections.abc import Iterable, Sequence
+from typing import IO, Any
+
+from . import backends, errors, parser
+
+
+class DiffResult:
+    """
+    The entries of a `<diffResult>` by `(type, old_id)`.
+    """
+
+    def __init__(self) -> None:
+        # the first entry of a key, further ones (elements uploaded without
+        # an id) wait in `_repeated`, in order
+        self._entries: dict[tuple[str, int], tuple[int | None, int | None]] = {}
+        self._repeated: dict[tuple[str, int], deque[tuple[int | None, int | None]]] = {}
+
+    @classmethod
+    def parse(
+        cls,
+        source: bytes | IO[bytes] | Iterable[bytes],
+        backend: str | backends.ParserBackend | None = None,
+    ) -> "DiffResult":
+        """
+        Returns the `DiffResult` of the `<diffResult>` document `source`,
+        parsed entry by entry with `parser.iter_diff_result`.
+        """
+        return cls.from_entries(parser.iter_diff_result(source, backend=backend))
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Sequence[Any]]) -> "DiffResult":
+        """
+        Returns the `DiffResult` of the `(type, old_id, new_id, new_version)`
+        entries `entries`.
+        """
+        diff_result = cls()
+        for entry in entries:
+            diff_result.add(*entry)
+        return diff_result
+
+    def add(
+        self,
+        osm_type: str,
+        old_id: int,
+        new_id: int | None = None,
+        new_version: int | None = None,
+    ) -> None:
+        """
+        Adds the entry of the element of type `osm_type` uploaded with the id
+        `old_id`. `new_id` and `new_version` are `None` for a deleted element.
+        """
+        key = (osm_type, old_id)
+        if key in self._entries or key in self._repeated:
+            self._repeated.setdefault(key, deque()).append((new_id, new_version))
+        else:
+            self._entries[key] = (new_id, new_version)
+
+    def pop(self, osm_type: str, old_id: int) -> tuple[int | None, int | None]:
+        """
+        Returns `(new_id, new_version)` of the element of type `osm_type`
+        uploaded with the id `old_id` and removes the entry.
+
+        If there is no such entry, `OsmApi.XmlResponseInvalidError` is raised.
+        """
+        key = (osm_type, old_id)
+        if key in self._entries:
+            return self._entries.pop(key)
+        repeated = self._repeated.get(key)
+        if not repeated:
+            raise errors.XmlResponseInvalidError(
+                "The XML response from the OSM API is invalid: "
+                f'no <{osm_type} old_id="{old_id}"> in the <diffResult>'
+            )
+        return repeated.popleft()
+
+    def __len__(self) -> int:
+        return len(self._entries) + sum(map(len, self._repeated.values()))
+
+    def apply(self, changes_data: list[dict[str, Any]]) -> None:
+        """
+        Sets the ids and versions of the elements of `changes_data` (the
+        changes of `OsmApi.changeset_upload`) to the ones of their entries,
+        and removes the `version` of the deleted elements.
+        """
+        for change in changes_data:
+            osm_type = change["type"]
+            deleted = change["action"] == "delete"
+            for element in change["data"]:
+                new_id, new_version = self.pop(osm_type, element.get("id", 0))
+                if deleted:
+                    element.pop("version", None)
+                    continue
+                if new_id is not None:
+                    element["id"] = new_id
+                if new_version is not None:
+                    element["version"] = new_version
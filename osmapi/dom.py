@@ -1,14 +1,24 @@
 """
 DOM parsing for the OpenStreetMap API.
+
+The responses are parsed with a parser backend (see `osmapi.backends`) into
+elements with the `xml.etree.ElementTree` API. The `dom_parse_*` functions
+convert such elements to dicts; they also still accept the `xml.dom.minidom`
+elements returned by `OsmResponseToDom`.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 import xml.dom.minidom
 import xml.parsers.expat
 import logging
-from typing import Any
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable, Mapping
+from types import MappingProxyType
+from typing import Any, overload
 from xml.dom.minidom import Element
 
+from . import backends
+from . import elements
 from . import errors
 from . import xmlbuilder
 
@@ -20,6 +30,9 @@ def OsmResponseToDom(
 ) -> Element | list[Element]:
     """
     Returns the (sub-) DOM parsed from an OSM response
+
+    This always parses with `xml.dom.minidom`, `response_elements` parses with
+    the faster parser backends.
     """
     try:
         dom = xml.dom.minidom.parseString(response)
@@ -42,101 +55,309 @@ def OsmResponseToDom(
     return list(all_data)
 
 
-def dom_parse_node(dom_element: Element) -> dict[str, Any]:
+def response_root(
+    response: bytes,
+    root_tag: str = "osm",
+    backend: "str | backends.ParserBackend | None" = None,
+) -> Any:
+    """
+    Returns the root element of an OSM response, parsed with the parser
+    backend `backend` (the fastest available by default).
+
+    If the response is malformed or its root is not `root_tag`,
+    `OsmApi.XmlResponseInvalidError` is raised.
+    """
+    parser_backend = backends.get_backend(backend)
+    try:
+        root = parser_backend.fromstring(response)
+    except parser_backend.parse_errors as e:
+        raise errors.XmlResponseInvalidError(
+            f"The XML response from the OSM API is invalid: {e!r}"
+        ) from e
+    if root.tag != root_tag:
+        raise errors.XmlResponseInvalidError(
+            "The XML response from the OSM API is invalid: "
+            f"expected <{root_tag}>, got <{root.tag}>"
+        )
+    return root
+
+
+def response_elements(
+    response: bytes,
+    tag: str,
+    allow_empty: bool = False,
+    backend: "str | backends.ParserBackend | None" = None,
+) -> list[Any]:
+    """
+    Returns all elements `tag` of an OSM response, parsed with the parser
+    backend `backend` (the fastest available by default).
+
+    If the response is not an `<osm>` document, or if it has no element `tag`
+    and `allow_empty` is not set, `OsmApi.XmlResponseInvalidError` is raised.
+    """
+    elements = list(response_root(response, backend=backend).iter(tag))
+    if not elements and not allow_empty:
+        raise errors.XmlResponseInvalidError(
+            f"The XML response from the OSM API is invalid: no <{tag}> found"
+        )
+    return elements
+
+
+def dom_parse_node(dom_element: Any, *, timestamps: str = "datetime") -> dict[str, Any]:
     """
     Returns NodeData for the node.
     """
-    result = _dom_get_attributes(dom_element)
+    if not isinstance(dom_element, Element):
+        return etree_parse_node(dom_element, timestamps=timestamps)
+    result = _dom_get_attributes(dom_element, timestamps)
     result["tag"] = _dom_get_tag(dom_element)
     return result
 
 
-def dom_parse_way(dom_element: Element) -> dict[str, Any]:
+def dom_parse_way(dom_element: Any, *, timestamps: str = "datetime") -> dict[str, Any]:
     """
     Returns WayData for the way.
     """
-    result = _dom_get_attributes(dom_element)
+    if not isinstance(dom_element, Element):
+        return etree_parse_way(dom_element, timestamps=timestamps)
+    result = _dom_get_attributes(dom_element, timestamps)
     result["tag"] = _dom_get_tag(dom_element)
     result["nd"] = _dom_get_nd(dom_element)
     return result
 
 
-def dom_parse_relation(dom_element: Element) -> dict[str, Any]:
+def dom_parse_relation(
+    dom_element: Any, *, timestamps: str = "datetime"
+) -> dict[str, Any]:
     """
     Returns RelationData for the relation.
     """
-    result = _dom_get_attributes(dom_element)
+    if not isinstance(dom_element, Element):
+        return etree_parse_relation(dom_element, timestamps=timestamps)
+    result = _dom_get_attributes(dom_element, timestamps)
     result["tag"] = _dom_get_tag(dom_element)
-    result["member"] = _dom_get_member(dom_element)
+    result["member"] = _dom_get_member(dom_element, timestamps)
     return result
 
 
 def dom_parse_changeset(
-    dom_element: Element, include_discussion: bool = False
+    dom_element: Any,
+    include_discussion: bool = False,
+    *,
+    timestamps: str = "datetime",
 ) -> dict[str, Any]:
     """
     Returns ChangesetData for the changeset.
     """
-    result = _dom_get_attributes(dom_element)
+    if not isinstance(dom_element, Element):
+        return etree_parse_changeset(
+            dom_element, include_discussion, timestamps=timestamps
+        )
+    result = _dom_get_attributes(dom_element, timestamps)
     result["tag"] = _dom_get_tag(dom_element)
     if include_discussion:
-        result["discussion"] = _dom_get_discussion(dom_element)
+        result["discussion"] = _dom_get_discussion(dom_element, timestamps)
 
     return result
 
 
-def dom_parse_note(dom_element: Element) -> dict[str, Any]:
+def dom_parse_note(dom_element: Any, *, timestamps: str = "datetime") -> dict[str, Any]:
     """
     Returns NoteData for the note.
     """
-    result = _dom_get_attributes(dom_element)
+    if not isinstance(dom_element, Element):
+        return etree_parse_note(dom_element, timestamps=timestamps)
+    result = _dom_get_attributes(dom_element, timestamps)
     result["id"] = xmlbuilder._get_xml_value(dom_element, "id")
     result["status"] = xmlbuilder._get_xml_value(dom_element, "status")
 
-    result["date_created"] = _parse_date(
+    parse_date = timestamp_decoder(timestamps)
+    result["date_created"] = parse_date(
         xmlbuilder._get_xml_value(dom_element, "date_created")
     )
-    result["date_closed"] = _parse_date(
+    result["date_closed"] = parse_date(
         xmlbuilder._get_xml_value(dom_element, "date_closed")
     )
-    result["comments"] = _dom_get_comments(dom_element)
+    result["comments"] = _dom_get_comments(dom_element, timestamps)
+
+    return result
+
+
+def etree_parse_node(
+    element: ET.Element,
+    *,
+    timestamps: str = "datetime",
+    tag_table: "TagTable | None" = None,
+    result_type: str = "dicts",
+) -> Any:
+    """
+    Returns NodeData for the node, from an `ElementTree` element, or with
+    `result_type="objects"` an `elements.Node` built from it directly.
+    The tags are built by `tag_table` if one is given, see `TagTable`.
+    """
+    if result_type == "objects":
+        attributes = _object_attributes(element, elements.Node, timestamps)
+        attributes["tag"] = _etree_get_tag(element, tag_table)
+        return elements.Node(**attributes)
+    result = _parse_attributes(element.attrib.items(), timestamps)
+    result["tag"] = _etree_get_tag(element, tag_table)
+    return result
+
+
+def etree_parse_way(
+    element: ET.Element,
+    *,
+    timestamps: str = "datetime",
+    tag_table: "TagTable | None" = None,
+    result_type: str = "dicts",
+) -> Any:
+    """
+    Returns WayData for the way, from an `ElementTree` element, or with
+    `result_type="objects"` an `elements.Way` built from it directly.
+    The tags are built by `tag_table` if one is given, see `TagTable`.
+    """
+    if result_type == "objects":
+        attributes = _object_attributes(element, elements.Way, timestamps)
+        attributes["tag"] = _etree_get_tag(element, tag_table)
+        attributes["nd"] = tuple([int(nd.attrib["ref"]) for nd in element.iter("nd")])
+        return elements.Way(**attributes)
+    result = _parse_attributes(element.attrib.items(), timestamps)
+    result["tag"] = _etree_get_tag(element, tag_table)
+    result["nd"] = [int(nd.attrib["ref"]) for nd in element.iter("nd")]
+    return result
+
+
+def etree_parse_relation(
+    element: ET.Element,
+    *,
+    timestamps: str = "datetime",
+    tag_table: "TagTable | None" = None,
+    result_type: str = "dicts",
+) -> Any:
+    """
+    Returns RelationData for the relation, from an `ElementTree` element, or
+    with `result_type="objects"` an `elements.Relation` built from it
+    directly.
+    The tags are built by `tag_table` if one is given, see `TagTable`.
+    """
+    if result_type == "objects":
+        attributes = _object_attributes(element, elements.Relation, timestamps)
+        attributes["tag"] = _etree_get_tag(element, tag_table)
+        attributes["member"] = tuple(
+            [
+                elements.Member(
+                    member.attrib["type"],
+                    int(member.attrib["ref"]),
+                    member.attrib["role"],
+                )
+                for member in element.iter("member")
+            ]
+        )
+        return elements.Relation(**attributes)
+    result = _parse_attributes(element.attrib.items(), timestamps)
+    result["tag"] = _etree_get_tag(element, tag_table)
+    result["member"] = [
+        _parse_attributes(member.attrib.items(), timestamps)
+        for member in element.iter("member")
+    ]
+    return result
+
+
+def etree_parse_changeset(
+    element: ET.Element,
+    include_discussion: bool = False,
+    *,
+    timestamps: str = "datetime",
+    tag_table: "TagTable | None" = None,
+) -> dict[str, Any]:
+    """
+    Returns ChangesetData for the changeset, from an `ElementTree` element.
+    The tags are built by `tag_table` if one is given, see `TagTable`.
+    """
+    result = _parse_attributes(element.attrib.items(), timestamps)
+    result["tag"] = _etree_get_tag(element, tag_table)
+    if include_discussion:
+        result["discussion"] = _etree_get_discussion(element, timestamps)
+    return result
+
 
+def etree_parse_note(
+    element: ET.Element, *, timestamps: str = "datetime"
+) -> dict[str, Any]:
+    """
+    Returns NoteData for the note, from an `ElementTree` element.
+    """
+    result = _parse_attributes(element.attrib.items(), timestamps)
+    result["id"] = _etree_get_text(element, "id")
+    result["status"] = _etree_get_text(element, "status")
+    parse_date = timestamp_decoder(timestamps)
+    result["date_created"] = parse_date(_etree_get_text(element, "date_created"))
+    result["date_closed"] = parse_date(_etree_get_text(element, "date_closed"))
+    result["comments"] = [
+        {
+            "date": parse_date(_etree_get_text(t, "date")),
+            "action": _etree_get_text(t, "action"),
+            "text": _etree_get_text(t, "text"),
+            "html": _etree_get_text(t, "html"),
+            "uid": _etree_get_text(t, "uid"),
+            "user": _etree_get_text(t, "user"),
+        }
+        for t in element.iter("comment")
+    ]
     return result
 
 
-def _dom_get_attributes(dom_element: Element) -> dict[str, Any]:
+def _dom_get_attributes(
+    dom_element: Element, timestamps: str = "datetime"
+) -> dict[str, Any]:
     """
     Returns a formated dictionnary of attributes of a dom_element.
     """
+    return _parse_attributes(dom_element.attributes.items(), timestamps)
 
-    def is_true(v: str) -> bool:
-        return v == "true"
-
-    attribute_mapping: dict[str, Any] = {
-        "uid": int,
-        "changeset": int,
-        "version": int,
-        "id": int,
-        "lat": float,
-        "lon": float,
-        "open": is_true,
-        "visible": is_true,
-        "ref": int,
-        "comments_count": int,
-        "timestamp": _parse_date,
-        "created_at": _parse_date,
-        "closed_at": _parse_date,
-        "date": _parse_date,
-    }
+
+def _parse_attributes(
+    attributes: Iterable[tuple[str, str]], timestamps: str = "datetime"
+) -> dict[str, Any]:
+    """
+    Returns a formated dictionnary of the `(name, value)` pairs in `attributes`,
+    with the timestamps decoded according to `timestamps`.
+    """
+    attribute_mapping = _ATTRIBUTE_MAPPINGS.get(timestamps)
+    if attribute_mapping is None:
+        raise _unknown_timestamps(timestamps)
     result: dict[str, Any] = {}
-    for k, v in dom_element.attributes.items():
-        try:
-            result[k] = attribute_mapping[k](v)
-        except KeyError:
-            result[k] = v
+    for k, v in attributes:
+        convert = attribute_mapping.get(k)
+        result[k] = v if convert is None else convert(v)
     return result
 
 
+def _object_attributes(
+    element: ET.Element, cls: type, timestamps: str = "datetime"
+) -> dict[str, Any]:
+    """
+    Returns the attributes of `element` that are fields of the element class
+    `cls` (as `_parse_attributes` formats them), to construct it with.
+    """
+    attribute_mapping = _ATTRIBUTE_MAPPINGS.get(timestamps)
+    if attribute_mapping is None:
+        raise _unknown_timestamps(timestamps)
+    fields = _OBJECT_FIELDS[cls]
+    result: dict[str, Any] = {}
+    for k, v in element.attrib.items():
+        if k in fields:
+            convert = attribute_mapping.get(k)
+            result[k] = v if convert is None else convert(v)
+    return result
+
+
+_OBJECT_FIELDS: dict[type, frozenset[str]] = {
+    cls: frozenset(cls.__slots__) - {"tag", "nd", "member"}
+    for cls in (elements.Node, elements.Way, elements.Relation)
+}
+
+
 def _dom_get_tag(dom_element: Element) -> dict[str, str]:
     """
     Returns the dictionnary of tags of a dom_element.
@@ -149,6 +370,109 @@ def _dom_get_tag(dom_element: Element) -> dict[str, str]:
     return result
 
 
+def _etree_get_tag(
+    element: ET.Element, tag_table: "TagTable | None" = None
+) -> Mapping[str, str]:
+    """
+    Returns the dictionnary of tags of an `ElementTree` element, built by
+    `tag_table` if one is given.
+    """
+    if tag_table is not None:
+        return tag_table.tags(
+            (t.attrib["k"], t.attrib["v"]) for t in element.iter("tag")
+        )
+    return {t.attrib["k"]: t.attrib["v"] for t in element.iter("tag")}
+
+
+class TagTable:
+    """
+    Builds the tags of the elements of one response.
+
+    The same keys (`highway`, `building`, `name`, …) and many of the same
+    values appear on thousands of elements of a `map` response, and the XML
+    parser creates a new string for every one of them. A `TagTable` interns
+    them: each distinct key or value is kept once and every element refers to
+    that one string.
+
+    With `shared=True` the elements with the same tags also share the same
+    mapping, a read-only `types.MappingProxyType` (e.g. all untagged nodes
+    get one empty mapping). Copy it with `dict()` to change it.
+
+    A table is meant for a single response. It holds at most `MAX_ENTRIES`
+    strings and as many shared mappings, anything beyond is returned as is,
+    so streaming a large document does not grow the table without bounds.
+    """
+
+    MAX_ENTRIES = 100_000
+    """The maximum number of strings (and of shared mappings) in a table"""
+
+    def __init__(self, shared: bool = False) -> None:
+        self._strings: dict[str, str] = {}
+        self._mappings: dict[frozenset[tuple[str, str]], Mapping[str, str]] | None = (
+            {} if shared else None
+        )
+
+    def intern(self, string: str) -> str:
+        """
+        Returns the string of the table equal to `string`, after adding
+        `string` if there is none yet.
+        """
+        strings = self._strings
+        interned = strings.get(string)
+        if interned is not None:
+            return interned
+        if len(strings) < self.MAX_ENTRIES:
+            strings[string] = string
+        return string
+
+    def tags(self, items: Iterable[tuple[str, str]]) -> Mapping[str, str]:
+        """
+        Returns the tags of the `(key, value)` pairs `items`: a new dict with
+        interned keys and values, or a shared read-only mapping with
+        `shared=True`.
+        """
+        intern = self.intern
+        tags = {intern(k): intern(v) for k, v in items}
+        mappings = self._mappings
+        if mappings is None:
+            return tags
+        key = frozenset(tags.items())
+        shared = mappings.get(key)
+        if shared is not None:
+            return shared
+        shared = MappingProxyType(tags)
+        if len(mappings) < self.MAX_ENTRIES:
+            mappings[key] = shared
+        return shared
+
+
+def _etree_get_discussion(
+    element: ET.Element, timestamps: str = "datetime"
+) -> list[dict[str, Any]]:
+    """
+    Returns the comments of the discussion of an `ElementTree` element.
+    """
+    result: list[dict[str, Any]] = []
+    discussion = element.find("discussion")
+    if discussion is not None:
+        for t in discussion.iter("comment"):
+            comment = _parse_attributes(t.attrib.items(), timestamps)
+            comment["text"] = _etree_get_text(t, "text")
+            result.append(comment)
+    return result
+
+
+def _etree_get_text(element: ET.Element, tag: str) -> str | None:
+    """
+    Returns the text of the first descendant `tag` of an `ElementTree`
+    element, `None` if there is no such element or if it is empty.
+    """
+    child = element.find(f".//{tag}")
+    if child is None:
+        return None
+    return child.text
+
+
 def _dom_get_nd(dom_element: Element) -> list[int]:
     """
     Returns the list of nodes of a dom_element.
@@ -159,7 +483,9 @@ def _dom_get_nd(dom_element: Element) -> list[int]:
     return result
 
 
-def _dom_get_discussion(dom_element: Element) -> list[dict[str, Any]]:
+def _dom_get_discussion(
+    dom_element: Element, timestamps: str = "datetime"
+) -> list[dict[str, Any]]:
     """
     Returns the dictionnary of comments of a dom_element.
     """
@@ -167,7 +493,7 @@ def _dom_get_discussion(dom_element: Element) -> list[dict[str, Any]]:
     try:
         discussion = dom_element.getElementsByTagName("discussion")[0]
         for t in discussion.getElementsByTagName("comment"):
-            comment = _dom_get_attributes(t)
+            comment = _dom_get_attributes(t, timestamps)
             comment["text"] = xmlbuilder._get_xml_value(t, "text")
             result.append(comment)
     except IndexError:
@@ -175,14 +501,17 @@ def _dom_get_discussion(dom_element: Element) -> list[dict[str, Any]]:
     return result
 
 
-def _dom_get_comments(dom_element: Element) -> list[dict[str, Any]]:
+def _dom_get_comments(
+    dom_element: Element, timestamps: str = "datetime"
+) -> list[dict[str, Any]]:
     """
     Returns the list of comments of a dom_element.
     """
+    parse_date = timestamp_decoder(timestamps)
     result: list[dict[str, Any]] = []
     for t in dom_element.getElementsByTagName("comment"):
         comment: dict[str, Any] = {}
-        comment["date"] = _parse_date(xmlbuilder._get_xml_value(t, "date"))
+        comment["date"] = parse_date(xmlbuilder._get_xml_value(t, "date"))
         comment["action"] = xmlbuilder._get_xml_value(t, "action")
         comment["text"] = xmlbuilder._get_xml_value(t, "text")
         comment["html"] = xmlbuilder._get_xml_value(t, "html")
@@ -192,23 +521,178 @@ def _dom_get_comments(dom_element: Element) -> list[dict[str, Any]]:
     return result
 
 
-def _dom_get_member(dom_element: Element) -> list[dict[str, Any]]:
+def _dom_get_member(
+    dom_element: Element, timestamps: str = "datetime"
+) -> list[dict[str, Any]]:
     """
     Returns a list of relation members.
     """
     result: list[dict[str, Any]] = []
     for m in dom_element.getElementsByTagName("member"):
-        result.append(_dom_get_attributes(m))
+        result.append(_dom_get_attributes(m, timestamps))
     return result
 
 
+class LazyTimestamp(str):
+    """
+    A timestamp that is decoded only when it is used, returned for the
+    timestamps with `OsmApi(timestamps="lazy")`.
+
+    It is the string sent by the API (so it compares, sorts and serializes
+    like one), `to_datetime` and `to_epoch` decode it. The result is not
+    cached, keep it if it is needed more than once.
+    """
+
+    __slots__ = ()
+
+    def to_datetime(self) -> datetime | str:
+        """
+        Returns the timestamp as a naive `datetime` in UTC, like the
+        `"datetime"` mode (the string itself if it cannot be decoded).
+        """
+        return _parse_date(str(self))
+
+    def to_epoch(self) -> int | str:
+        """
+        Returns the timestamp in seconds since the epoch, like the `"epoch"`
+        mode (the string itself if it cannot be decoded).
+        """
+        return _parse_epoch(str(self))
+
+
+def timestamp_decoder(timestamps: str) -> Callable[[str | None], Any]:
+    """
+    Returns the function decoding a timestamp of the API in the mode
+    `timestamps`:
+
+    * `"datetime"`: a naive `datetime` in UTC (the default)
+    * `"epoch"`: an `int`, the seconds since the epoch
+    * `"raw"`: the string as sent by the API
+    * `"lazy"`: a `LazyTimestamp`, decoded only when it is used
+
+    Values that are not timestamps (e.g. `None` for a note that is not closed)
+    are returned unchanged in every mode. If `timestamps` is not one of the
+    modes, `ValueError` is raised.
+    """
+    try:
+        return TIMESTAMP_DECODERS[timestamps]
+    except KeyError:
+        raise _unknown_timestamps(timestamps) from None
+
+
+def _unknown_timestamps(timestamps: str) -> ValueError:
+    return ValueError(
+        f"timestamps must be one of {', '.join(map(repr, TIMESTAMP_DECODERS))}, "
+        f"got {timestamps!r}"
+    )
+
+
+_DATE_FORMATS = ["%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%dT%H:%M:%SZ"]
+
+# The separator between date and time of the `_DATE_FORMATS`, by suffix
+_DATE_SEPARATORS = {" UTC": " ", "Z": "T"}
+
+
+def _has_api_layout(date_string: str) -> bool:
+    """
+    Returns whether `date_string` has the fixed-width layout of one of the
+    `_DATE_FORMATS`. Such a string is decoded by `datetime.fromisoformat`,
+    which is more than ten times faster than `datetime.strptime`.
+    """
+    separator = _DATE_SEPARATORS.get(date_string[19:])
+    return (
+        separator is not None
+        and date_string[10] == separator
+        and date_string[4] == date_string[7] == "-"
+        and date_string[13] == date_string[16] == ":"
+    )
+
+
+@overload
+def _parse_date(date_string: str) -> datetime | str: ...
+
+
+@overload
+def _parse_date(date_string: None) -> None: ...
+
+
 def _parse_date(date_string: str | None) -> datetime | str | None:
-    date_formats = ["%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%dT%H:%M:%SZ"]
-    for date_format in date_formats:
+    if isinstance(date_string, str) and _has_api_layout(date_string):
+        try:
+            return datetime.fromisoformat(date_string[:19])
+        except ValueError:
+            pass
+
+    for date_format in _DATE_FORMATS:
         try:
             result = datetime.strptime(date_string, date_format)  # type: ignore[arg-type]  # noqa: E501
             return result
         except (ValueError, TypeError):
-            logger.debug(f"{date_string} does not match {date_format}")
+            logger.debug("%s does not match %s", date_string, date_format)
 
     return date_string
+
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+
+@overload
+def _parse_epoch(date_string: str) -> int | str: ...
+
+
+@overload
+def _parse_epoch(date_string: None) -> None: ...
+
+
+def _parse_epoch(date_string: str | None) -> int | str | None:
+    result = _parse_date(date_string)
+    if isinstance(result, datetime):
+        return (result - _EPOCH) // _SECOND
+    return result
+
+
+def _raw_date(date_string: str | None) -> str | None:
+    return date_string
+
+
+def _lazy_date(date_string: str | None) -> LazyTimestamp | None:
+    if isinstance(date_string, str):
+        return LazyTimestamp(date_string)
+    return date_string
+
+
+TIMESTAMP_DECODERS: dict[str, Callable[[str | None], Any]] = {
+    "datetime": _parse_date,
+    "epoch": _parse_epoch,
+    "raw": _raw_date,
+    "lazy": _lazy_date,
+}
+"""The timestamp decoders by mode, see `timestamp_decoder`"""
+
+
+def _is_true(v: str) -> bool:
+    return v == "true"
+
+
+_ATTRIBUTE_TYPES: dict[str, Callable[[str], Any]] = {
+    "uid": int,
+    "changeset": int,
+    "version": int,
+    "id": int,
+    "lat": float,
+    "lon": float,
+    "open": _is_true,
+    "visible": _is_true,
+    "ref": int,
+    "comments_count": int,
+}
+
+_TIMESTAMP_ATTRIBUTES = ["timestamp", "created_at", "closed_at", "date"]
+
+# The attribute conversions of `_parse_attributes` for every timestamp mode,
+# built once instead of for every element
+_ATTRIBUTE_MAPPINGS: dict[str, dict[str, Callable[[str], Any]]] = {
+    mode: {**_ATTRIBUTE_TYPES, **dict.fromkeys(_TIMESTAMP_ATTRIBUTES, decoder)}
+    for mode, decoder in TIMESTAMP_DECODERS.items()
+}
@@ -0,0 +1,263 @@
+"""
+Compact element classes for the OpenStreetMap API.
+
+With `OsmApi(result_type="objects")` the reads return instances of the frozen
+`__slots__` classes `Node`, `Way`, `Relation` and `Changeset` instead of
+dicts. They hold the same data in a fraction of the memory of a dict per
+element: there is no per-instance `__dict__`, the node ids of a way are a
+tuple and the members of a relation are `Member` objects.
+
+Each class has `to_dict()`, returning the dict the default
+`result_type="dicts"` returns for the same element, and `from_dict()` for
+the other way round. Attributes that are not in the response (e.g. `lat` and
+`lon` of a deleted node) are `None`, and are left out by `to_dict()`.
+"""
+
+from dataclasses import dataclass, field
+from collections.abc import Callable
+from typing import Any
+
+RESULT_TYPES = ("dicts", "objects")
+"""The values of `OsmApi(result_type=...)`"""
+
+
+def _known(cls: Any, data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Returns the items of `data` that are fields of the slots class `cls`.
+    """
+    return {k: data[k] for k in cls.__slots__ if k in data}
+
+
+def _present(obj: Any) -> dict[str, Any]:
+    """
+    Returns the fields of the slots object `obj` that are not `None`.
+    """
+    return {k: v for k in obj.__slots__ if (v := getattr(obj, k)) is not None}
+
+
+@dataclass(frozen=True, slots=True)
+class Member:
+    """
+    A member of a relation.
+    """
+
+    type: str
+    ref: int
+    role: str
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Member":
+        """
+        Returns the member for the member dict `data`.
+        """
+        return cls(data["type"], data["ref"], data["role"])
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the member as a dict, as it is returned with the default
+        result type.
+        """
+        return {"type": self.type, "ref": self.ref, "role": self.role}
+
+
+@dataclass(frozen=True, slots=True)
+class Node:
+    """
+    A node, see `OsmApi.node_get` for the attributes.
+    """
+
+    id: int
+    visible: bool | None = None
+    version: int | None = None
+    changeset: int | None = None
+    timestamp: Any = None
+    user: str | None = None
+    uid: int | None = None
+    lat: float | None = None
+    lon: float | None = None
+    tag: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Node":
+        """
+        Returns the node for the node dict `data`, keys that are not
+        attributes of a node are ignored.
+        """
+        return cls(**_known(cls, data))
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the node as a dict, as it is returned with the default result
+        type.
+        """
+        result = _present(self)
+        result["tag"] = dict(self.tag)
+        return result
+
+
+@dataclass(frozen=True, slots=True)
+class Way:
+    """
+    A way, see `OsmApi.way_get` for the attributes. The ids of the nodes are
+    the tuple `nd`.
+    """
+
+    id: int
+    visible: bool | None = None
+    version: int | None = None
+    changeset: int | None = None
+    timestamp: Any = None
+    user: str | None = None
+    uid: int | None = None
+    tag: dict[str, str] = field(default_factory=dict)
+    nd: tuple[int, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Way":
+        """
+        Returns the way for the way dict `data`, keys that are not attributes
+        of a way are ignored.
+        """
+        attributes = _known(cls, data)
+        attributes["nd"] = tuple(data.get("nd", ()))
+        return cls(**attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the way as a dict, as it is returned with the default result
+        type.
+        """
+        result = _present(self)
+        result["tag"] = dict(self.tag)
+        result["nd"] = list(self.nd)
+        return result
+
+
+@dataclass(frozen=True, slots=True)
+class Relation:
+    """
+    A relation, see `OsmApi.relation_get` for the attributes. The members are
+    the tuple `member` of `Member` objects.
+    """
+
+    id: int
+    visible: bool | None = None
+    version: int | None = None
+    changeset: int | None = None
+    timestamp: Any = None
+    user: str | None = None
+    uid: int | None = None
+    tag: dict[str, str] = field(default_factory=dict)
+    member: tuple[Member, ...] = ()
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Relation":
+        """
+        Returns the relation for the relation dict `data`, keys that are not
+        attributes of a relation are ignored.
+        """
+        attributes = _known(cls, data)
+        attributes["member"] = tuple(
+            Member.from_dict(member) for member in data.get("member", ())
+        )
+        return cls(**attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the relation as a dict, as it is returned with the default
+        result type.
+        """
+        result = _present(self)
+        result["tag"] = dict(self.tag)
+        result["member"] = [member.to_dict() for member in self.member]
+        return result
+
+
+@dataclass(frozen=True, slots=True)
+class Changeset:
+    """
+    A changeset, see `OsmApi.changeset_get` for the attributes. `discussion`
+    is only set if the discussion was requested.
+    """
+
+    id: int
+    user: str | None = None
+    uid: int | None = None
+    created_at: Any = None
+    closed_at: Any = None
+    open: bool | None = None
+    min_lat: str | None = None
+    min_lon: str | None = None
+    max_lat: str | None = None
+    max_lon: str | None = None
+    comments_count: int | None = None
+    changes_count: str | None = None
+    tag: dict[str, str] = field(default_factory=dict)
+    discussion: tuple[dict[str, Any], ...] | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Changeset":
+        """
+        Returns the changeset for the changeset dict `data`, keys that are
+        not attributes of a changeset are ignored.
+        """
+        attributes = _known(cls, data)
+        if "discussion" in data:
+            attributes["discussion"] = tuple(data["discussion"])
+        return cls(**attributes)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Returns the changeset as a dict, as it is returned with the default
+        result type.
+        """
+        result = _present(self)
+        result["tag"] = dict(self.tag)
+        if self.discussion is not None:
+            result["discussion"] = list(self.discussion)
+        return result
+
+
+ELEMENT_CLASSES: dict[str, Any] = {
+    "node": Node,
+    "way": Way,
+    "relation": Relation,
+    "changeset": Changeset,
+}
+"""The element classes by the type of the element"""
+
+
+def from_dict(osm_type: str, data: dict[str, Any]) -> Any:
+    """
+    Returns the object of the class for `osm_type` (`"node"`, `"way"`,
+    `"relation"` or `"changeset"`) for the dict `data`.
+    """
+    return ELEMENT_CLASSES[osm_type].from_dict(data)
+
+
+def _keep_dict(osm_type: str, data: dict[str, Any]) -> dict[str, Any]:
+    return data
+
+
+def check_result_type(result_type: str) -> None:
+    """
+    Raises a `ValueError` if `result_type` is not one of `RESULT_TYPES`.
+    """
+    if result_type not in RESULT_TYPES:
+        raise ValueError(
+            f"result_type must be one of {', '.join(map(repr, RESULT_TYPES))}, "
+            f"got {result_type!r}"
+        )
+
+
+def result_converter(result_type: str) -> Callable[[str, dict[str, Any]], Any]:
+    """
+    Returns the function converting a parsed `(osm_type, dict)` to the result
+    type `result_type`: `from_dict` for `"objects"`, a function returning the
+    dict as is for `"dicts"`. The XML parsers of `osmapi.parser` build the
+    objects directly instead, see `dom.etree_parse_node`.
+
+    If `result_type` is not one of `RESULT_TYPES`, `ValueError` is raised.
+    """
+    check_result_type(result_type)
+    return from_dict if result_type == "objects" else _keep_dict
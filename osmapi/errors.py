@@ -2,7 +2,7 @@
 Error classes for the OpenStreetMap API."""
 
 import warnings
-from typing import Any
+from typing import Any, NoReturn
 
 
 class OsmApiError(Exception):
@@ -74,6 +74,19 @@ class XmlResponseInvalidError(OsmApiError):
     """
 
 
+class JsonResponseInvalidError(OsmApiError):
+    """
+    Error if the JSON response from the OpenStreetMap API is invalid
+    """
+
+
+class UploadJournalError(OsmApiError):
+    """
+    Error if the journal of a bulk upload does not match the upload, or the
+    upload it records can't be reconciled with the changeset it went to
+    """
+
+
 class ApiError(OsmApiError):
     """
     Error class, is thrown when an API request fails
@@ -89,6 +102,10 @@ class ApiError(OsmApiError):
         self.payload = payload
         """Payload of API when this error occured"""
 
+        self.retry_after: float | None = None
+        """Seconds to wait before sending the request again, if the response
+        had a `Retry-After` header"""
+
     @property
     def payload_str(self) -> str:
         """
@@ -235,3 +252,13 @@ def __getattr__(name: str) -> Any:
     `AuthenticationMissingError` and emits a `DeprecationWarning`.
     """
     return resolve_deprecated_name(name)
+
+
+def _raise_as(error: ApiError, status: int, error_type: type[ApiError]) -> NoReturn:
+    """
+    Raises `error` as an `error_type` if it has the HTTP `status`, and as it
+    is otherwise.
+    """
+    if error.status == status:
+        raise error_type(error.status, error.reason, error.payload) from error
+    raise error
@@ -3,20 +3,330 @@ HTTP session management for the OpenStreetMap API.
 """
 
 import datetime
+import email.utils
+import gzip
 import itertools as it
 import logging
+import os
+import random
 import requests
+import tempfile
+import threading
 import time
-from typing import Any
+import zlib
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
+from typing import IO, Any, TypeVar
 
 from . import errors
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# The body of a request: an iterable of bytes (e.g. an `OsmChangeBody`) is
+# sent with chunked transfer encoding, it must be iterable more than once for
+# a request to be retried
+Body = str | bytes | Iterable[bytes] | None
+
+GZIP_MIN_SIZE = 1024
+"""Request bodies of at least this many bytes are compressed (default)"""
+
+GZIP_LEVEL = 6
+"""The compression level of compressed request bodies"""
+
+
+class TokenBucket:
+    """
+    A token bucket that fills up with `rate` tokens per second, up to
+    `capacity` tokens (by default `rate`, but at least 1). It is thread-safe.
+
+    Tokens are reserved in the order of the calls, even if the bucket does
+    not hold enough of them yet (it is in debt then): `reserve` returns how
+    long to wait until the reserved tokens would have been there.
+
+    After `throttle` the bucket pauses and fills up at half the rate, which
+    climbs back linearly to `rate` within `recovery` seconds.
+    """
+
+    def __init__(
+        self, rate: float, capacity: float | None = None, recovery: float = 60.0
+    ) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate!r}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.recovery = recovery
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._throttled_rate = rate
+        self._throttled_at = 0.0
+        self._lock = threading.Lock()
+
+    def current_rate(self, now: float | None = None) -> float:
+        """
+        Returns the rate at which the bucket fills up at the moment.
+        """
+        if now is None:
+            now = time.monotonic()
+        if self._throttled_rate >= self.rate or self.recovery <= 0:
+            return self.rate
+        recovered = (now - self._throttled_at) / self.recovery
+        return min(
+            self.rate,
+            self._throttled_rate + (self.rate - self._throttled_rate) * recovered,
+        )
+
+    def reserve(self, amount: float = 1) -> float:
+        """
+        Takes `amount` tokens and returns the seconds to wait until they are
+        available.
+        """
+        with self._lock:
+            now = time.monotonic()
+            rate = self.current_rate(now)
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def throttle(self, retry_after: float | None = None) -> None:
+        """
+        Halves the rate (see the class documentation) and pauses the bucket
+        for `retry_after` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._throttled_rate = max(self.current_rate(now) / 2, self.rate / 32)
+            self._throttled_at = now
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class RateLimiter:
+    """
+    Limits the requests (and the bytes they transfer) of the sessions it is
+    passed to. One limiter can be shared by several sessions (and threads),
+    e.g. by several `OsmApi` objects or the workers of
+    `OsmApi.changeset_upload_parallel`, which then keep to the limits
+    together.
+
+    `rate` limits all requests to that many per second, spaced evenly.
+    `read_rate` and `write_rate` limit the reads (`GET` and `HEAD`) and the
+    writes (all other requests) separately, `read_bytes` the bytes per
+    second of the responses to reads and `write_bytes` the bytes per second
+    of the bodies of writes. A response to a read is counted once it has
+    arrived (a streamed one chunk by chunk), so a large one delays the next
+    reads. At least one limit has to be given.
+
+    When the API answers with a 429 (Too Many Requests) or a 509 (Bandwidth
+    Limit Exceeded), all limits are paused for as long as its `Retry-After`
+    says and then continue at half their rate, which climbs back to the
+    configured one within `recovery` seconds, see `TokenBucket`. So the
+    throughput settles just below the limits of the server.
+    """
+
+    READ_METHODS = frozenset({"GET", "HEAD"})
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        *,
+        read_rate: float | None = None,
+        write_rate: float | None = None,
+        read_bytes: float | None = None,
+        write_bytes: float | None = None,
+        recovery: float = 60.0,
+    ) -> None:
+        if all(
+            limit is None
+            for limit in (rate, read_rate, write_rate, read_bytes, write_bytes)
+        ):
+            raise ValueError("at least one limit is required")
+
+        def requests(rate: float | None) -> TokenBucket | None:
+            # requests are spaced evenly, without bursts
+            return None if rate is None else TokenBucket(rate, 1, recovery)
+
+        def transfers(rate: float | None) -> TokenBucket | None:
+            return None if rate is None else TokenBucket(rate, None, recovery)
+
+        self._requests = requests(rate)
+        self._reads = requests(read_rate)
+        self._writes = requests(write_rate)
+        self._read_bytes = transfers(read_bytes)
+        self._write_bytes = transfers(write_bytes)
+
+    @property
+    def _buckets(self) -> list[TokenBucket]:
+        buckets = (
+            self._requests,
+            self._reads,
+            self._writes,
+            self._read_bytes,
+            self._write_bytes,
+        )
+        return [bucket for bucket in buckets if bucket is not None]
+
+    def acquire(self, method: str = "GET", size: int = 0) -> None:
+        """
+        Waits until the next request `method` with a body of `size` bytes may
+        be sent.
+        """
+        read = method in self.READ_METHODS
+        waits = [0.0]
+        for bucket in (self._requests, self._reads if read else self._writes):
+            if bucket is not None:
+                waits.append(bucket.reserve())
+        if read and self._read_bytes is not None:
+            # the responses of the reads before may have used up the bytes
+            waits.append(self._read_bytes.reserve(0))
+        if not read and size:
+            waits.append(self._transfer(self._write_bytes, size))
+        if max(waits) > 0:
+            time.sleep(max(waits))
+
+    def transfer(self, method: str, size: int) -> None:
+        """
+        Counts `size` bytes transferred by a request `method` after
+        `acquire`: a chunk of a streamed body of a write, which waits until
+        it may be sent, or (a chunk of) the response to a read, which is
+        counted against the next reads.
+        """
+        if method in self.READ_METHODS:
+            self._transfer(self._read_bytes, size)
+            return
+        wait = self._transfer(self._write_bytes, size)
+        if wait > 0:
+            time.sleep(wait)
+
+    @staticmethod
+    def _transfer(bucket: TokenBucket | None, size: int) -> float:
+        return bucket.reserve(size) if bucket is not None and size else 0.0
+
+    def throttle(self, retry_after: float | None = None) -> None:
+        """
+        Slows all limits down after the API answered with a 429 or 509, see
+        the class documentation.
+        """
+        for bucket in self._buckets:
+            bucket.throttle(retry_after)
+
+
+class RetryPolicy:
+    """
+    When and after how long `OsmApiSession` sends a failed request again.
+
+    A request is sent again if it failed with a server error (5xx), with a
+    429 (Too Many Requests), on a broken connection (`ConnectionApiError`)
+    or with an unexpected exception, at most
+    `max_attempts` times in all. By default only idempotent requests are
+    sent again (`IDEMPOTENT_METHODS`, except the `.../create` requests of
+    the API, which are `PUT`s that create something each time): a `POST`
+    (e.g. a `changeset_upload`) may have been applied before it failed. Pass
+    `idempotent_only=False` to retry all requests.
+
+    Before attempt `n + 1` the session waits `backoff * 2 ** (n - 1)`
+    seconds, at most `max_backoff`. With `jitter` (the default) the wait is
+    a random time between 0 and that, so that many clients seeing the same
+    outage don't all come back at the same moment. A 429 or 503 with a
+    `Retry-After` header waits as long as it says instead.
+
+    A connection that broke is dropped from the connection pool by
+    `urllib3`, the retry takes another one (or opens a new one), the other
+    keep-alive connections are kept. With `reset_pool=True` all pooled
+    connections are closed before a request that failed on a broken
+    connection is sent again, e.g. behind a proxy that drops all its
+    connections at once.
+
+    No attempt is made once `budget` seconds would have passed since the
+    first one, the last error is raised.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(
+        self,
+        *,
+        max_attempts: int = 5,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: bool = True,
+        budget: float = 120.0,
+        idempotent_only: bool = True,
+        reset_pool: bool = False,
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError(f"max_attempts must be at least 1, got {max_attempts}")
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.budget = budget
+        self.idempotent_only = idempotent_only
+        self.reset_pool = reset_pool
+
+    def retries(self, method: str, path: str) -> bool:
+        """
+        Returns whether a failed request `method` to `path` may be sent again.
+        """
+        if not self.idempotent_only:
+            return True
+        return method in self.IDEMPOTENT_METHODS and not path.endswith("/create")
+
+    def retryable(self, error: Exception) -> bool:
+        """
+        Returns whether a request that failed with `error` is sent again.
+        """
+        if isinstance(error, errors.AuthenticationMissingError):
+            return False
+        if isinstance(error, errors.ConnectionApiError):
+            return True
+        if isinstance(error, errors.ApiError):
+            return error.status == 429 or error.status >= 500
+        return True
+
+    def resets(self, error: Exception) -> bool:
+        """
+        Returns whether the connection pool is closed before a request that
+        failed with `error` is sent again.
+        """
+        if not self.reset_pool:
+            return False
+        if isinstance(error, errors.ApiError):
+            return isinstance(error, errors.ConnectionApiError)
+        return True
+
+    def wait(self, attempt: int, error: Exception, elapsed: float) -> float | None:
+        """
+        Returns the seconds to wait before the attempt after `attempt`, which
+        failed with `error` after `elapsed` seconds since the first attempt,
+        or `None` if no attempt is made anymore.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            if self.jitter:
+                delay = random.uniform(0, delay)
+        if elapsed + delay > self.budget:
+            return None
+        return delay
+
 
 class OsmApiSession:
     MAX_RETRY_LIMIT = 5
-    """Maximum retries if a call to the remote API fails (default: 5)"""
+    """Maximum attempts of a request without a `retry_policy` (default: 5)"""
+
+    STREAM_CHUNK_SIZE = 64 * 1024
+    """Size of the chunks in which a streamed response is read (default: 64 KiB)"""
 
     def __init__(
         self,
@@ -24,10 +334,22 @@ class OsmApiSession:
         created_by: str,
         session: requests.Session | None = None,
         timeout: int = 30,
+        gzip_min_size: int | None = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        adapter: requests.adapters.HTTPAdapter | None = None,
     ) -> None:
         self._api = base_url
         self._created_by = created_by
         self._timeout = timeout
+        # request bodies of at least this size are sent gzip-compressed,
+        # `None` to send them as they are
+        self._gzip_min_size = gzip_min_size
+        # every request waits for the limiter, which may be shared
+        self._rate_limiter = rate_limiter
+        self._retry_policy = retry_policy or RetryPolicy(
+            max_attempts=self.MAX_RETRY_LIMIT
+        )
 
         # authentication is taken from the session (e.g. an OAuth 2.0 session)
         self._auth: Any = getattr(session, "auth", None)
@@ -45,18 +367,33 @@ class OsmApiSession:
         self._can_authenticate: bool = session is not None
 
         self._http_session = session
+        self._adapter = adapter
         self._session = self._get_http_session()
+        # the headers of every request, that a session passed in lacks
+        self._headers = {} if session is None else {"User-Agent": created_by}
 
     def close(self) -> None:
         if self._session:
             self._session.close()
 
-    def _http_request(  # noqa: C901
+    def _release(self) -> None:
+        """
+        Closes the connection pools of the requests session if it was
+        created for this session, except the one of the `adapter`, which is
+        shared. A session passed in is left open.
+        """
+        if self._http_session is not None:
+            return
+        for adapter in self._session.adapters.values():
+            if adapter is not self._adapter:
+                adapter.close()
+
+    def _http_request(
         self,
         method: str,
         path: str,
         auth: bool,
-        send: str | bytes | None,
+        send: Body,
         return_value: bool = True,
         params: dict | None = None,
     ) -> bytes:
@@ -71,7 +408,7 @@ class OsmApiSession:
         `auth` is a boolean indicating whether authentication should
         be preformed on this request.
         `send` contains additional data that might be sent in a
-        request.
+        request, see `Body`.
         `return_value` indicates wheter this request should return
         any data or not.
 
@@ -89,6 +426,34 @@ class OsmApiSession:
         If the response status code indicates an error,
         `OsmApi.ApiError` is raised.
         """
+        response = self._send(method, path, auth, send, params=params)
+        if self._rate_limiter is not None and method in RateLimiter.READ_METHODS:
+            self._rate_limiter.transfer(method, len(response.content))
+        if return_value and not response.content:
+            raise errors.ResponseEmptyApiError(
+                response.status_code, response.reason, ""
+            )
+
+        logger.debug(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {method} {path}")
+        return response.content
+
+    def _send(
+        self,
+        method: str,
+        path: str,
+        auth: bool,
+        send: Body,
+        params: dict | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """
+        Sends an HTTP request and returns the successful response.
+
+        With `stream` the body of the response is not downloaded yet, read it
+        with `_iter_content`.
+
+        The errors are raised as described in `_http_request`.
+        """
         logger.debug(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {method} {path}")
 
         # Add API base URL to path
@@ -101,95 +466,208 @@ class OsmApiSession:
                 "(see the OAuth 2.0 examples)"
             )
 
+        # only pass `stream` and `headers` if they are needed, for the sake
+        # of sessions that override `request` with a narrower signature
+        options: dict[str, Any] = {"stream": True} if stream else {}
+        headers = dict(self._headers)
+        if self._gzip_min_size is not None:
+            send, compressed = _gzip_body(send, self._gzip_min_size)
+            if compressed:
+                headers["Content-Encoding"] = "gzip"
+        if headers:
+            options["headers"] = headers
+        if self._rate_limiter is not None:
+            send = self._acquire(method, send)
         try:
             response = self._session.request(
-                method, path, data=send, timeout=self._timeout, params=params
+                method, path, data=send, timeout=self._timeout, params=params, **options
             )
-        except requests.exceptions.Timeout as e:
-            raise errors.TimeoutApiError(
-                0, f"Request timed out (timeout={self._timeout})", ""
-            ) from e
-        except requests.exceptions.ConnectionError as e:
-            raise errors.ConnectionApiError(0, f"Connection error: {str(e)}", "") from e
         except requests.exceptions.RequestException as e:
-            raise errors.ApiError(0, str(e), "") from e
+            raise self._request_error(e) from e
 
         if response.status_code != 200:
-            payload = response.content.strip()
-            if response.status_code == 401:
-                raise errors.UnauthorizedApiError(
-                    response.status_code, response.reason, payload
-                )
-            if response.status_code == 404:
-                raise errors.ElementNotFoundApiError(
-                    response.status_code, response.reason, payload
-                )
-            elif response.status_code == 410:
-                raise errors.ElementDeletedApiError(
-                    response.status_code, response.reason, payload
-                )
-            raise errors.ApiError(response.status_code, response.reason, payload)
-        if return_value and not response.content:
-            raise errors.ResponseEmptyApiError(
-                response.status_code, response.reason, ""
-            )
+            error = self._response_error(response)
+            if self._rate_limiter is not None and error.status in (429, 509):
+                self._rate_limiter.throttle(error.retry_after)
+            raise error
+        return response
 
-        logger.debug(f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S} {method} {path}")
-        return response.content
+    def _acquire(self, method: str, send: Body) -> Body:
+        """
+        Waits until the rate limiter lets the request `method` with the body
+        `send` go, and returns the body to send: an iterable body is counted
+        chunk by chunk while it is sent.
+        """
+        assert self._rate_limiter is not None
+        if send is None or isinstance(send, (str, bytes)):
+            size = len(send.encode("utf-8") if isinstance(send, str) else send or b"")
+            self._rate_limiter.acquire(method, size)
+            return send
+        self._rate_limiter.acquire(method)
+        return _RateLimitedBody(send, self._rate_limiter, method)
+
+    def _response_error(self, response: requests.Response) -> errors.ApiError:
+        """
+        Returns the `ApiError` to raise for an unsuccessful `response`.
+        """
+        error = _status_error(
+            response.status_code, response.reason, response.content.strip()
+        )
+        if error.status in (429, 503, 509):
+            error.retry_after = _retry_after(response.headers.get("Retry-After"))
+        return error
+
+    def _request_error(
+        self, e: requests.exceptions.RequestException
+    ) -> errors.ApiError:
+        """
+        Returns the `ApiError` to raise for an exception of `requests`.
+        """
+        if isinstance(e, requests.exceptions.Timeout):
+            return errors.TimeoutApiError(
+                0, f"Request timed out (timeout={self._timeout})", ""
+            )
+        if isinstance(e, requests.exceptions.ConnectionError):
+            return errors.ConnectionApiError(0, f"Connection error: {str(e)}", "")
+        return errors.ApiError(0, str(e), "")
 
-    def _http(  # type: ignore[return-value]  # noqa: C901
+    def _http(
         self,
         cmd: str,
         path: str,
         auth: bool,
-        send: str | bytes | None,
+        send: Body,
         return_value: bool = True,
         params: dict | None = None,
+        retry: bool | None = None,
     ) -> bytes:
-        for i in it.count(1):
+        def request() -> bytes:
+            return self._http_request(
+                cmd, path, auth, send, return_value=return_value, params=params
+            )
+
+        # by default the retry policy decides whether a failed request is
+        # sent again, with `retry=False` it is not, e.g. because the server
+        # may have applied it before the error
+        if retry is None:
+            retry = self._retry_policy.retries(cmd, path)
+        return self._retry(request) if retry else request()
+
+    def _retry(self, request: Callable[[], T]) -> T:
+        """
+        Returns the result of `request`, which is called again if it fails
+        as long as the `RetryPolicy` of the session allows it.
+
+        If an unexpected exception persists, it is raised as
+        `OsmApi.MaximumRetryLimitReachedError`.
+        """
+        start = time.monotonic()
+        for attempt in it.count(1):
             try:
-                return self._http_request(
-                    cmd, path, auth, send, return_value=return_value, params=params
-                )
-            except errors.ApiError as e:
-                if e.status >= 500:
-                    if i == self.MAX_RETRY_LIMIT:
-                        raise
-                    if i != 1:
-                        self._sleep()
-                    self._session = self._get_http_session()
-                else:
+                return request()
+            except Exception as e:
+                if not self._retry_policy.retryable(e):
                     logger.debug("ApiError Exception occured")
                     raise
-            except errors.AuthenticationMissingError:
-                raise
-            except Exception as e:
-                logger.exception("General exception occured")
-                if i == self.MAX_RETRY_LIMIT:
+                if not isinstance(e, errors.ApiError):
+                    logger.exception("General exception occured")
+                wait = self._retry_policy.wait(attempt, e, time.monotonic() - start)
+                if wait is None:
                     if isinstance(e, errors.OsmApiError):
                         raise
                     raise errors.MaximumRetryLimitReachedError(
-                        f"Give up after {i} retries"
+                        f"Give up after {attempt} retries"
                     ) from e
-                if i != 1:
-                    self._sleep()
-                self._session = self._get_http_session()
+                if self._retry_policy.resets(e):
+                    # a closed session is still usable, it opens new connections
+                    self._session.close()
+            self._sleep(wait)
+        raise AssertionError("unreachable")
+
+    @contextmanager
+    def _get_stream(
+        self, path: str, params: dict | None = None
+    ) -> Generator[Iterator[bytes], None, None]:
+        """
+        Sends a GET request to `path` and provides the body of the response as
+        an iterator of chunks of bytes, while it is being downloaded.
+
+        The request is retried like any other until the response has arrived,
+        an error while the body is read is raised as `OsmApi.ApiError` (or one
+        of its subclasses) without retrying. The connection is released when
+        the `with` block is left.
+        """
+        response = self._retry(
+            lambda: self._send("GET", path, False, None, params=params, stream=True)
+        )
+        try:
+            yield self._iter_content(response)
+        finally:
+            response.close()
+
+    def _iter_content(self, response: requests.Response) -> Iterator[bytes]:
+        try:
+            for chunk in response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE):
+                if self._rate_limiter is not None:
+                    self._rate_limiter.transfer("GET", len(chunk))
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            raise self._request_error(e) from e
+
+    def _download_to(
+        self, path: str, target: "str | os.PathLike[str] | IO[bytes]"
+    ) -> int:
+        """
+        Sends a GET request to `path` and writes the body of the response to
+        `target`, a file name or a binary file-like object, chunk by chunk
+        while it is being downloaded. Returns the number of bytes written.
+
+        A file name is only written once the response has arrived: the
+        chunks go to a temporary file in the same directory, which replaces
+        the file only when the download is complete. If it fails, only the
+        temporary file is removed, an existing file is left as it was. A
+        file-like object is neither closed nor truncated. The errors are
+        raised as described for `_get_stream`.
+        """
+        with self._get_stream(path) as body:
+            if not isinstance(target, (str, os.PathLike)):
+                return _write_chunks(body, target)
+            directory = os.path.dirname(os.path.abspath(target))
+            name, f = _create_temporary_file(directory)
+            with f:
+                try:
+                    size = _write_chunks(body, f)
+                    mode = _file_mode(target)
+                    if mode is not None:
+                        os.chmod(name, mode)
+                except BaseException:
+                    f.close()
+                    os.remove(name)
+                    raise
+            os.replace(name, target)
+            return size
 
     def _get_http_session(self) -> requests.Session:
         """
-        Creates a requests session for connection pooling.
+        Returns the requests session of this session, the one passed to the
+        constructor or a new one. It is set up once and kept for all
+        requests (and retries), so that the keep-alive connections of its
+        pool are reused.
+
+        Only a new session is set up: the `adapter` is mounted for the API
+        and the User-Agent set on it. A session passed in is not changed, the
+        User-Agent is sent with each request instead (see `_send`).
         """
         if self._http_session:
-            session = self._http_session
-        else:
-            session = requests.Session()
-
-        session.auth = self._auth
+            return self._http_session
+        session = requests.Session()
+        if self._adapter is not None:
+            session.mount(self._api, self._adapter)
         session.headers.update({"user-agent": self._created_by})
         return session
 
-    def _sleep(self) -> None:
-        time.sleep(5)
+    def _sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
 
     def _get(self, path: str, params: dict | None = None) -> bytes:
         return self._http("GET", path, False, None, params=params)
@@ -202,16 +680,181 @@ class OsmApiSession:
     def _post(
         self,
         path: str,
-        data: str | bytes | None,
+        data: Body,
         optionalAuth: bool = False,
         forceAuth: bool = False,
         params: dict | None = None,
+        retry: bool | None = None,
     ) -> bytes:
         # the Notes API allows certain POSTs by non-authenticated users
         auth = optionalAuth and self._can_authenticate
         if forceAuth:
             auth = True
-        return self._http("POST", path, bool(auth), data, params=params)
+        return self._http("POST", path, bool(auth), data, params=params, retry=retry)
 
     def _delete(self, path: str, data: str | bytes | None) -> bytes:
         return self._http("DELETE", path, True, data)
+
+
+def _pool_adapter(
+    pool_maxsize: int, pool_block: bool = False
+) -> requests.adapters.HTTPAdapter:
+    """
+    Returns an `HTTPAdapter` that keeps up to `pool_maxsize` connections to a
+    host, with `pool_block` a request waits for a free connection instead of
+    opening one more.
+    """
+    if pool_maxsize < 1:
+        raise ValueError(f"pool_maxsize must be at least 1, got {pool_maxsize}")
+    return requests.adapters.HTTPAdapter(
+        pool_maxsize=pool_maxsize, pool_block=pool_block
+    )
+
+
+class _RateLimitedBody:
+    """
+    The iterable `body` of a request `method`, whose chunks are counted by
+    `rate_limiter` (and wait for it) while they are consumed.
+    """
+
+    def __init__(
+        self, body: Iterable[bytes], rate_limiter: RateLimiter, method: str
+    ) -> None:
+        self._body = body
+        self._rate_limiter = rate_limiter
+        self._method = method
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._body:
+            self._rate_limiter.transfer(self._method, len(chunk))
+            yield chunk
+
+
+class GzipBody:
+    """
+    The gzip-compressed `body`, an iterable of chunks of bytes, as an
+    iterable of chunks of bytes. The chunks are compressed while they are
+    consumed, and every iteration starts over (with a new iteration of
+    `body`), so a retried request sends the whole body again.
+    """
+
+    def __init__(self, body: Iterable[bytes], level: int = GZIP_LEVEL) -> None:
+        self._body = body
+        self._level = level
+
+    def __iter__(self) -> Iterator[bytes]:
+        # wbits 31: a deflate stream with a gzip header and trailer
+        compressor = zlib.compressobj(self._level, zlib.DEFLATED, 31)
+        for chunk in self._body:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
+def _gzip_body(send: Body, min_size: int) -> tuple[Body, bool]:
+    """
+    Returns the request body `send` gzip-compressed if it is at least
+    `min_size` bytes long, and whether it was compressed.
+
+    An iterable body is read until `min_size` bytes have come together: if it
+    ends before, it is returned as `bytes` as it is, otherwise it is returned
+    as a `GzipBody` of the chunks read so far and the rest of the same
+    iteration, which compresses it incrementally while it is being sent. It
+    is called for every attempt, so a retried body must be iterable more
+    than once.
+    """
+    if send is None:
+        return send, False
+    if isinstance(send, (str, bytes)):
+        data = send.encode("utf-8") if isinstance(send, str) else send
+        if len(data) < min_size:
+            return send, False
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0), True
+    chunks = iter(send)
+    head = []
+    size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        size += len(chunk)
+        if size >= min_size:
+            return GzipBody(it.chain(head, chunks)), True
+    return b"".join(head), False
+
+
+def _status_error(status: int, reason: str, payload: bytes) -> errors.ApiError:
+    """
+    Returns the `ApiError` to raise for a response with the unsuccessful
+    `status`.
+    """
+    if status == 401:
+        return errors.UnauthorizedApiError(status, reason, payload)
+    if status == 404:
+        return errors.ElementNotFoundApiError(status, reason, payload)
+    elif status == 410:
+        return errors.ElementDeletedApiError(status, reason, payload)
+    return errors.ApiError(status, reason, payload)
+
+
+def _retry_after(value: str | None) -> float | None:
+    """
+    Returns the seconds to wait of a `Retry-After` header `value` (seconds
+    or a date), `None` if there is none or it is invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (date - now).total_seconds())
+
+
+def _create_temporary_file(directory: str) -> tuple[str, IO[bytes]]:
+    """
+    Creates a new file with a random name in `directory` and returns its
+    name and the file, opened for writing in binary mode.
+
+    Unlike `tempfile` the file has the permissions of any new file, those
+    the umask leaves of 0o666, applied by the system when it is created.
+    """
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    attempt = 1
+    while True:
+        name = os.path.join(directory, f".osmapi-{random.getrandbits(48):012x}")
+        try:
+            fd = os.open(name, flags, 0o666)
+        except FileExistsError:
+            if attempt >= tempfile.TMP_MAX:
+                raise
+            attempt += 1
+            continue
+        return name, os.fdopen(fd, "wb")
+
+
+def _file_mode(path: "str | os.PathLike[str]") -> "int | None":
+    """
+    Returns the permissions of the file `path`, or None if it doesn't exist.
+    """
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return None
+
+
+def _write_chunks(chunks: Iterator[bytes], f: IO[bytes]) -> int:
+    """
+    Writes `chunks` to the file `f` and returns the number of bytes written.
+    """
+    size = 0
+    for chunk in chunks:
+        f.write(chunk)
+        size += len(chunk)
+    return size
@@ -0,0 +1,209 @@
+"""
+A journal of the uploads of `OsmApi.changeset_upload_bulk`.
+
+With `changeset_upload_bulk(..., journal="import.journal")` every part of a
+bulk upload is recorded in an append-only file of JSON lines, before it is
+uploaded (`"started"`, with the changeset it goes to) and after it has been
+applied (`"done"`, with the ids and versions the API assigned). Each entry
+holds a SHA-256 hash of the part, so a journal can only be resumed with the
+same changes.
+
+Running the same bulk upload again with the same journal resumes it (pass
+the changes as they were before the first run, e.g. read from the same
+source again: the upload assigns the ids to the dicts it is given): the
+parts that are done are not uploaded again, their ids and versions are taken
+from the journal. A part that was started but not recorded as done (the
+process died during the upload, or the response was lost) is reconciled
+with `changeset_download` of its changeset: an upload is applied completely
+or not at all, so if the changeset holds the elements of the part, their ids
+are taken from it, otherwise the part is uploaded again. Either way no
+element is created twice.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterator
+from typing import Any
+
+from . import errors
+
+DiffEntry = tuple[str, int, int | None, int | None]
+"""`(type, old_id, new_id, new_version)`, as `parser.iter_diff_result`"""
+
+
+class UploadJournal:
+    """
+    The journal in the file `path`, see the module documentation. The file
+    is created by the first entry.
+
+    `started` and `done` hold the last entry of each part with that status,
+    by the number of the part.
+    """
+
+    def __init__(self, path: "str | os.PathLike[str]") -> None:
+        self.path = path
+        self.started: dict[int, dict[str, Any]] = {}
+        self.done: dict[int, dict[str, Any]] = {}
+        for entry in self._read():
+            if entry["status"] == "started":
+                self.started[entry["part"]] = entry
+            else:
+                self.done[entry["part"]] = entry
+
+    def _read(self) -> Iterator[dict[str, Any]]:
+        """
+        Yields the entries of the journal. A last line that was not written
+        completely (the process died while writing it) is ignored.
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        for number, line in enumerate(lines, 1):
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                if number < len(lines):
+                    raise errors.UploadJournalError(
+                        f"Line {number} of the journal {self.path} is invalid"
+                    ) from e
+
+    def check(self, part: int, payload_hash: str) -> None:
+        """
+        Checks that part `part` of the journal is the part with the hash
+        `payload_hash`, if it is in the journal.
+
+        If it is not, `OsmApi.UploadJournalError` is raised.
+        """
+        entry = self.done.get(part) or self.started.get(part)
+        if entry is not None and entry["hash"] != payload_hash:
+            raise errors.UploadJournalError(
+                f"Part {part} differs from the one in the journal {self.path}, "
+                "it belongs to other changes"
+            )
+
+    def start(self, part: int, payload_hash: str, changeset_id: int) -> None:
+        """
+        Records that part `part` is about to be uploaded to the changeset
+        `changeset_id`.
+        """
+        entry = {
+            "status": "started",
+            "part": part,
+            "hash": payload_hash,
+            "changeset": changeset_id,
+        }
+        self._append(entry)
+        self.started[part] = entry
+
+    def finish(
+        self,
+        part: int,
+        payload_hash: str,
+        changeset_id: int,
+        diff: list[DiffEntry],
+    ) -> None:
+        """
+        Records that part `part` has been applied in the changeset
+        `changeset_id`, with the ids and versions of `diff`.
+        """
+        entry = {
+            "status": "done",
+            "part": part,
+            "hash": payload_hash,
+            "changeset": changeset_id,
+            "diff": diff,
+        }
+        self._append(entry)
+        self.done[part] = entry
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(f"{line}\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def payload_hash(changes_data: list[dict[str, Any]]) -> str:
+    """
+    Returns the SHA-256 hash (hex) of the changes `changes_data`.
+    """
+    payload = json.dumps(changes_data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_entries(
+    changes_data: list[dict[str, Any]], old_ids: list[int]
+) -> list[DiffEntry]:
+    """
+    Returns the diff entries of the uploaded `changes_data`, whose elements
+    had the ids `old_ids` (in order) before the upload.
+    """
+    entries: list[DiffEntry] = []
+    old = iter(old_ids)
+    for change in changes_data:
+        deleted = change["action"] == "delete"
+        for element in change["data"]:
+            old_id = next(old)
+            if deleted:
+                entries.append((change["type"], old_id, None, None))
+            else:
+                entries.append(
+                    (change["type"], old_id, element["id"], element["version"])
+                )
+    return entries
+
+
+def reconcile(
+    changes_data: list[dict[str, Any]], downloaded: list[dict[str, Any]]
+) -> list[DiffEntry] | None:
+    """
+    Returns the diff entries of the upload of `changes_data`, taken from the
+    changes `downloaded` (as `OsmApi.changeset_download` returns them) of the
+    changeset it was uploaded to, or `None` if the changeset is empty, i.e.
+    the upload was not applied.
+
+    The created elements are matched to their placeholders by type and
+    order, the API assigns the ids in the order of the upload.
+
+    If the changeset does not hold the elements of `changes_data`,
+    `OsmApi.UploadJournalError` is raised.
+    """
+    if not downloaded:
+        return None
+    created: dict[str, list[dict[str, Any]]] = {}
+    versions: dict[tuple[str, int], int] = {}
+    for record in downloaded:
+        element = record["data"]
+        if record["action"] == "create":
+            created.setdefault(record["type"], []).append(element)
+        versions[(record["type"], element["id"])] = element["version"]
+    new = {t: iter(sorted(e, key=lambda e: e["id"])) for t, e in created.items()}
+
+    entries: list[DiffEntry] = []
+    for change in changes_data:
+        osm_type = change["type"]
+        for element in change["data"]:
+            old_id = element.get("id", 0)
+            if change["action"] == "delete":
+                entries.append((osm_type, old_id, None, None))
+                continue
+            if change["action"] == "create":
+                match = next(new.get(osm_type, iter(())), None)
+                if match is None:
+                    raise errors.UploadJournalError(
+                        f"The changeset created fewer {osm_type}s than the "
+                        "part of the upload, it can't be reconciled"
+                    )
+                entries.append((osm_type, old_id, match["id"], match["version"]))
+                continue
+            version = versions.get((osm_type, old_id))
+            if version is None:
+                raise errors.UploadJournalError(
+                    f"The changeset does not modify {osm_type} {old_id}, "
+                    "it can't be reconciled"
+                )
+            entries.append((osm_type, old_id, old_id, version))
+    return entries
@@ -2,10 +2,10 @@
 Node operations for the OpenStreetMap API.
 """
 
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
+from collections.abc import Iterable, Iterator
+from typing import Any, TYPE_CHECKING
 
-from . import dom
+from . import columns, parser
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
@@ -43,14 +43,7 @@ class NodeMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/node/{node_id}"
-        if node_version != -1:
-            uri += f"/{node_version}"
-        data = self._session._get(uri)
-        node_element = cast(
-            Element, dom.OsmResponseToDom(data, tag="node", single=True)
-        )
-        return dom.dom_parse_node(node_element)
+        return self._element_get("node", node_id, node_version)
 
     def node_create(self: "OsmApi", node_data: dict[str, Any]) -> dict[str, Any] | None:
         """
@@ -187,14 +180,7 @@ class NodeMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/node/{node_id}/history"
-        data = self._session._get(uri)
-        node_list = cast(list[Element], dom.OsmResponseToDom(data, tag="node"))
-        result = {}
-        for node in node_list:
-            node_data = dom.dom_parse_node(node)
-            result[node_data["version"]] = node_data
-        return result
+        return self._element_history("node", node_id)
 
     def node_ways(self: "OsmApi", node_id: int) -> list[dict[str, Any]]:
         """
@@ -219,12 +205,7 @@ class NodeMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/node/{node_id}/ways"
-        data = self._session._get(uri)
-        way_list = cast(
-            list[Element], dom.OsmResponseToDom(data, tag="way", allow_empty=True)
-        )
-        return [dom.dom_parse_way(way) for way in way_list]
+        return self._elements(f"/api/0.6/node/{node_id}/ways", "way")
 
     def node_relations(self: "OsmApi", node_id: int) -> list[dict[str, Any]]:
         """
@@ -256,14 +237,11 @@ class NodeMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/node/{node_id}/relations"
-        data = self._session._get(uri)
-        relation_list = cast(
-            list[Element], dom.OsmResponseToDom(data, tag="relation", allow_empty=True)
-        )
-        return [dom.dom_parse_relation(rel) for rel in relation_list]
-
-    def nodes_get(self: "OsmApi", node_id_list: list[int]) -> dict[int, dict[str, Any]]:
+        return self._elements(f"/api/0.6/node/{node_id}/relations", "relation")
+
+    def nodes_get(
+        self: "OsmApi", node_id_list: list[int], *, workers: int = 4
+    ) -> dict[int, dict[str, Any]]:
         """
         Returns dict with id as key:
 
@@ -273,15 +251,50 @@ class NodeMixin:
                 ...
             }
 
+        A long `node_id_list` is split into batches of at most
+        `OsmApi.MULTI_FETCH_MAX_IDS` ids and URLs of at most
+        `OsmApi.MULTI_FETCH_MAX_URL_LENGTH` characters, which are fetched by
+        up to `workers` threads at the same time (sharing the session). Use
+        `iter_nodes_get` to process the batches as they arrive.
+
+        If the requested element can not be found,
+        `OsmApi.ElementNotFoundApiError` is raised.
+        """
+        return self._multi_get("node", node_id_list, workers)
+
+    def iter_nodes_get(
+        self: "OsmApi", node_id_list: list[int], *, workers: int = 4
+    ) -> Iterator[dict[int, dict[str, Any]]]:
+        """
+        Yields the nodes of each batch of `nodes_get` as a dict with id as
+        key, in the order in which the batches are completed:
+
+            #!python
+            for nodes in api.iter_nodes_get(node_ids, workers=8):
+                for node_id, node in nodes.items():
+                    print(node_id, node["lat"], node["lon"])
+
+        Closing the generator cancels the batches that have not been started.
+        """
+        return self._iter_multi_get("node", node_id_list, workers)
+
+    def nodes_get_columns(
+        self: "OsmApi",
+        node_id_list: list[int],
+        *,
+        tags: Iterable[str] = (),
+        use_numpy: bool | None = None,
+    ) -> columns.Columns:
+        """
+        Returns the nodes with the ids in `node_id_list` as columns, see
+        `osmapi.columns` and `map_columns`. The node columns are in the order
+        of the response, which is not necessarily the one of `node_id_list`.
+
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
         nodes = ",".join([str(x) for x in node_id_list])
-        uri = f"/api/0.6/nodes?nodes={nodes}"
-        data = self._session._get(uri)
-        node_list = cast(list[Element], dom.OsmResponseToDom(data, tag="node"))
-        result = {}
-        for node in node_list:
-            node_data = dom.dom_parse_node(node)
-            result[node_data["id"]] = node_data
-        return result
+        with self._session._get_stream(f"/api/0.6/nodes?nodes={nodes}") as body:
+            return parser.parse_osm_columns(
+                body, backend=self._parser_backend, tags=tags, use_numpy=use_numpy
+            )
@@ -2,10 +2,9 @@
 Note operations for the OpenStreetMap API.
 """
 
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
+from typing import Any, TYPE_CHECKING
 
-from . import dom, errors, parser
+from . import errors, parser
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
@@ -41,8 +40,8 @@ class NoteMixin:
             "limit": limit,
             "closed": closed,
         }
-        data = self._session._get(path, params=params)
-        return parser.parse_notes(data)
+        data = self._session._get(parser._read_uri(self, path), params=params)
+        return parser._parse_notes(self, data)
 
     def note_get(self: "OsmApi", note_id: int) -> dict[str, Any]:
         """
@@ -51,11 +50,8 @@ class NoteMixin:
         `note_id` is the unique identifier of the note.
         """
         uri = f"/api/0.6/notes/{note_id}"
-        data = self._session._get(uri)
-        note_element = cast(
-            Element, dom.OsmResponseToDom(data, tag="note", single=True)
-        )
-        return dom.dom_parse_note(note_element)
+        data = self._session._get(parser._read_uri(self, uri))
+        return parser._parse_note(self, data, format=self._format)
 
     def note_create(self: "OsmApi", note_data: dict[str, Any]) -> dict[str, Any]:
         """
@@ -135,8 +131,8 @@ class NoteMixin:
             "limit": limit,
             "closed": closed,
         }
-        data = self._session._get(uri, params=params)
-        return parser.parse_notes(data)
+        data = self._session._get(parser._read_uri(self, uri), params=params)
+        return parser._parse_notes(self, data)
 
     def _note_action(
         self: "OsmApi",
@@ -150,27 +146,26 @@ class NoteMixin:
 
         Return the updated note
         """
-        uri = path
-        final_params = params.copy() if params else {}
-        if comment is not None:
-            final_params["text"] = comment
         try:
             result = self._session._post(
-                uri,
+                path,
                 None,
                 optionalAuth=optional_auth,
-                params=final_params if final_params else None,
+                params=_note_params(comment, params),
             )
         except errors.ApiError as e:
-            if e.status == 409:
-                raise errors.NoteAlreadyClosedApiError(
-                    e.status, e.reason, e.payload
-                ) from e
-            else:
-                raise
-
-        # parse the result
-        note_element = cast(
-            Element, dom.OsmResponseToDom(result, tag="note", single=True)
-        )
-        return dom.dom_parse_note(note_element)
+            errors._raise_as(e, 409, errors.NoteAlreadyClosedApiError)
+        return parser._parse_note(self, result)
+
+
+def _note_params(
+    comment: str | None, params: dict[str, Any] | None
+) -> dict[str, Any] | None:
+    """
+    Returns the query parameters of a note action with `comment` and
+    `params`, or `None` if there are none.
+    """
+    final_params = params.copy() if params else {}
+    if comment is not None:
+        final_params["text"] = comment
+    return final_params or None
@@ -1,13 +1,30 @@
-import xml.dom.minidom
-import xml.parsers.expat
-from typing import Any, cast
-from xml.dom.minidom import Element
+import json
+import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable, Iterator
+from typing import IO, TYPE_CHECKING, Any, cast
 
-from . import errors
+from . import backends
+from . import columns
 from . import dom
+from . import elements
+from . import errors
+
+if TYPE_CHECKING:
+    from .OsmApi import OsmApi
+    from .aio import AsyncOsmApi
 
+CHUNK_SIZE = 64 * 1024
+"""Number of bytes the streaming parsers read and parse at once"""
 
-def parse_osm(data: bytes) -> list[dict[str, Any]]:
+
+def parse_osm(
+    data: bytes,
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> list[dict[str, Any]]:
     """
     Parse osm data.
 
@@ -18,27 +35,164 @@ def parse_osm(data: bytes) -> list[dict[str, Any]]:
             type: node|way|relation,
             data: {}
         }
+
+    `backend` is the parser backend to use (see `osmapi.backends`), by default
+    the fastest one available. `timestamps` is the decoding mode of the
+    timestamps, see `dom.timestamp_decoder`. With `result_type="objects"`
+    `data` is an `osmapi.elements` object instead of a dict.
+
+    Tag keys and values are interned, see `dom.TagTable`. With
+    `shared_tags=True` the elements with the same tags share one read-only
+    mapping instead of having a dict each.
+    """
+    return list(
+        iter_osm(
+            data,
+            backend=backend,
+            timestamps=timestamps,
+            result_type=result_type,
+            shared_tags=shared_tags,
+        )
+    )
+
+
+def iter_osm(
+    source: bytes | IO[bytes] | Iterable[bytes],
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """
+    Parse osm data incrementally.
+
+    `source` is either the response as `bytes`, a binary file-like object
+    (e.g. an open file) or an iterable of chunks of bytes (e.g. a response body
+    that is still being downloaded). `backend`, `timestamps`, `result_type`
+    and `shared_tags` are the same as for `parse_osm`.
+
+    Yields the same dicts as `parse_osm`, one element at a time. Each element
+    is dropped from the parse tree as soon as it has been converted, so the
+    memory used does not grow with the size of the document, unless the
+    caller keeps the results.
+    """
+    elements.check_result_type(result_type)
+    tag_table = dom.TagTable(shared=shared_tags)
+    for _, elem in _iter_elements(source, "osm", 1, backend):
+        parse = _ETREE_PARSERS.get(elem.tag)
+        if parse:
+            data = parse(
+                elem,
+                timestamps=timestamps,
+                tag_table=tag_table,
+                result_type=result_type,
+            )
+            yield {"type": elem.tag, "data": data}
+
+
+def parse_osm_columns(
+    source: bytes | IO[bytes] | Iterable[bytes],
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    tags: Iterable[str] = (),
+    use_numpy: bool | None = None,
+) -> columns.Columns:
+    """
+    Parse osm data into columns, see `osmapi.columns`.
+
+    `source` and `backend` can be anything `iter_osm` accepts, the document is
+    parsed with the same bounded memory. Only the tags with the keys in `tags`
+    are collected. The columns are NumPy arrays if `use_numpy` is set, or if
+    it is `None` and NumPy is installed, `array.array` otherwise.
+    """
+    builder = columns.ColumnsBuilder(tags)
+    for _, elem in _iter_elements(source, "osm", 1, backend):
+        builder.add(elem)
+    return builder.build(use_numpy)
+
+
+_ETREE_PARSERS = {
+    "node": dom.etree_parse_node,
+    "way": dom.etree_parse_way,
+    "relation": dom.etree_parse_relation,
+}
+
+
+def _iter_elements(
+    source: bytes | IO[bytes] | Iterable[bytes],
+    root_tag: str,
+    depth: int,
+    backend: str | backends.ParserBackend | None = None,
+) -> Iterator[tuple[list[ET.Element], ET.Element]]:
+    """
+    Yields `(parents, element)` for every complete element `depth` levels
+    below the root element `root_tag` of `source`.
+
+    `source` is fed to the parser in chunks of `CHUNK_SIZE` bytes, and every
+    element is removed from its parent once the caller is done with it, so the
+    tree never holds more than the elements of the current chunk.
     """
+    parser_backend = backends.get_backend(backend)
+    pull_parser = parser_backend.pull_parser()
+    stack: list[ET.Element] = []
     try:
-        data_parsed = xml.dom.minidom.parseString(data)
-        data_parsed = data_parsed.getElementsByTagName("osm")[0]  # type: ignore[assignment]  # noqa: E501
-    except (xml.parsers.expat.ExpatError, IndexError) as e:
+        for chunk in _iter_chunks(source):
+            pull_parser.feed(chunk)
+            yield from _read_elements(pull_parser, stack, root_tag, depth)
+        pull_parser.close()
+        yield from _read_elements(pull_parser, stack, root_tag, depth)
+    except parser_backend.parse_errors as e:
         raise errors.XmlResponseInvalidError(
             f"The XML response from the OSM API is invalid: {e!r}"
         ) from e
 
-    result: list[dict[str, Any]] = []
-    for elem in data_parsed.childNodes:
-        if elem.nodeName == "node":
-            result.append({"type": elem.nodeName, "data": dom.dom_parse_node(elem)})  # type: ignore[arg-type]  # noqa: E501
-        elif elem.nodeName == "way":
-            result.append({"type": elem.nodeName, "data": dom.dom_parse_way(elem)})  # type: ignore[arg-type]  # noqa: E501
-        elif elem.nodeName == "relation":
-            result.append({"type": elem.nodeName, "data": dom.dom_parse_relation(elem)})  # type: ignore[arg-type]  # noqa: E501
-    return result
+
+def _read_elements(
+    pull_parser: Any, stack: list[ET.Element], root_tag: str, depth: int
+) -> Iterator[tuple[list[ET.Element], ET.Element]]:
+    """
+    Yields the complete elements at `depth` among the pending events of
+    `pull_parser`, `stack` holds the currently open elements.
+    """
+    events = cast(Iterator[tuple[str, ET.Element]], pull_parser.read_events())
+    for event, elem in events:
+        if event == "start":
+            if not stack and elem.tag != root_tag:
+                raise errors.XmlResponseInvalidError(
+                    "The XML response from the OSM API is invalid: "
+                    f"expected <{root_tag}>, got <{elem.tag}>"
+                )
+            stack.append(elem)
+            continue
+        stack.pop()
+        if len(stack) == depth:
+            yield stack, elem
+            stack[-1].remove(elem)
 
 
-def parse_osc(data: bytes) -> list[dict[str, Any]]:
+def _iter_chunks(source: bytes | IO[bytes] | Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Returns `source` as an iterator of chunks of bytes.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        view = memoryview(source)
+        return (
+            bytes(view[i : i + CHUNK_SIZE]) for i in range(0, len(view), CHUNK_SIZE)
+        )
+    if hasattr(source, "read"):
+        return iter(lambda: source.read(CHUNK_SIZE), b"")  # type: ignore[union-attr]  # noqa: E501
+    return iter(source)
+
+
+def parse_osc(
+    data: bytes,
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> list[dict[str, Any]]:
     """
     Parse osc data.
 
@@ -50,48 +204,81 @@ def parse_osc(data: bytes) -> list[dict[str, Any]]:
             action: create|delete|modify,
             data: {}
         }
+
+    `backend`, `timestamps`, `result_type` and `shared_tags` are the same as
+    for `parse_osm`.
     """
-    try:
-        data_parsed = xml.dom.minidom.parseString(data)
-        data_parsed = data_parsed.getElementsByTagName("osmChange")[0]  # type: ignore[assignment]  # noqa: E501
-    except (xml.parsers.expat.ExpatError, IndexError) as e:
-        raise errors.XmlResponseInvalidError(
-            f"The XML response from the OSM API is invalid: {e!r}"
-        ) from e
+    return list(
+        iter_osc(
+            data,
+            backend=backend,
+            timestamps=timestamps,
+            result_type=result_type,
+            shared_tags=shared_tags,
+        )
+    )
 
-    result: list[dict[str, Any]] = []
-    for action in data_parsed.childNodes:
-        if action.nodeName == "#text":
-            continue
-        for elem in action.childNodes:
-            if elem.nodeName == "node":
-                result.append(
-                    {
-                        "action": action.nodeName,
-                        "type": elem.nodeName,
-                        "data": dom.dom_parse_node(elem),  # type: ignore[arg-type]
-                    }
-                )
-            elif elem.nodeName == "way":
-                result.append(
-                    {
-                        "action": action.nodeName,
-                        "type": elem.nodeName,
-                        "data": dom.dom_parse_way(elem),  # type: ignore[arg-type]
-                    }
-                )
-            elif elem.nodeName == "relation":
-                result.append(
-                    {
-                        "action": action.nodeName,
-                        "type": elem.nodeName,
-                        "data": dom.dom_parse_relation(elem),  # type: ignore[arg-type]
-                    }
-                )
-    return result
+
+def iter_osc(
+    source: bytes | IO[bytes] | Iterable[bytes],
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> Iterator[dict[str, Any]]:
+    """
+    Parse osc data incrementally.
+
+    `source`, `backend`, `timestamps`, `result_type` and `shared_tags` can be
+    anything `iter_osm` accepts.
+    Yields the same dicts as `parse_osc`, one element at a time, with the same
+    bounded memory use as `iter_osm`.
+    """
+    elements.check_result_type(result_type)
+    tag_table = dom.TagTable(shared=shared_tags)
+    for parents, elem in _iter_elements(source, "osmChange", 2, backend):
+        parse = _ETREE_PARSERS.get(elem.tag)
+        if parse:
+            data = parse(
+                elem,
+                timestamps=timestamps,
+                tag_table=tag_table,
+                result_type=result_type,
+            )
+            yield {"action": parents[1].tag, "type": elem.tag, "data": data}
+
+
+def iter_diff_result(
+    source: bytes | IO[bytes] | Iterable[bytes],
+    backend: str | backends.ParserBackend | None = None,
+) -> Iterator[tuple[str, int, int | None, int | None]]:
+    """
+    Parse the `<diffResult>` of a changeset upload incrementally.
+
+    Yields `(type, old_id, new_id, new_version)` for every entry, in the
+    order of the document. `new_id` and `new_version` are `None` for a
+    deleted element. `source` and `backend` can be anything `iter_osm`
+    accepts.
+    """
+    for _, elem in _iter_elements(source, "diffResult", 1, backend):
+        attributes = elem.attrib
+        new_id = attributes.get("new_id")
+        new_version = attributes.get("new_version")
+        yield (
+            elem.tag,
+            int(attributes.get("old_id", 0)),
+            int(new_id) if new_id is not None else None,
+            int(new_version) if new_version is not None else None,
+        )
 
 
-def parse_notes(data: bytes) -> list[dict[str, Any]]:
+def parse_notes(
+    data: bytes,
+    backend: str | backends.ParserBackend | None = None,
+    *,
+    timestamps: str = "datetime",
+) -> list[dict[str, Any]]:
     """
     Parse notes data.
 
@@ -111,12 +298,335 @@ def parse_notes(data: bytes) -> list[dict[str, Any]]:
             },
             { ... }
         ]
+
+    `backend` and `timestamps` are the same as for `parse_osm`.
     """
-    noteElements = cast(
-        list[Element], dom.OsmResponseToDom(data, tag="note", allow_empty=True)
+    noteElements = dom.response_elements(
+        data, tag="note", allow_empty=True, backend=backend
     )
     result: list[dict[str, Any]] = []
     for noteElement in noteElements:
-        note = dom.dom_parse_note(noteElement)
+        note = dom.dom_parse_note(noteElement, timestamps=timestamps)
         result.append(note)
     return result
+
+
+def parse_osm_json(
+    data: bytes,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Parse osm data in the JSON format of the API (e.g. of `/map.json`).
+
+    Returns the same list of dict as `parse_osm` does for the XML format:
+
+        #!python
+        {
+            type: node|way|relation,
+            data: {}
+        }
+
+    `timestamps`, `result_type` and `shared_tags` are the same as for
+    `parse_osm`.
+    """
+    parse_date = dom.timestamp_decoder(timestamps)
+    convert = elements.result_converter(result_type)
+    tag_table = dom.TagTable(shared=shared_tags)
+    try:
+        return [
+            {
+                "type": element["type"],
+                "data": convert(
+                    element["type"],
+                    _json_parse_element(element, parse_date, tag_table),
+                ),
+            }
+            for element in json.loads(data)["elements"]
+            if element["type"] in ("node", "way", "relation")
+        ]
+    except (ValueError, KeyError, TypeError) as e:
+        raise errors.JsonResponseInvalidError(
+            f"The JSON response from the OSM API is invalid: {e!r}"
+        ) from e
+
+
+def parse_json_elements(
+    data: bytes,
+    osm_type: str,
+    allow_empty: bool = False,
+    *,
+    timestamps: str = "datetime",
+    result_type: str = "dicts",
+    shared_tags: bool = False,
+) -> list[Any]:
+    """
+    Returns the data of all elements of `osm_type` in a JSON response.
+
+    This is the JSON counterpart of `dom.OsmResponseToDom`: unless
+    `allow_empty` is set, `OsmApi.JsonResponseInvalidError` is raised if there
+    is no such element. `timestamps`, `result_type` and `shared_tags` are the
+    same as for `parse_osm`.
+    """
+    parsed = parse_osm_json(
+        data,
+        timestamps=timestamps,
+        result_type=result_type,
+        shared_tags=shared_tags,
+    )
+    result = [e["data"] for e in parsed if e["type"] == osm_type]
+    if not result and not allow_empty:
+        raise errors.JsonResponseInvalidError(
+            f"The JSON response from the OSM API is invalid: no {osm_type} found"
+        )
+    return result
+
+
+def parse_notes_json(
+    data: bytes, *, timestamps: str = "datetime"
+) -> list[dict[str, Any]]:
+    """
+    Parse notes data in the JSON (GeoJSON) format of the API.
+
+    Returns the same list of dict as `parse_notes` does for the XML format,
+    `timestamps` is the same as for `parse_osm_json`.
+    """
+    parse_date = dom.timestamp_decoder(timestamps)
+    try:
+        document = json.loads(data)
+        # a single note is a Feature, a list of notes a FeatureCollection
+        features = document.get("features", [document])
+        return [_json_parse_note(feature, parse_date) for feature in features]
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        raise errors.JsonResponseInvalidError(
+            f"The JSON response from the OSM API is invalid: {e!r}"
+        ) from e
+
+
+_JSON_RENAMED_KEYS = {"tags": "tag", "nodes": "nd", "members": "member"}
+
+
+def _json_parse_element(
+    element: dict[str, Any],
+    parse_date: Callable[[str | None], Any],
+    tag_table: dom.TagTable,
+) -> dict[str, Any]:
+    """
+    Returns the data dict of a JSON node, way or relation, in the same shape
+    as the one parsed from XML.
+
+    The JSON format leaves out what the XML format has as a default: `visible`
+    is only given for deleted elements and `tags` only if there are any. The
+    tags are built by `tag_table`.
+    """
+    result: dict[str, Any] = {"visible": True}
+    for k, v in element.items():
+        if k == "type":
+            continue
+        result[_JSON_RENAMED_KEYS.get(k, k)] = v
+    result["tag"] = tag_table.tags(element.get("tags", {}).items())
+    for k in ("lat", "lon"):
+        if k in result:
+            result[k] = float(result[k])
+    if "timestamp" in result:
+        result["timestamp"] = parse_date(result["timestamp"])
+    return result
+
+
+def _json_parse_note(
+    feature: dict[str, Any], parse_date: Callable[[str | None], Any]
+) -> dict[str, Any]:
+    """
+    Returns the note dict of a GeoJSON note feature, in the same shape as the
+    one parsed from XML (where e.g. the id and the uids are text).
+    """
+    lon, lat = feature["geometry"]["coordinates"]
+    properties = feature["properties"]
+    return {
+        "lon": float(lon),
+        "lat": float(lat),
+        "id": _json_text(properties.get("id")),
+        "status": _json_text(properties.get("status")),
+        "date_created": parse_date(properties.get("date_created")),
+        "date_closed": parse_date(properties.get("closed_at")),
+        "comments": [
+            {
+                "date": parse_date(comment.get("date")),
+                "action": _json_text(comment.get("action")),
+                "text": _json_text(comment.get("text")),
+                "html": _json_text(comment.get("html")),
+                "uid": _json_text(comment.get("uid")),
+                "user": _json_text(comment.get("user")),
+            }
+            for comment in properties.get("comments", [])
+        ],
+    }
+
+
+def _json_text(value: Any) -> str | None:
+    """
+    Returns `value` as the XML parser reads a text node: as a string, and
+    `None` if it is missing or empty.
+    """
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+# The element parsers of the reads of `OsmApi` and `AsyncOsmApi`
+_DOM_PARSERS = {
+    "node": dom.dom_parse_node,
+    "way": dom.dom_parse_way,
+    "relation": dom.dom_parse_relation,
+}
+
+
+def _read_uri(api: "OsmApi | AsyncOsmApi", uri: str) -> str:
+    """
+    Returns the URI of the read `uri` in the response format of `api`: with
+    `.json` appended to its path for the JSON format.
+    """
+    if api._format != "json":
+        return uri
+    path, _, query = uri.partition("?")
+    return f"{path}.json{'?' if query else ''}{query}"
+
+
+def _parse_elements(
+    api: "OsmApi | AsyncOsmApi",
+    data: bytes,
+    osm_type: str,
+    allow_empty: bool = False,
+) -> list[dict[str, Any]]:
+    """
+    Returns the elements of `osm_type` of the response `data` to a read of
+    `api` (see `_read_uri`) as dicts.
+    """
+    if api._format == "json":
+        return parse_json_elements(
+            data, osm_type, allow_empty=allow_empty, timestamps=api._timestamps
+        )
+    parse = _DOM_PARSERS[osm_type]
+    return [
+        parse(element, timestamps=api._timestamps)
+        for element in dom.response_elements(
+            data, tag=osm_type, allow_empty=allow_empty, backend=api._parser_backend
+        )
+    ]
+
+
+def _parse_osm_read(api: "OsmApi | AsyncOsmApi", data: bytes) -> list[dict[str, Any]]:
+    """
+    Returns the elements of the `<osm>` document `data`, the response to a
+    read of `api` (see `_read_uri`), as `parse_osm` does.
+    """
+    if api._format == "json":
+        return parse_osm_json(
+            data,
+            timestamps=api._timestamps,
+            result_type=api._result_type,
+            shared_tags=api._shared_tags,
+        )
+    return parse_osm(
+        data,
+        backend=api._parser_backend,
+        timestamps=api._timestamps,
+        result_type=api._result_type,
+        shared_tags=api._shared_tags,
+    )
+
+
+def _parse_osc_read(api: "OsmApi | AsyncOsmApi", data: bytes) -> list[dict[str, Any]]:
+    """
+    Returns the changes of the `<osmChange>` document `data`, the response
+    to a read of `api`, as `parse_osc` does.
+    """
+    return parse_osc(
+        data,
+        backend=api._parser_backend,
+        timestamps=api._timestamps,
+        result_type=api._result_type,
+        shared_tags=api._shared_tags,
+    )
+
+
+def _parse_capabilities(
+    api: "OsmApi | AsyncOsmApi", data: bytes
+) -> dict[str, dict[str, Any]]:
+    """
+    Returns the capabilities of the response `data` to
+    `/api/capabilities`, see `OsmApi.capabilities`.
+    """
+    api_element = dom.response_elements(data, tag="api", backend=api._parser_backend)[0]
+    result: dict[str, Any] = {}
+    for elem in api_element:
+        # lxml also returns comments and processing instructions
+        if not isinstance(elem.tag, str):
+            continue
+        result[elem.tag] = {}
+        for k, v in elem.attrib.items():
+            try:
+                result[elem.tag][k] = float(v)
+            except Exception:
+                result[elem.tag][k] = v
+    return result
+
+
+def _parse_changeset(
+    api: "OsmApi | AsyncOsmApi", data: bytes, include_discussion: bool = False
+) -> dict[str, Any]:
+    """
+    Returns the changeset of the response `data`, in the format of `api`.
+    """
+    changeset = dom.response_elements(
+        data, tag="changeset", backend=api._parser_backend
+    )[0]
+    return api._to_result(
+        "changeset",
+        dom.dom_parse_changeset(
+            changeset,
+            include_discussion=include_discussion,
+            timestamps=api._timestamps,
+        ),
+    )
+
+
+def _parse_changesets(
+    api: "OsmApi | AsyncOsmApi", data: bytes
+) -> dict[int, dict[str, Any]]:
+    """
+    Returns the changesets of the response `data` by id, in the format of
+    `api`.
+    """
+    result: dict[int, dict[str, Any]] = {}
+    for changeset in dom.response_elements(
+        data, tag="changeset", backend=api._parser_backend
+    ):
+        changeset_data = dom.dom_parse_changeset(changeset, timestamps=api._timestamps)
+        result[changeset_data["id"]] = api._to_result("changeset", changeset_data)
+    return result
+
+
+def _parse_notes(api: "OsmApi | AsyncOsmApi", data: bytes) -> list[dict[str, Any]]:
+    """
+    Returns the notes of the response `data` to a read of `api` (see
+    `_read_uri`).
+    """
+    if api._format == "json":
+        return parse_notes_json(data, timestamps=api._timestamps)
+    return parse_notes(data, backend=api._parser_backend, timestamps=api._timestamps)
+
+
+def _parse_note(
+    api: "OsmApi | AsyncOsmApi", data: bytes, format: str = "xml"
+) -> dict[str, Any]:
+    """
+    Returns the note of the response `data` in `format` (the responses to
+    the note actions are always XML).
+    """
+    if format == "json":
+        return parse_notes_json(data, timestamps=api._timestamps)[0]
+    note = dom.response_elements(data, tag="note", backend=api._parser_backend)[0]
+    return dom.dom_parse_note(note, timestamps=api._timestamps)
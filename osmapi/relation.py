@@ -4,10 +4,10 @@ Relation operations for the OpenStreetMap API.
 This module provides pythonic (snake_case) methods for working with OSM relations.
 """
 
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
+from collections.abc import Iterator
+from typing import Any, TYPE_CHECKING
 
-from . import dom, parser
+from . import elements
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
@@ -31,14 +31,7 @@ class RelationMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/relation/{relation_id}"
-        if relation_version != -1:
-            uri += f"/{relation_version}"
-        data = self._session._get(uri)
-        relation = cast(
-            Element, dom.OsmResponseToDom(data, tag="relation", single=True)
-        )
-        return dom.dom_parse_relation(relation)
+        return self._element_get("relation", relation_id, relation_version)
 
     def relation_create(
         self: "OsmApi", relation_data: dict[str, Any]
@@ -101,14 +94,7 @@ class RelationMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/relation/{relation_id}/history"
-        data = self._session._get(uri)
-        relations = cast(list[Element], dom.OsmResponseToDom(data, tag="relation"))
-        result: dict[int, dict[str, Any]] = {}
-        for relation in relations:
-            relation_data = dom.dom_parse_relation(relation)
-            result[relation_data["version"]] = relation_data
-        return result
+        return self._element_history("relation", relation_id)
 
     def relation_relations(self: "OsmApi", relation_id: int) -> list[dict[str, Any]]:
         """
@@ -118,15 +104,7 @@ class RelationMixin:
         `OsmApi.ElementNotFoundApiError` is raised.
         """
         uri = f"/api/0.6/relation/{relation_id}/relations"
-        data = self._session._get(uri)
-        relations = cast(
-            list[Element], dom.OsmResponseToDom(data, tag="relation", allow_empty=True)
-        )
-        result: list[dict[str, Any]] = []
-        for relation in relations:
-            relation_data = dom.dom_parse_relation(relation)
-            result.append(relation_data)
-        return result
+        return self._elements(uri, "relation")
 
     def relation_full_recur(self: "OsmApi", relation_id: int) -> list[dict[str, Any]]:
         """
@@ -153,9 +131,14 @@ class RelationMixin:
             for item in temp:
                 if item["type"] != "relation":
                     continue
-                if item["data"]["id"] in done:
+                relation = item["data"]
+                if isinstance(relation, elements.Relation):
+                    child_id = relation.id
+                else:
+                    child_id = relation["id"]
+                if child_id in done:
                     continue
-                todo.append(item["data"]["id"])
+                todo.append(child_id)
             data += temp
         return data
 
@@ -171,26 +154,36 @@ class RelationMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/relation/{relation_id}/full"
-        data = self._session._get(uri)
-        return parser.parse_osm(data)
+        return self._get_osm(f"/api/0.6/relation/{relation_id}/full")
+
+    def relation_full_raw(self: "OsmApi", relation_id: int) -> bytes:
+        """
+        Returns the XML response of `relation_full` for relation `relation_id`
+        unparsed, as `bytes`. See `download_to` to store it in a file.
+
+        The errors are the same as for `relation_full`.
+        """
+        return self._session._get(self._raw_uri("relation_full", relation_id))
 
     def relations_get(
-        self: "OsmApi", relation_id_list: list[int]
+        self: "OsmApi", relation_id_list: list[int], *, workers: int = 4
     ) -> dict[int, dict[str, Any]]:
         """
         Returns dict with the id of the relation as a key
         for each relation in `relation_id_list`.
 
         `relation_id_list` is a list containing unique identifiers
-        for multiple relations.
-        """
-        relation_list = ",".join([str(x) for x in relation_id_list])
-        uri = f"/api/0.6/relations?relations={relation_list}"
-        data = self._session._get(uri)
-        relations = cast(list[Element], dom.OsmResponseToDom(data, tag="relation"))
-        result: dict[int, dict[str, Any]] = {}
-        for relation in relations:
-            relation_data = dom.dom_parse_relation(relation)
-            result[relation_data["id"]] = relation_data
-        return result
+        for multiple relations. It is fetched in batches by up to `workers`
+        threads, as in `nodes_get`.
+        """
+        return self._multi_get("relation", relation_id_list, workers)
+
+    def iter_relations_get(
+        self: "OsmApi", relation_id_list: list[int], *, workers: int = 4
+    ) -> Iterator[dict[int, dict[str, Any]]]:
+        """
+        Yields the relations of each batch of `relations_get` as a dict with
+        id as key, in the order in which the batches are completed, see
+        `iter_nodes_get`.
+        """
+        return self._iter_multi_get("relation", relation_id_list, workers)
@@ -4,10 +4,8 @@ Way operations for the OpenStreetMap API.
 This module provides pythonic (snake_case) methods for working with OSM ways.
 """
 
-from typing import Any, TYPE_CHECKING, cast
-from xml.dom.minidom import Element
-
-from . import dom, parser
+from collections.abc import Iterator
+from typing import Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
@@ -42,12 +40,7 @@ class WayMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/way/{way_id}"
-        if way_version != -1:
-            uri += f"/{way_version}"
-        data = self._session._get(uri)
-        way = cast(Element, dom.OsmResponseToDom(data, tag="way", single=True))
-        return dom.dom_parse_way(way)
+        return self._element_get("way", way_id, way_version)
 
     def way_create(self: "OsmApi", way_data: dict[str, Any]) -> dict[str, Any] | None:
         """
@@ -181,14 +174,7 @@ class WayMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/way/{way_id}/history"
-        data = self._session._get(uri)
-        ways = cast(list[Element], dom.OsmResponseToDom(data, tag="way"))
-        result: dict[int, dict[str, Any]] = {}
-        for way in ways:
-            way_data = dom.dom_parse_way(way)
-            result[way_data["version"]] = way_data
-        return result
+        return self._element_history("way", way_id)
 
     def way_relations(self: "OsmApi", way_id: int) -> list[dict[str, Any]]:
         """
@@ -222,16 +208,7 @@ class WayMixin:
 
         The `way_id` is a unique identifier for a way.
         """
-        uri = f"/api/0.6/way/{way_id}/relations"
-        data = self._session._get(uri)
-        relations = cast(
-            list[Element], dom.OsmResponseToDom(data, tag="relation", allow_empty=True)
-        )
-        result: list[dict[str, Any]] = []
-        for relation in relations:
-            relation_data = dom.dom_parse_relation(relation)
-            result.append(relation_data)
-        return result
+        return self._elements(f"/api/0.6/way/{way_id}/relations", "relation")
 
     def way_full(self: "OsmApi", way_id: int) -> list[dict[str, Any]]:
         """
@@ -254,11 +231,20 @@ class WayMixin:
         If the requested element can not be found,
         `OsmApi.ElementNotFoundApiError` is raised.
         """
-        uri = f"/api/0.6/way/{way_id}/full"
-        data = self._session._get(uri)
-        return parser.parse_osm(data)
+        return self._get_osm(f"/api/0.6/way/{way_id}/full")
+
+    def way_full_raw(self: "OsmApi", way_id: int) -> bytes:
+        """
+        Returns the XML response of `way_full` for way `way_id` unparsed, as
+        `bytes`. See `download_to` to store it in a file.
+
+        The errors are the same as for `way_full`.
+        """
+        return self._session._get(self._raw_uri("way_full", way_id))
 
-    def ways_get(self: "OsmApi", way_id_list: list[int]) -> dict[int, dict[str, Any]]:
+    def ways_get(
+        self: "OsmApi", way_id_list: list[int], *, workers: int = 4
+    ) -> dict[int, dict[str, Any]]:
         """
         Returns dict with the id of the way as a key for
         each way in `way_id_list`:
@@ -271,13 +257,15 @@ class WayMixin:
             }
 
         `way_id_list` is a list containing unique identifiers for multiple ways.
+        It is fetched in batches by up to `workers` threads, as in `nodes_get`.
+        """
+        return self._multi_get("way", way_id_list, workers)
+
+    def iter_ways_get(
+        self: "OsmApi", way_id_list: list[int], *, workers: int = 4
+    ) -> Iterator[dict[int, dict[str, Any]]]:
+        """
+        Yields the ways of each batch of `ways_get` as a dict with id as key,
+        in the order in which the batches are completed, see `iter_nodes_get`.
         """
-        way_list = ",".join([str(x) for x in way_id_list])
-        uri = f"/api/0.6/ways?ways={way_list}"
-        data = self._session._get(uri)
-        ways = cast(list[Element], dom.OsmResponseToDom(data, tag="way"))
-        result: dict[int, dict[str, Any]] = {}
-        for way in ways:
-            way_data = dom.dom_parse_way(way)
-            result[way_data["id"]] = way_data
-        return result
+        return self._iter_multi_get("way", way_id_list, workers)
@@ -1,38 +1,74 @@
 """
 XML generation for requests to the OpenStreetMap API.
 
-The documents are assembled as `xml.etree.ElementTree` elements and
-serialized by `ElementTree.tostring`, so escaping is the standard library's
-job. Building them by hand used to miss everything but `& " < >`, which
-silently corrupted any tag value containing a newline or a tab: XML
-normalizes those to a space in an attribute value unless they are written as
-character references (see issue #216).
+The elements are written straight to a string by `_write_element`, compact
+(without indentation) and without building an `xml.etree.ElementTree` tree
+first; `pretty=True` builds the tree and indents it instead, for documents
+meant to be read by people. Both escape attribute values exactly like
+`ElementTree`: escaping only `& " < >` by hand used to silently corrupt any
+tag value containing a newline or a tab, XML normalizes those to a space in
+an attribute value unless they are written as character references (see
+issue #216).
+
+The `<osmChange>` document of `changeset_upload` is not built as a whole:
+`OsmChangeBody` serializes it element by element while it is being sent.
 """
 
 import xml.etree.ElementTree as ET
+from collections.abc import Iterable, Iterator
 from typing import Any, TYPE_CHECKING
 from xml.dom.minidom import Element
 
 if TYPE_CHECKING:
     from .OsmApi import OsmApi
+    from .aio import AsyncOsmApi
 
 _XML_PROLOG = '<?xml version="1.0" encoding="UTF-8"?>\n'
 
+CHUNK_SIZE = 64 * 1024
+"""Number of bytes `OsmChangeBody` collects before it passes them on"""
+
+_ELEMENT_TYPES = ("node", "way", "relation")
+
 
 def _xml_build(
     element_type: str,
     element_data: dict[str, Any],
     with_headers: bool = True,
     *,
-    data: "OsmApi",
+    data: "OsmApi | AsyncOsmApi",
+    pretty: bool = False,
 ) -> bytes:
     """
     Returns the XML document for a write of `element_data`.
 
     With `with_headers` the element is wrapped in an `<osm>` envelope and
     prefixed with the XML prolog, otherwise only the element itself is
-    returned — that is how `OsmApi._add_changeset_data` collects the parts of
-    an `<osmChange>` upload.
+    returned — that is how `OsmChangeBody` serializes the elements of an
+    `<osmChange>` upload.
+
+    The document is compact, with `pretty` it is indented with two spaces
+    per level.
+    """
+    if pretty:
+        return _xml_build_pretty(element_type, element_data, with_headers, data=data)
+    element = _write_element(element_type, element_data, data=data)
+    if with_headers:
+        osm = _start_tag("osm", {"version": "0.6", "generator": data._created_by})
+        element = f"{_XML_PROLOG}{osm}{element}</osm>"
+    return element.encode("utf-8")
+
+
+def _xml_build_pretty(
+    element_type: str,
+    element_data: dict[str, Any],
+    with_headers: bool,
+    *,
+    data: "OsmApi | AsyncOsmApi",
+) -> bytes:
+    """
+    Returns the indented XML document for a write of `element_data`, see
+    `_xml_build`.
     """
     root = _xml_element(element_type, element_data, data=data)
     prolog = ""
@@ -46,8 +82,72 @@ def _xml_build(
     return f"{prolog}{ET.tostring(root, encoding='unicode')}\n".encode("utf-8")
 
 
+def _write_element(
+    element_type: str, element_data: dict[str, Any], *, data: "OsmApi | AsyncOsmApi"
+) -> str:
+    """
+    Returns `element_data` as an element of type `element_type`, serialized
+    to the same string as `ElementTree.tostring` of `_xml_element` (without
+    building the element).
+    """
+    parts = [f"<{element_type}"]
+    for key in ("id", "lat", "lon", "version"):
+        if key in element_data:
+            parts.append(f' {key}="{_escape_attribute(str(element_data[key]))}"')
+    visible = _escape_attribute(str(element_data.get("visible", True)).lower())
+    parts.append(f' visible="{visible}"')
+    if element_type in _ELEMENT_TYPES:
+        parts.append(f' changeset="{data._current_changeset_id}"')
+    parts.append(">")
+    start = len(parts)
+    for k, v in element_data.get("tag", {}).items():
+        parts.append(f'<tag k="{_escape_attribute(k)}" v="{_escape_attribute(v)}" />')
+    for member in element_data.get("member", []):
+        parts.append(
+            f'<member type="{_escape_attribute(member["type"])}" '
+            f'ref="{_escape_attribute(str(member["ref"]))}" '
+            f'role="{_escape_attribute(member["role"])}" />'
+        )
+    for ref in element_data.get("nd", []):
+        parts.append(f'<nd ref="{_escape_attribute(str(ref))}" />')
+    if len(parts) == start:
+        parts[-1] = " />"
+    else:
+        parts.append(f"</{element_type}>")
+    return "".join(parts)
+
+
+def _escape_attribute(value: str) -> str:
+    """
+    Returns `value` escaped for an attribute value in double quotes, the
+    same way as `ElementTree` does it: besides `& < > "` the characters
+    `\\r`, `\\n` and `\\t` are written as character references, so that
+    they are not normalized to spaces by the parser (issue #216).
+    """
+    try:
+        if "&" in value:
+            value = value.replace("&", "&amp;")
+        if "<" in value:
+            value = value.replace("<", "&lt;")
+        if ">" in value:
+            value = value.replace(">", "&gt;")
+        if '"' in value:
+            value = value.replace('"', "&quot;")
+        if "\r" in value:
+            value = value.replace("\r", "&#13;")
+        if "\n" in value:
+            value = value.replace("\n", "&#10;")
+        if "\t" in value:
+            value = value.replace("\t", "&#09;")
+    except (TypeError, AttributeError):
+        raise TypeError(
+            f"cannot serialize {value!r} (type {type(value).__name__})"
+        ) from None
+    return value
+
+
 def _xml_element(
-    element_type: str, element_data: dict[str, Any], *, data: "OsmApi"
+    element_type: str, element_data: dict[str, Any], *, data: "OsmApi | AsyncOsmApi"
 ) -> ET.Element:
     """
     Returns `element_data` as an element of type `element_type`.
@@ -58,7 +158,7 @@ def _xml_element(
         if key in element_data
     }
     attributes["visible"] = str(element_data.get("visible", True)).lower()
-    if element_type in ("node", "way", "relation"):
+    if element_type in _ELEMENT_TYPES:
         attributes["changeset"] = str(data._current_changeset_id)
 
     element = ET.Element(element_type, attributes)
@@ -79,6 +179,86 @@ def _xml_element(
     return element
 
 
+class OsmChangeBody:
+    """
+    The `<osmChange>` document uploading `changes_data` (the list of
+    `{"type", "action", "data"}` dicts of `changeset_upload`), as an iterable
+    of chunks of bytes.
+
+    The elements are serialized one at a time while the chunks are consumed,
+    and passed on in chunks of about `chunk_size` bytes, so the document is
+    never held in memory as a whole. Passed as the body of a request,
+    `requests` sends it with chunked transfer encoding. Every iteration
+    starts over, so a retried request sends the whole document again.
+
+    The `changeset` of every element is set to the open changeset of `data`
+    as it is serialized. The document is compact, with `pretty` the elements
+    are indented and every element starts on a line of its own.
+    """
+
+    def __init__(
+        self,
+        changes_data: list[dict[str, Any]],
+        *,
+        data: "OsmApi | AsyncOsmApi",
+        chunk_size: int = CHUNK_SIZE,
+        pretty: bool = False,
+    ) -> None:
+        self._changes_data = changes_data
+        self._data = data
+        self._chunk_size = chunk_size
+        self._pretty = pretty
+
+    def __iter__(self) -> Iterator[bytes]:
+        return _coalesce(self._iter_parts(), self._chunk_size)
+
+    def _iter_parts(self) -> Iterator[bytes]:
+        data = self._data
+        osm_change = _start_tag(
+            "osmChange", {"version": "0.6", "generator": data._created_by}
+        )
+        pretty = self._pretty
+        newline = "\n" if pretty else ""
+        yield f"{_XML_PROLOG}{osm_change}{newline}".encode("utf-8")
+        for change in self._changes_data:
+            action = change["action"]
+            yield f"<{action}>{newline}".encode("utf-8")
+            for element in change["data"]:
+                element["changeset"] = data._current_changeset_id
+                yield _xml_build(
+                    change["type"], element, False, data=data, pretty=pretty
+                )
+            yield f"</{action}>{newline}".encode("utf-8")
+        yield b"</osmChange>"
+
+
+def _start_tag(tag: str, attributes: dict[str, str]) -> str:
+    """
+    Returns the start tag of an element `tag` with `attributes`, escaped by
+    `ElementTree` like the rest of the document.
+    """
+    empty = ET.tostring(ET.Element(tag, attributes), encoding="unicode")
+    return f"{empty.removesuffix(' />')}>"
+
+
+def _coalesce(parts: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """
+    Yields the bytes of `parts` joined into chunks of at least `chunk_size`
+    bytes (apart from the last one).
+    """
+    buffer: list[bytes] = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
 def _get_xml_value(dom_element: Element, tag: str) -> str | None:
     try:
         elem = dom_element.getElementsByTagName(tag)[0]
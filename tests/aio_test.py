@@ -0,0 +1,350 @@
+"""Tests for `AsyncOsmApi`, the asyncio client, against the local `ApiServer`."""
+
+import asyncio
+import gzip
+import logging
+import time
+
+import osmapi
+import pytest
+from osmapi import aio, http
+
+pytest.importorskip("httpx")
+
+DIFF_RESULT = (
+    '<diffResult version="0.6">'
+    '<node old_id="-1" new_id="1000" new_version="1"/>'
+    "</diffResult>"
+)
+
+
+def run(api, coroutine):
+    """Runs `coroutine(api)` and closes `api` afterwards."""
+
+    async def _run():
+        async with api:
+            return await coroutine(api)
+
+    return asyncio.run(_run())
+
+
+@pytest.fixture
+def async_api(api_server):
+    def _async_api(**kwargs):
+        return osmapi.AsyncOsmApi(api=api_server.url, **kwargs)
+
+    return _async_api
+
+
+@pytest.fixture
+def respond(api_server, file_content):
+    def _respond(method, path, filename, **kwargs):
+        api_server.respond(method, path, file_content(filename), **kwargs)
+
+    return _respond
+
+
+def test_node_get(async_api, respond, api_server):
+    respond("GET", "/api/0.6/node/123", "test_node_get.xml")
+
+    result = run(async_api(appid="test"), lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+    assert result["tag"]["name"] == "Berolina & Schule"
+    assert api_server.requests[0].headers["User-Agent"].startswith("test (osmapi/")
+
+
+def test_json_format(async_api, respond, api_server):
+    respond("GET", "/api/0.6/node/123.json", "test_node_get.json")
+
+    result = run(async_api(format="json"), lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+
+
+def test_concurrent_reads_share_connections(async_api, respond, api_server):
+    respond("GET", "/api/0.6/node/123", "test_node_get.xml")
+
+    async def read(api):
+        return await asyncio.gather(*(api.node_get(123) for _ in range(20)))
+
+    results = run(async_api(max_connections=3), read)
+
+    assert [result["id"] for result in results] == [123] * 20
+    assert len(api_server.requests) == 20
+    assert 1 <= len({request.client for request in api_server.requests}) <= 3
+
+
+def test_nodes_get_with_the_limits_of_an_instance(async_api, api_server):
+    def nodes(request):
+        ids = request.path.split("=")[1].split(",")
+        elements = "".join(
+            f'<node id="{i}" version="1" lat="1" lon="2" visible="true"/>' for i in ids
+        )
+        return f"<osm>{elements}</osm>"
+
+    for query in ("1,2", "3,4", "5"):
+        api_server.respond("GET", f"/api/0.6/nodes?nodes={query}", nodes)
+    api = async_api()
+    api.MULTI_FETCH_MAX_IDS = 2
+
+    result = run(api, lambda api: api.nodes_get([1, 2, 3, 4, 5]))
+
+    assert list(result) == [1, 2, 3, 4, 5]
+    assert sorted(request.path for request in api_server.requests) == [
+        "/api/0.6/nodes?nodes=1,2",
+        "/api/0.6/nodes?nodes=3,4",
+        "/api/0.6/nodes?nodes=5",
+    ]
+
+
+def test_relation_full_recur(async_api, respond):
+    for relation_id in (100, 200, 300):
+        respond(
+            "GET",
+            f"/api/0.6/relation/{relation_id}/full",
+            f"test_relation_full_recur_{relation_id}.xml",
+        )
+
+    result = run(async_api(), lambda api: api.relation_full_recur(100))
+
+    assert [(e["type"], e["data"]["id"]) for e in result] == [
+        ("node", 1),
+        ("way", 10),
+        ("relation", 200),
+        ("relation", 100),
+        ("node", 2),
+        ("relation", 300),
+        ("relation", 200),
+        ("node", 3),
+        ("relation", 300),
+    ]
+
+
+def test_capabilities(async_api, respond):
+    respond("GET", "/api/capabilities", "test_capabilities.xml")
+
+    result = run(async_api(), lambda api: api.capabilities())
+
+    assert result["changesets"]["maximum_elements"] == 50000.0
+
+
+def test_gzip_response(async_api, api_server, file_content):
+    api_server.respond(
+        "GET",
+        "/api/0.6/node/123",
+        gzip.compress(file_content("test_node_get.xml").encode("utf-8")),
+        headers={"Content-Encoding": "gzip"},
+    )
+
+    result = run(async_api(), lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+    assert "gzip" in api_server.requests[0].headers["Accept-Encoding"]
+
+
+def test_redirect_is_followed(async_api, respond, api_server):
+    respond("GET", "/api/0.6/node/123", "test_node_get.xml")
+    api_server.respond(
+        "GET", "/api/0.6/node/1", status=301, headers={"Location": "/api/0.6/node/123"}
+    )
+
+    result = run(async_api(), lambda api: api.node_get(1))
+
+    assert result["id"] == 123
+
+
+def test_ca_bundle_from_the_environment(monkeypatch):
+    monkeypatch.setenv("REQUESTS_CA_BUNDLE", "/nonexistent/ca.pem")
+
+    with pytest.raises(OSError):
+        osmapi.AsyncOsmApi(api="https://example.com")
+
+
+def test_reset_pool_replaces_the_client(async_api, api_server, file_content):
+    policy = http.RetryPolicy(backoff=0.01, reset_pool=True)
+    api = async_api(retry_policy=policy)
+    client = api._session._client
+    api_server.respond("GET", "/api/0.6/node/123", file_content("test_node_get.xml"))
+
+    async def broken(request, **kwargs):
+        raise aio.httpx.ConnectError("reset")
+
+    async def read(api):
+        # only the first client fails, the new one sends the retry
+        client.send = broken
+        return await api.node_get(123)
+
+    result = run(api, read)
+
+    assert result["id"] == 123
+    assert api._session._client is not client
+    assert client.is_closed
+
+
+def test_changeset_upload(async_api, api_server):
+    api_server.respond("PUT", "/api/0.6/changeset/create", "4444")
+    api_server.respond("POST", "/api/0.6/changeset/4444/upload", DIFF_RESULT)
+    api_server.respond("PUT", "/api/0.6/changeset/4444/close", "")
+    node = {"id": -1, "lat": 47.1, "lon": 8.5, "tag": {}}
+
+    async def upload(api):
+        async with api.changeset({"comment": "Import"}) as changeset_id:
+            await api.changeset_upload(
+                [{"type": "node", "action": "create", "data": [node]}]
+            )
+        return changeset_id, api._current_changeset_id
+
+    assert run(async_api(token="secret"), upload) == (4444, 0)
+    assert node["id"] == 1000
+    assert node["version"] == 1
+    upload_request = api_server.requests[1]
+    assert upload_request.headers["Authorization"] == "Bearer secret"
+    assert upload_request.headers["Transfer-Encoding"] == "chunked"
+    assert b'<node id="-1"' in upload_request.body
+
+
+def test_node_create(async_api, api_server):
+    api_server.respond("PUT", "/api/0.6/changeset/create", "4444")
+    api_server.respond("PUT", "/api/0.6/node/create", "9876")
+
+    async def create(api):
+        await api.changeset_create()
+        return await api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+
+    result = run(async_api(token="secret"), create)
+
+    assert result["id"] == 9876
+    assert result["changeset"] == 4444
+
+
+def test_write_without_token(async_api):
+    with pytest.raises(osmapi.AuthenticationMissingError):
+        run(async_api(), lambda api: api.changeset_create())
+
+
+def test_not_found(async_api, api_server):
+    with pytest.raises(osmapi.ElementNotFoundApiError) as execinfo:
+        run(async_api(), lambda api: api.node_get(1))
+
+    assert execinfo.value.status == 404
+
+
+def test_server_error_is_retried(async_api, api_server, file_content):
+    policy = http.RetryPolicy(backoff=0.01)
+    body = file_content("test_node_get.xml")
+
+    def fail_once(request):
+        api_server.respond("GET", "/api/0.6/node/123", body)
+        return "Internal error"
+
+    api_server.respond("GET", "/api/0.6/node/123", fail_once, status=500)
+
+    result = run(async_api(retry_policy=policy), lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+    assert len(api_server.requests) == 2
+
+
+def test_retry_after(async_api, api_server, file_content, monkeypatch):
+    waits = []
+
+    async def sleep(self, seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(aio.AsyncOsmApiSession, "_sleep", sleep)
+    body = file_content("test_node_get.xml")
+
+    def busy_once(request):
+        api_server.respond("GET", "/api/0.6/node/123", body)
+        return "Too many requests"
+
+    api_server.respond(
+        "GET", "/api/0.6/node/123", busy_once, status=429, headers={"Retry-After": "3"}
+    )
+
+    result = run(async_api(), lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+    assert waits == [3.0]
+
+
+def test_unexpected_error_is_retried(async_api, api_server, file_content):
+    policy = http.RetryPolicy(backoff=0.01)
+    api = async_api(retry_policy=policy)
+    api_server.respond("GET", "/api/0.6/node/123", file_content("test_node_get.xml"))
+    send = api._session._client.send
+    calls = []
+
+    async def fail_once(request, **kwargs):
+        calls.append(request)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return await send(request, **kwargs)
+
+    api._session._client.send = fail_once
+
+    result = run(api, lambda api: api.node_get(123))
+
+    assert result["id"] == 123
+    assert len(calls) == 2
+
+
+def test_unexpected_error_gives_up_as_maximum_retry_limit(async_api):
+    policy = http.RetryPolicy(max_attempts=3, backoff=0.01)
+    api = async_api(retry_policy=policy)
+
+    async def broken(request, **kwargs):
+        raise RuntimeError("unexpected")
+
+    api._session._client.send = broken
+
+    with pytest.raises(
+        osmapi.MaximumRetryLimitReachedError, match="Give up after 3 retries"
+    ) as execinfo:
+        run(api, lambda api: api.node_get(123))
+
+    assert isinstance(execinfo.value.__cause__, RuntimeError)
+
+
+def test_connection_error():
+    policy = http.RetryPolicy(backoff=0.01)
+    api = osmapi.AsyncOsmApi(api="http://127.0.0.1:9", retry_policy=policy)
+
+    with pytest.raises(osmapi.ConnectionApiError) as execinfo:
+        run(api, lambda api: api.node_get(1))
+
+    assert isinstance(execinfo.value.__cause__, aio.httpx.TransportError)
+
+
+def test_failed_modify_is_logged(async_api, api_server, caplog):
+    api_server.respond("PUT", "/api/0.6/changeset/create", "4444")
+    api_server.respond("PUT", "/api/0.6/node/1", "Version mismatch", status=409)
+    node = {"id": 1, "version": 1, "lat": 47.1, "lon": 8.5, "tag": {}}
+
+    async def update(api):
+        await api.changeset_create()
+        return await api.node_update(node)
+
+    with caplog.at_level(logging.ERROR, logger="osmapi.aio"):
+        with pytest.raises(osmapi.VersionMismatchApiError):
+            run(async_api(token="secret"), update)
+
+    assert [(r.levelname, r.name) for r in caplog.records] == [("ERROR", "osmapi.aio")]
+
+
+def test_timeout(async_api, api_server):
+    def hang(request):
+        time.sleep(0.5)
+        return ""
+
+    api_server.respond("GET", "/api/0.6/node/1", hang)
+    policy = http.RetryPolicy(max_attempts=1)
+
+    with pytest.raises(osmapi.TimeoutApiError):
+        run(async_api(timeout=0.05, retry_policy=policy), lambda api: api.node_get(1))
+
+
+def test_invalid_api():
+    with pytest.raises(ValueError):
+        osmapi.AsyncOsmApi(api="ftp://example.com")
@@ -0,0 +1,162 @@
+"""Tests for the XML parser backends in `osmapi.backends`."""
+
+import osmapi
+import pytest
+from osmapi import backends, dom, parser
+from responses import GET, POST, PUT
+
+from .conftest import API_BASE, authenticated_session
+
+try:
+    import lxml  # noqa: F401
+
+    HAS_LXML = True
+except ImportError:  # pragma: no cover
+    HAS_LXML = False
+
+
+@pytest.fixture(params=backends.available_backends())
+def backend(request):
+    return request.param
+
+
+def test_available_backends_fastest_first():
+    available = backends.available_backends()
+
+    assert available[-1] == "etree"
+    assert ("lxml" in available) == HAS_LXML
+
+
+def test_get_backend_defaults_to_the_fastest():
+    assert backends.get_backend().name == backends.available_backends()[0]
+
+
+def test_get_backend_by_name(backend):
+    parser_backend = backends.get_backend(backend)
+
+    assert parser_backend.name == backend
+    assert backends.get_backend(backend) is parser_backend
+
+
+def test_get_backend_instance_is_returned_as_is():
+    parser_backend = backends.EtreeBackend()
+
+    assert backends.get_backend(parser_backend) is parser_backend
+
+
+def test_get_backend_unknown_name():
+    with pytest.raises(ValueError, match="Unknown parser backend 'sax'"):
+        backends.get_backend("sax")
+
+
+def test_lxml_backend_without_lxml(monkeypatch):
+    monkeypatch.setattr(backends, "lxml_etree", None)
+    monkeypatch.setattr(backends, "_instances", {})
+
+    assert backends.available_backends() == ["etree"]
+    with pytest.raises(ImportError, match="osmapi\\[lxml\\]"):
+        backends.get_backend("lxml")
+
+
+@pytest.mark.parametrize(
+    "filename", ["test_map.xml", "test_way_full.xml", "test_relation_full.xml"]
+)
+def test_parse_osm_is_the_same_for_all_backends(file_content, backend, filename):
+    data = file_content(filename).encode("utf-8")
+
+    assert parser.parse_osm(data, backend=backend) == parser.parse_osm(
+        data, backend="etree"
+    )
+
+
+def test_parse_osc_is_the_same_for_all_backends(file_content, backend):
+    data = file_content("test_changeset_download.xml").encode("utf-8")
+
+    assert parser.parse_osc(data, backend=backend) == parser.parse_osc(
+        data, backend="etree"
+    )
+
+
+def test_parse_notes_is_the_same_for_all_backends(file_content, backend):
+    data = file_content("test_notes_get.xml").encode("utf-8")
+
+    assert parser.parse_notes(data, backend=backend) == parser.parse_notes(
+        data, backend="etree"
+    )
+
+
+@pytest.mark.parametrize("data", [b"4444", b"<osm><node></osm>"])
+def test_invalid_response(backend, data):
+    with pytest.raises(osmapi.XmlResponseInvalidError):
+        parser.parse_osm(data, backend=backend)
+    with pytest.raises(osmapi.XmlResponseInvalidError):
+        dom.response_elements(data, tag="node", backend=backend)
+
+
+def test_response_root_wrong_root(backend):
+    with pytest.raises(
+        osmapi.XmlResponseInvalidError, match="expected <diffResult>, got <osm>"
+    ):
+        dom.response_root(b"<osm/>", "diffResult", backend=backend)
+
+
+def test_external_entities_are_not_resolved(backend):
+    data = (
+        b'<?xml version="1.0"?>'
+        b'<!DOCTYPE osm [<!ENTITY name SYSTEM "file:///etc/hostname">]>'
+        b'<osm><node id="1" lat="1" lon="2">'
+        b'<tag k="name" v="&name;"/>'
+        b"</node></osm>"
+    )
+
+    with pytest.raises(osmapi.XmlResponseInvalidError, match="external entity"):
+        parser.parse_osm(data, backend=backend)
+
+
+def test_osmapi_parser_backend(backend):
+    api = osmapi.OsmApi(api=API_BASE, parser_backend=backend)
+
+    assert api._parser_backend.name == backend
+
+
+def test_osmapi_parser_backend_unknown():
+    with pytest.raises(ValueError):
+        osmapi.OsmApi(api=API_BASE, parser_backend="sax")
+
+
+def test_node_get_with_backend(add_response, backend):
+    add_response(GET, "/node/123", filename="test_node_get.xml")
+    api = osmapi.OsmApi(api=API_BASE, parser_backend=backend)
+
+    result = api.node_get(123)
+
+    assert result["tag"] == {
+        "amenity": "school",
+        "foo": "bar",
+        "name": "Berolina & Schule",
+    }
+
+
+def test_changeset_upload_with_backend(add_response, backend):
+    add_response(PUT, "/changeset/create", body="4444")
+    add_response(
+        POST, "/changeset/4444/upload", filename="test_changeset_upload_create_node.xml"
+    )
+    api = osmapi.OsmApi(
+        api=API_BASE,
+        session=authenticated_session(),
+        parser_backend=backend,
+    )
+    changes = [
+        {
+            "type": "node",
+            "action": "create",
+            "data": [{"lat": 47.123, "lon": 8.555, "tag": {}}],
+        }
+    ]
+
+    api.changeset_create()
+    result = api.changeset_upload(changes)
+
+    assert result[0]["data"][0]["id"] > 0
+    assert result[0]["data"][0]["version"] == 1
@@ -0,0 +1,138 @@
+"""Tests for batched writes (`api.changeset(..., batch=True)`)."""
+
+import osmapi
+import pytest
+
+
+def test_writes_are_uploaded_at_the_end(auth_api, fake_api):
+    with auth_api.changeset({"comment": "Import"}, batch=True) as changeset_id:
+        node = auth_api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+        way = auth_api.way_create({"nd": [node["id"], 17], "tag": {}})
+        assert node["id"] == -1
+        assert way["id"] == -2
+        assert fake_api.uploads == []
+
+    assert changeset_id == 1
+    assert len(fake_api.uploads) == 1
+    assert [action.tag for action in fake_api.uploads[0]] == ["create", "create"]
+    assert node["id"] == 1000
+    assert node["version"] == 1
+    assert node["changeset"] == 1
+    assert way["id"] == 1001
+    assert fake_api.closed == [1]
+    assert auth_api._write_batch is None
+
+
+def test_writes_are_uploaded_in_batches(auth_api, fake_api):
+    with auth_api.changeset(batch=True, batch_size=2):
+        first = auth_api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+        second = auth_api.node_create({"lat": 47.2, "lon": 8.5, "tag": {}})
+        assert len(fake_api.uploads) == 1
+        assert first["id"] == 1000
+        way = auth_api.way_create({"nd": [-1, -2], "tag": {}})
+
+    assert [len(upload[0]) for upload in fake_api.uploads] == [2, 1]
+    nds = [nd.get("ref") for nd in fake_api.uploads[1].iter("nd")]
+    assert nds == ["1000", "1001"]
+    assert second["id"] == 1001
+    assert way["id"] == 1002
+
+
+def test_updates_and_deletes(auth_api, fake_api):
+    with auth_api.changeset(batch=True):
+        node = auth_api.node_update({"id": 7, "version": 3, "lat": 1, "lon": 2})
+        deleted = auth_api.relation_delete({"id": 8, "version": 2, "tag": {}})
+        created = auth_api.node_create({"id": -5, "lat": 1, "lon": 2, "tag": {}})
+
+    assert [action.tag for action in fake_api.uploads[0]] == [
+        "modify",
+        "delete",
+        "create",
+    ]
+    assert node["version"] == 4
+    assert deleted["visible"] is False
+    assert deleted["version"] == 3
+    assert created["id"] == 1000
+
+
+def test_deletes_return_the_same_as_without_batch(auth_api, fake_api):
+    with auth_api.changeset(batch=True) as changeset_id:
+        node = auth_api.node_delete({"id": 9, "version": 4, "lat": 1, "lon": 2})
+
+    # as `node_delete` returns it without a batch
+    assert node == {
+        "id": 9,
+        "version": 5,
+        "lat": 1,
+        "lon": 2,
+        "changeset": changeset_id,
+        "visible": False,
+    }
+
+
+def test_placeholders_after_the_ones_of_the_caller(auth_api, fake_api):
+    with auth_api.changeset(batch=True):
+        given = auth_api.node_create({"id": -1, "lat": 1, "lon": 2, "tag": {}})
+        automatic = auth_api.node_create({"lat": 3, "lon": 4, "tag": {}})
+        way = auth_api.way_create({"nd": [-1, automatic["id"]], "tag": {}})
+        assert automatic["id"] == -2
+        assert way["id"] == -3
+
+    upload = fake_api.uploads[0]
+    assert [node.get("id") for node in upload.iter("node")] == ["-1", "-2"]
+    assert [nd.get("ref") for nd in upload.iter("nd")] == ["-1", "-2"]
+    assert (given["id"], automatic["id"], way["id"]) == (1000, 1001, 1002)
+
+
+def test_placeholders_below_the_smallest_of_the_caller(auth_api, fake_api):
+    with auth_api.changeset(batch=True, batch_size=3):
+        auth_api.node_create({"lat": 1, "lon": 2, "tag": {}})
+        auth_api.node_create({"id": -7, "lat": 1, "lon": 2, "tag": {}})
+        auth_api.node_create({"id": -3, "lat": 1, "lon": 2, "tag": {}})
+        # also after the upload of the first three
+        node = auth_api.node_create({"lat": 3, "lon": 4, "tag": {}})
+        assert node["id"] == -8
+
+
+def test_flush_errors_are_the_ones_without_batch(auth_api, fake_api):
+    fake_api.failing_upload = 1
+
+    with pytest.raises(osmapi.VersionMismatchApiError):
+        with auth_api.changeset(batch=True):
+            auth_api.node_update({"id": 7, "version": 2, "lat": 1, "lon": 2})
+
+
+def test_changeset_flush(auth_api, fake_api):
+    with auth_api.changeset(batch=True):
+        node = auth_api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+        result = auth_api.changeset_flush()
+        assert node["id"] == 1000
+        assert result == [{"type": "node", "action": "create", "data": [node]}]
+        assert auth_api.changeset_flush() == []
+
+    assert len(fake_api.uploads) == 1
+
+
+def test_queued_writes_are_dropped_on_error(auth_api, fake_api):
+    with pytest.raises(RuntimeError):
+        with auth_api.changeset(batch=True):
+            auth_api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+            raise RuntimeError("stop")
+
+    assert fake_api.uploads == []
+    assert fake_api.closed == [1]
+    assert auth_api._write_batch is None
+
+
+def test_create_of_an_existing_element(auth_api, fake_api):
+    with pytest.raises(osmapi.OsmTypeAlreadyExistsError):
+        with auth_api.changeset(batch=True):
+            auth_api.node_create({"id": 7, "lat": 47.1, "lon": 8.5, "tag": {}})
+
+
+def test_writes_without_batch_are_sent_right_away(changeset_api, add_response):
+    add_response("PUT", "/node/create", body="4444")
+
+    node = changeset_api.node_create({"lat": 47.1, "lon": 8.5, "tag": {}})
+
+    assert node["id"] == 4444
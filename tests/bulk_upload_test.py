@@ -0,0 +1,114 @@
+"""Tests for `changeset_upload_bulk`, uploads split into several changesets."""
+
+import osmapi
+import pytest
+from responses import GET
+
+from .conftest import API_BASE
+
+
+def nodes(*ids):
+    return [{"id": i, "lat": 47.1, "lon": 8.5, "tag": {}, "version": 1} for i in ids]
+
+
+def test_upload_in_one_changeset(auth_api, fake_api, add_response):
+    add_response(
+        GET, url=f"{API_BASE}/api/capabilities", filename="test_capabilities.xml"
+    )
+    changes = [{"type": "node", "action": "create", "data": nodes(-1, -2)}]
+
+    ids = auth_api.changeset_upload_bulk(changes, {"comment": "Import"})
+
+    assert ids == {"node": {-1: 1000, -2: 1001}, "way": {}, "relation": {}}
+    assert fake_api.closed == [1]
+    assert auth_api._current_changeset_id == 0
+
+
+def test_upload_split_by_the_capabilities(auth_api, fake_api, mocked_responses):
+    mocked_responses.add(
+        GET,
+        f"{API_BASE}/api/capabilities",
+        body='<osm><api><changesets maximum_elements="2"/></api></osm>',
+    )
+    changes = [
+        {"type": "node", "action": "create", "data": nodes(-1, -2, -3)},
+        {"type": "node", "action": "modify", "data": nodes(7)},
+        {"type": "node", "action": "delete", "data": nodes(8)},
+    ]
+
+    ids = auth_api.changeset_upload_bulk(changes)
+
+    assert ids["node"] == {-1: 1000, -2: 1001, -3: 1002}
+    assert fake_api.closed == [1, 2, 3]
+    assert [[len(action) for action in upload] for upload in fake_api.uploads] == [
+        [2],
+        [1, 1],
+        [1],
+    ]
+    assert [e["id"] for e in changes[0]["data"]] == [1000, 1001, 1002]
+    capabilities = [
+        c for c in mocked_responses.calls if "capabilities" in c.request.url
+    ]
+    assert len(capabilities) == 1
+
+
+def test_references_to_earlier_parts_are_replaced(auth_api, fake_api):
+    changes = [
+        {"type": "node", "action": "create", "data": nodes(-1, -2)},
+        {"type": "way", "action": "create", "data": [{"id": -1, "nd": [-1, -2, 5]}]},
+        {
+            "type": "relation",
+            "action": "create",
+            "data": [
+                {
+                    "id": -1,
+                    "member": [
+                        {"type": "way", "ref": -1, "role": "outer"},
+                        {"type": "node", "ref": -2, "role": ""},
+                    ],
+                }
+            ],
+        },
+        {"type": "node", "action": "modify", "data": nodes(-1)},
+    ]
+
+    ids = auth_api.changeset_upload_bulk(changes, max_elements=2)
+
+    assert ids == {
+        "node": {-1: 1000, -2: 1001},
+        "way": {-1: 1002},
+        "relation": {-1: 1003},
+    }
+    way = fake_api.uploads[1][0][0]
+    assert [nd.get("ref") for nd in way.iter("nd")] == ["1000", "1001", "5"]
+    members = fake_api.uploads[1][1][0]
+    assert [m.get("ref") for m in members.iter("member")] == ["-1", "1001"]
+    assert fake_api.uploads[2][0][0].get("id") == "1000"
+
+
+def test_failed_upload_closes_its_changeset(auth_api, fake_api):
+    changes = [{"type": "node", "action": "create", "data": nodes(-1, -2, -3)}]
+    fake_api.failing_upload = 2
+
+    with pytest.raises(osmapi.ApiError) as excinfo:
+        auth_api.changeset_upload_bulk(changes, max_elements=2)
+
+    assert excinfo.value.status == 409
+    assert fake_api.closed == [1, 2]
+    assert auth_api._current_changeset_id == 0
+    assert [e["id"] for e in changes[0]["data"]] == [1000, 1001, -3]
+
+
+def test_changeset_already_open(auth_api):
+    auth_api._current_changeset_id = 42
+    changes = [{"type": "node", "action": "create", "data": nodes(-1)}]
+
+    with pytest.raises(osmapi.ChangesetAlreadyOpenError):
+        auth_api.changeset_upload_bulk(changes)
+
+
+def test_upload_without_authentication(api):
+    changes = [{"type": "node", "action": "create", "data": nodes(-1)}]
+
+    with pytest.raises(osmapi.AuthenticationMissingError):
+        api.changeset_upload_bulk(changes, max_elements=10)
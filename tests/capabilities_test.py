@@ -1,3 +1,5 @@
+import osmapi
+import pytest
 from responses import GET
 
 
@@ -58,3 +60,40 @@ def test_map_empty(api, add_response):
     result = api.map(8.765, 47.287, 8.7651, 47.2871)
 
     assert result == []
+
+
+def test_iter_map(api, add_response):
+    resp = add_response(GET, "/map", filename="test_map.xml")
+
+    result = list(api.iter_map(8.765, 47.287, 8.767, 47.289))
+
+    assert resp.calls[0].request.url == (
+        "http://api06.dev.openstreetmap.org/api/0.6/map"
+        "?bbox=8.765000,47.287000,8.767000,47.289000"
+    )
+    assert result == api.map(8.765, 47.287, 8.767, 47.289)
+
+
+def test_iter_map_is_lazy(api, add_response):
+    resp = add_response(GET, "/map", filename="test_map.xml")
+
+    result = api.iter_map(8.765, 47.287, 8.767, 47.289)
+
+    # nothing is requested before the iteration starts
+    assert len(resp.calls) == 0
+    assert next(result)["data"]["id"] == 11949
+    assert len(resp.calls) == 1
+    result.close()
+
+
+def test_iter_map_empty(api, add_response):
+    add_response(GET, "/map", filename="test_map_empty.xml")
+
+    assert list(api.iter_map(8.765, 47.287, 8.7651, 47.2871)) == []
+
+
+def test_iter_map_not_found(api, add_response):
+    add_response(GET, "/map", status=404, body="")
+
+    with pytest.raises(osmapi.ElementNotFoundApiError):
+        next(api.iter_map(8.765, 47.287, 8.767, 47.289))
@@ -560,6 +560,31 @@ def test_changeset_download(api, add_response):
     )
 
 
+def test_iter_changeset_download(api, add_response):
+    resp = add_response(
+        GET, "/changeset/23123/download", filename="test_changeset_download.xml"
+    )
+
+    result = api.iter_changeset_download(23123)
+
+    assert len(resp.calls) == 0
+    assert list(result) == api.changeset_download(23123)
+    assert resp.calls[0].request.url == (
+        "http://api06.dev.openstreetmap.org/api/0.6/changeset/23123/download"
+    )
+
+
+def test_iter_changeset_download_invalid_response(api, add_response):
+    add_response(
+        GET,
+        "/changeset/23123/download",
+        filename="test_changeset_download_invalid_response.xml",
+    )
+
+    with pytest.raises(osmapi.XmlResponseInvalidError):
+        list(api.iter_changeset_download(23123))
+
+
 def test_changeset_download_invalid_response(api, add_response):
     add_response(GET, "/changeset/23123/download")
     with pytest.raises(osmapi.XmlResponseInvalidError) as execinfo:
@@ -1107,3 +1132,31 @@ def test_changeset_close_server_error(auth_api, add_response):
     assert execinfo.value.status == 500
     # the changeset is still considered open, since closing it failed
     assert auth_api._current_changeset_id == 1414
+
+
+def test_changeset_upload_assigns_ids_of_later_changes(auth_api, add_response):
+    """Every change gets the ids of its own entries of the diffResult."""
+    add_response(PUT, "/changeset/create", body="4444")
+    add_response(
+        POST,
+        "/changeset/4444/upload",
+        body=(
+            "<diffResult>"
+            '<node old_id="-1" new_id="101" new_version="1"/>'
+            '<node old_id="17" new_id="17" new_version="4"/>'
+            '<way old_id="-1" new_id="201" new_version="1"/>'
+            "</diffResult>"
+        ),
+    )
+    changes = [
+        {"type": "node", "action": "create", "data": [{"id": -1, "lat": 1, "lon": 2}]},
+        {"type": "node", "action": "delete", "data": [{"id": 17, "version": 3}]},
+        {"type": "way", "action": "create", "data": [{"id": -1, "nd": [-1]}]},
+    ]
+
+    auth_api.changeset_create()
+    result = auth_api.changeset_upload(changes)
+
+    assert result[0]["data"][0]["id"] == 101
+    assert result[2]["data"][0]["id"] == 201
+    assert result[2]["data"][0]["version"] == 1
@@ -0,0 +1,135 @@
+"""Tests for the columnar results (`map_columns`, `nodes_get_columns`)."""
+
+import array
+
+import osmapi
+import pytest
+from osmapi import columns, parser
+from responses import GET
+
+from .conftest import API_BASE
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+
+def as_list(column):
+    return [int(x) for x in column]
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def use_numpy(request):
+    if request.param and numpy is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_parse_osm_columns_matches_parse_osm(file_content, use_numpy):
+    data = file_content("test_map.xml").encode("utf-8")
+    elements = parser.parse_osm(data)
+    nodes = [e["data"] for e in elements if e["type"] == "node"]
+    ways = [e["data"] for e in elements if e["type"] == "way"]
+    relations = [e["data"] for e in elements if e["type"] == "relation"]
+
+    result = parser.parse_osm_columns(data, use_numpy=use_numpy)
+
+    assert as_list(result.node_id) == [n["id"] for n in nodes]
+    assert as_list(result.node_version) == [n["version"] for n in nodes]
+    assert as_list(result.node_lat) == [round(n["lat"] * 10**7) for n in nodes]
+    assert as_list(result.node_lon) == [round(n["lon"] * 10**7) for n in nodes]
+    assert as_list(result.way_id) == [w["id"] for w in ways]
+    assert [as_list(result.way_nodes(i)) for i in range(len(ways))] == [
+        w["nd"] for w in ways
+    ]
+    assert as_list(result.way_offsets)[-1] == len(result.way_refs)
+    assert as_list(result.relation_id) == [r["id"] for r in relations]
+
+
+def test_parse_osm_columns_array_types(file_content):
+    data = file_content("test_map.xml").encode("utf-8")
+
+    result = parser.parse_osm_columns(data, use_numpy=False)
+
+    assert isinstance(result.node_id, array.array)
+    assert result.node_id.itemsize == 8
+    assert result.node_lat.itemsize == 4
+
+
+def test_parse_osm_columns_numpy_types(file_content):
+    if numpy is None:
+        pytest.skip("numpy is not installed")
+    data = file_content("test_map.xml").encode("utf-8")
+
+    result = parser.parse_osm_columns(data)
+
+    assert isinstance(result.node_id, numpy.ndarray)
+    assert result.node_id.dtype == numpy.int64
+    assert result.node_lat.dtype == numpy.int32
+    assert result.node_visible.dtype == bool
+
+
+def test_parse_osm_columns_without_numpy(file_content, monkeypatch):
+    monkeypatch.setattr(columns, "numpy", None)
+    data = file_content("test_map.xml").encode("utf-8")
+
+    assert isinstance(parser.parse_osm_columns(data).node_id, array.array)
+    with pytest.raises(ImportError):
+        parser.parse_osm_columns(data, use_numpy=True)
+
+
+def test_parse_osm_columns_tags():
+    data = (
+        b"<osm>"
+        b'<node id="1" version="1" lat="47.1" lon="8.1">'
+        b'<tag k="highway" v="crossing"/><tag k="name" v="A"/></node>'
+        b'<node id="2" version="1" lat="47.2" lon="8.2"/>'
+        b'<way id="3" version="2"><nd ref="1"/><nd ref="2"/>'
+        b'<tag k="highway" v="footway"/></way>'
+        b"</osm>"
+    )
+
+    result = parser.parse_osm_columns(data, tags=["highway", "name"])
+
+    assert result.node_tags == {"highway": ["crossing", None], "name": ["A", None]}
+    assert result.way_tags == {"highway": ["footway"], "name": [None]}
+    assert result.relation_tags == {"highway": [], "name": []}
+
+
+def test_parse_osm_columns_deleted_node():
+    data = b'<osm><node id="1" version="3" visible="false"/></osm>'
+
+    result = parser.parse_osm_columns(data, use_numpy=False)
+
+    assert as_list(result.node_visible) == [0]
+    assert as_list(result.node_lat) == [0]
+    assert as_list(result.node_lon) == [0]
+
+
+def test_map_columns(api, add_response):
+    resp = add_response(GET, "/map", filename="test_map.xml")
+
+    result = api.map_columns(8.765, 47.287, 8.767, 47.289, tags=["highway"])
+
+    assert resp.calls[0].request.params == {
+        "bbox": "8.765000,47.287000,8.767000,47.289000"
+    }
+    assert len(result.node_id) == len(result.node_tags["highway"])
+    assert len(result.way_offsets) == len(result.way_id) + 1
+
+
+def test_nodes_get_columns(api, add_response):
+    resp = add_response(GET, "/nodes", filename="test_nodes_get.xml")
+
+    result = api.nodes_get_columns([777, 176], use_numpy=False)
+
+    assert resp.calls[0].request.url == f"{API_BASE}/api/0.6/nodes?nodes=777,176"
+    assert sorted(as_list(result.node_id)) == [123, 345]
+
+
+def test_nodes_get_columns_not_found(api, add_response):
+    add_response(GET, "/nodes", status=404)
+
+    with pytest.raises(osmapi.ElementNotFoundApiError):
+        api.nodes_get_columns([1])
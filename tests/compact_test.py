@@ -0,0 +1,144 @@
+"""Tests for `compact_changes`, the net change of each element of an upload."""
+
+from osmapi.changeset import compact_changes
+
+
+def node(i, version=1, lat=47.1, **tags):
+    return {"id": i, "lat": lat, "lon": 8.5, "tag": tags, "version": version}
+
+
+def way(i, *nds, version=1):
+    return {"id": i, "nd": list(nds), "tag": {}, "version": version}
+
+
+def summary(changes_data):
+    return [
+        (
+            change["action"],
+            change["type"],
+            [(e["id"], e.get("version"), e.get("lat")) for e in change["data"]],
+        )
+        for change in changes_data
+    ]
+
+
+def test_create_and_modifies_are_one_create():
+    moved = node(-1, lat=47.3, amenity="bench")
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+        {"type": "node", "action": "modify", "data": [node(-1, lat=47.2)]},
+        {"type": "node", "action": "modify", "data": [moved]},
+    ]
+
+    result = compact_changes(changes)
+
+    assert summary(result) == [
+        ("create", "node", [(-1, 1, 47.3), (-2, 1, 47.1)]),
+        ("create", "way", [(-1, 1, None)]),
+    ]
+    assert result[0]["data"][0] is moved
+
+
+def test_modifies_are_one_modify_with_the_first_version():
+    changes = [
+        {"type": "node", "action": "modify", "data": [node(5, version=3)]},
+        {"type": "way", "action": "modify", "data": [way(6, 5)]},
+        {"type": "node", "action": "modify", "data": [node(5, 4, lat=47.2)]},
+    ]
+
+    assert summary(compact_changes(changes)) == [
+        ("modify", "way", [(6, 1, None)]),
+        ("modify", "node", [(5, 3, 47.2)]),
+    ]
+    assert changes[2]["data"][0]["version"] == 4
+
+
+def test_modify_and_delete_is_a_delete():
+    changes = [
+        {"type": "node", "action": "modify", "data": [node(5, version=3)]},
+        {"type": "node", "action": "delete", "data": [node(5, version=4)]},
+    ]
+
+    assert summary(compact_changes(changes)) == [
+        ("delete", "node", [(5, 3, 47.1)]),
+    ]
+
+
+def test_create_and_delete_is_left_out():
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+        {"type": "node", "action": "modify", "data": [node(-1, lat=47.2)]},
+        {"type": "node", "action": "delete", "data": [node(-1)]},
+    ]
+
+    assert summary(compact_changes(changes)) == [
+        ("create", "node", [(-2, 1, 47.1)]),
+    ]
+
+
+def test_changes_after_a_delete_are_kept():
+    changes = [
+        {"type": "node", "action": "delete", "data": [node(5)]},
+        {"type": "node", "action": "modify", "data": [node(5)]},
+    ]
+
+    assert summary(compact_changes(changes)) == summary(changes)
+
+
+def test_elements_without_id_are_kept():
+    changes = [
+        {"type": "node", "action": "create", "data": [{"lat": 1, "lon": 2}] * 2},
+    ]
+
+    assert len(compact_changes(changes)[0]["data"]) == 2
+
+
+def test_unchanged_modifies_are_left_out():
+    changes = [
+        {"type": "node", "action": "modify", "data": [node(5, amenity="bench")]},
+        {"type": "node", "action": "modify", "data": [node(6, lat=47.2)]},
+        {"type": "node", "action": "modify", "data": [node(7)]},
+        {"type": "way", "action": "modify", "data": [way(8, 5, 6)]},
+    ]
+    current = {
+        "node": {5: node(5, amenity="bench"), 6: node(6)},
+        "way": {8: way(8, 5, 6, version=2)},
+    }
+
+    assert summary(compact_changes(changes, current)) == [
+        ("modify", "node", [(6, 1, 47.2), (7, 1, 47.1)]),
+    ]
+
+
+def test_changeset_upload_compact(changeset_api, fake_api):
+    created = node(-1)
+    modified = node(-1, lat=47.2)
+    changes = [
+        {"type": "node", "action": "create", "data": [created, node(-2)]},
+        {"type": "node", "action": "modify", "data": [modified]},
+        {"type": "node", "action": "delete", "data": [node(-2)]},
+    ]
+
+    result = changeset_api.changeset_upload(changes, compact=True)
+
+    assert result is changes
+    assert len(fake_api.uploads[0].findall("*/node")) == 1
+    assert fake_api.uploads[0].find("create/node").get("lat") == "47.2"
+    assert created["id"] == modified["id"] == 1000
+    assert created["version"] == modified["version"] == 1
+
+
+def test_bulk_upload_compact(auth_api, fake_api):
+    changes = [
+        {"type": "way", "action": "modify", "data": [way(6, -1, version=2)]},
+        {"type": "node", "action": "create", "data": [node(-1)]},
+        {"type": "way", "action": "modify", "data": [way(6, -1, 7, version=3)]},
+    ]
+
+    ids = auth_api.changeset_upload_bulk(changes, max_elements=1, compact=True)
+
+    assert ids == {"node": {-1: 1000}, "way": {}, "relation": {}}
+    assert len(fake_api.uploads) == 2
+    assert fake_api.uploads[1].find("modify/way").get("version") == "2"
+    assert changes[2]["data"][0]["version"] == changes[0]["data"][0]["version"] == 3
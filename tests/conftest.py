@@ -3,10 +3,14 @@ import pytest
 import requests
 from unittest import mock
 import responses
+import itertools
 import os
 import re
+import xml.etree.ElementTree as ET
 import xmltodict
 
+from .server import ApiServer
+
 __location__ = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
 
 API_BASE = "http://api06.dev.openstreetmap.org"
@@ -52,6 +56,16 @@ def api():
     api.close()
 
 
+@pytest.fixture
+def json_api():
+    """An OsmApi reading elements and notes in the JSON format."""
+    api = osmapi.OsmApi(api=API_BASE, format="json")
+    api._session._sleep = mock.Mock()
+
+    yield api
+    api.close()
+
+
 @pytest.fixture
 def auth_api():
     api = osmapi.OsmApi(api=API_BASE, session=authenticated_session())
@@ -97,9 +111,22 @@ def prod_api():
     api.close()
 
 
+def read_streamed_body(response):
+    """Read a streamed request body (e.g. of an upload) as the server would.
+
+    `requests` sends an iterable body as it is iterated, `responses` doesn't
+    iterate it at all; join it when the request is answered, so that tests see
+    what was sent rather than what the elements look like afterwards.
+    """
+    request = response.request
+    if request.body is not None and not isinstance(request.body, (str, bytes)):
+        request.body = b"".join(request.body)
+    return response
+
+
 @pytest.fixture
 def mocked_responses():
-    with responses.RequestsMock() as rsps:
+    with responses.RequestsMock(response_callback=read_streamed_body) as rsps:
         yield rsps
 
 
@@ -164,12 +191,15 @@ def assert_request_xml(xml_dict):
     return _assert_request_xml
 
 
-def make_http_response(status=200, content="test response", reason="test reason"):
+def make_http_response(
+    status=200, content="test response", reason="test reason", headers=None
+):
     """Build a minimal stand-in for a `requests` response."""
     response = mock.Mock()
     response.status_code = status
     response.reason = reason
     response.content = content
+    response.headers = headers or {}
     return response
 
 
@@ -200,6 +230,7 @@ def mock_api():
         auth=True,
         responses=None,
         side_effect=None,
+        headers=None,
     ):
         session = mock.Mock()
         session.close = mock.Mock()
@@ -211,7 +242,7 @@ def mock_api():
             session.request = mock.Mock(side_effect=list(responses))
         else:
             session.request = mock.Mock(
-                return_value=make_http_response(status, content, reason)
+                return_value=make_http_response(status, content, reason, headers)
             )
 
         api = osmapi.OsmApi(api=API_BASE, session=session)
@@ -222,3 +253,131 @@ def mock_api():
     yield _mock_api
     for api in created:
         api.close()
+
+
+class FakeChangesetApi:
+    """Answers changeset requests like the API, assigning ids from 1000 on.
+
+    The changesets are numbered from 1, `uploads` holds the parsed
+    `<osmChange>` documents and `closed` the ids of the closed changesets. Set
+    `failing_upload` to the number of an upload to answer it with a 409, and
+    `lost_upload` to the number of an upload to apply it but answer with a
+    502 (as if the response got lost). An upload referring to a placeholder
+    id that it did not create before is answered with a 400, like the API
+    does. The download of a changeset returns what was applied in it.
+    """
+
+    def __init__(self, mocked_responses):
+        self.changesets = itertools.count(1)
+        self.ids = itertools.count(1000)
+        self.uploads = []
+        self.closed = []
+        self.failing_upload = None
+        self.lost_upload = None
+        self.applied = {}
+        # not every test makes every kind of request, they check `uploads`
+        # and `closed` instead
+        mocked_responses.assert_all_requests_are_fired = False
+        mocked_responses.add_callback(
+            responses.PUT, f"{API_BASE}/api/0.6/changeset/create", callback=self.create
+        )
+        mocked_responses.add_callback(
+            responses.PUT,
+            re.compile(rf"{API_BASE}/api/0.6/changeset/\d+/close"),
+            self.close,
+        )
+        mocked_responses.add_callback(
+            responses.POST,
+            re.compile(rf"{API_BASE}/api/0.6/changeset/\d+/upload"),
+            self.upload,
+        )
+        mocked_responses.add_callback(
+            responses.GET,
+            re.compile(rf"{API_BASE}/api/0.6/changeset/\d+/download"),
+            self.download,
+        )
+
+    def create(self, request):
+        return 200, {}, str(next(self.changesets))
+
+    def close(self, request):
+        self.closed.append(int(request.url.split("/")[-2]))
+        return 200, {}, ""
+
+    def upload(self, request):
+        root = ET.fromstring(b"".join(request.body))
+        self.uploads.append(root)
+        if len(self.uploads) == self.failing_upload:
+            return 409, {}, "Version mismatch: Provided 2, server had: 3"
+        diff = ET.Element("diffResult")
+        placeholders = set()
+        for action in root:
+            for element in action:
+                refs = [("node", nd.get("ref")) for nd in element.iter("nd")]
+                refs += [(m.get("type"), m.get("ref")) for m in element.iter("member")]
+                for ref in refs:
+                    if ref[1].startswith("-") and ref not in placeholders:
+                        return 400, {}, self._missing(*ref, element)
+                if action.tag == "create":
+                    placeholders.add((element.tag, element.get("id")))
+                attributes = {"old_id": element.get("id", "0")}
+                if action.tag == "create":
+                    attributes.update(new_id=str(next(self.ids)), new_version="1")
+                elif action.tag == "modify":
+                    version = int(element.get("version", 0)) + 1
+                    attributes.update(
+                        new_id=element.get("id"), new_version=str(version)
+                    )
+                ET.SubElement(diff, element.tag, attributes)
+        changeset_id = int(request.url.split("/")[-2])
+        self.applied[changeset_id] = _applied_change(root, diff)
+        if len(self.uploads) == self.lost_upload:
+            return 502, {}, "Bad Gateway"
+        return 200, {}, ET.tostring(diff)
+
+    def download(self, request):
+        changeset_id = int(request.url.split("/")[-2])
+        return (
+            200,
+            {},
+            ET.tostring(self.applied.get(changeset_id, ET.Element("osmChange"))),
+        )
+
+    def _missing(self, ref_type, ref_id, element):
+        return (
+            f"Placeholder {ref_type} not found for reference {ref_id} "
+            f"in {element.tag} {element.get('id')}"
+        )
+
+
+def _applied_change(upload, diff):
+    """Returns the `<osmChange>` of a changeset in which `upload` was applied."""
+    applied = ET.Element("osmChange")
+    entries = iter(diff)
+    for action in upload:
+        block = ET.SubElement(applied, action.tag)
+        for element in action:
+            entry = next(entries)
+            new = ET.SubElement(block, element.tag, dict(element.attrib))
+            new.extend(element)
+            if action.tag == "delete":
+                new.set("version", str(int(element.get("version", 0)) + 1))
+                new.set("visible", "false")
+            else:
+                new.set("id", entry.get("new_id"))
+                new.set("version", entry.get("new_version"))
+    return applied
+
+
+@pytest.fixture
+def fake_api(mocked_responses):
+    """A `FakeChangesetApi` answering the changeset requests."""
+    return FakeChangesetApi(mocked_responses)
+
+
+@pytest.fixture
+def api_server():
+    """A local `ApiServer`, for tests of what is actually sent on the wire."""
+    server = ApiServer().start()
+    yield server
+    server.stop()
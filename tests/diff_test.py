@@ -0,0 +1,137 @@
+"""Tests for `osmapi.diff`, the `<diffResult>` of a changeset upload."""
+
+import osmapi
+import pytest
+from osmapi import backends, diff, parser
+from responses import POST, PUT
+
+DIFF_RESULT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<diffResult version="0.6" generator="OpenStreetMap server">
+    <way old_id="-1" new_id="200" new_version="1"/>
+    <node old_id="-2" new_id="101" new_version="1"/>
+    <node old_id="-1" new_id="100" new_version="1"/>
+    <node old_id="7" new_id="7" new_version="3"/>
+    <relation old_id="676"/>
+</diffResult>
+"""
+
+
+def changes():
+    return [
+        {
+            "type": "node",
+            "action": "create",
+            "data": [
+                {"id": -1, "lat": 47.1, "lon": 8.5, "tag": {}},
+                {"id": -2, "lat": 47.2, "lon": 8.5, "tag": {}},
+            ],
+        },
+        {
+            "type": "way",
+            "action": "create",
+            "data": [{"id": -1, "nd": [-1, -2], "tag": {}}],
+        },
+        {
+            "type": "node",
+            "action": "modify",
+            "data": [{"id": 7, "version": 2, "lat": 47.3, "lon": 8.5, "tag": {}}],
+        },
+        {
+            "type": "relation",
+            "action": "delete",
+            "data": [{"id": 676, "version": 2, "member": [], "tag": {}}],
+        },
+    ]
+
+
+@pytest.mark.parametrize("backend", backends.available_backends())
+def test_iter_diff_result(backend):
+    entries = list(parser.iter_diff_result(DIFF_RESULT, backend=backend))
+
+    assert entries == [
+        ("way", -1, 200, 1),
+        ("node", -2, 101, 1),
+        ("node", -1, 100, 1),
+        ("node", 7, 7, 3),
+        ("relation", 676, None, None),
+    ]
+
+
+def test_iter_diff_result_from_chunks():
+    chunks = [DIFF_RESULT[i : i + 10] for i in range(0, len(DIFF_RESULT), 10)]
+
+    assert list(parser.iter_diff_result(chunks)) == list(
+        parser.iter_diff_result(DIFF_RESULT)
+    )
+
+
+@pytest.mark.parametrize("data", [b"4444", b"<osm/>"])
+def test_iter_diff_result_invalid(data):
+    with pytest.raises(osmapi.XmlResponseInvalidError):
+        list(parser.iter_diff_result(data))
+
+
+def test_apply_by_old_id():
+    changes_data = changes()
+
+    diff.DiffResult.parse(DIFF_RESULT).apply(changes_data)
+
+    nodes, ways, modified, deleted = (change["data"] for change in changes_data)
+    assert [(n["id"], n["version"]) for n in nodes] == [(100, 1), (101, 1)]
+    assert (ways[0]["id"], ways[0]["version"]) == (200, 1)
+    assert (modified[0]["id"], modified[0]["version"]) == (7, 3)
+    assert deleted[0] == {"id": 676, "member": [], "tag": {}}
+
+
+def test_elements_without_id_in_order():
+    diff_result = diff.DiffResult()
+    diff_result.add("node", 0, 10, 1)
+    diff_result.add("node", 0, 11, 1)
+    nodes = [{"lat": 1, "lon": 2}, {"lat": 3, "lon": 4}]
+
+    diff_result.apply([{"type": "node", "action": "create", "data": nodes}])
+
+    assert [node["id"] for node in nodes] == [10, 11]
+    assert len(diff_result) == 0
+
+
+def test_missing_entry():
+    diff_result = diff.DiffResult.parse(DIFF_RESULT)
+    changes_data = changes()
+    changes_data[0]["data"].append({"id": -3, "lat": 1, "lon": 2, "tag": {}})
+
+    with pytest.raises(osmapi.XmlResponseInvalidError, match='no <node old_id="-3">'):
+        diff_result.apply(changes_data)
+
+
+def test_changeset_upload_assigns_by_old_id(auth_api, add_response):
+    add_response(PUT, "/changeset/create", body="4444")
+    add_response(POST, "/changeset/4444/upload", body=DIFF_RESULT)
+    changes_data = changes()
+
+    auth_api.changeset_create()
+    result = auth_api.changeset_upload(changes_data)
+
+    assert [n["id"] for n in result[0]["data"]] == [100, 101]
+    assert result[1]["data"][0]["id"] == 200
+    assert result[2]["data"][0]["version"] == 3
+    assert "version" not in result[3]["data"][0]
+
+
+def test_changeset_upload_many_changes(auth_api, add_response):
+    # a change per element, e.g. from a batched changeset alternating types
+    changes_data = []
+    entries = []
+    for i in range(1, 2001):
+        osm_type = "node" if i % 2 else "way"
+        element = {"id": -i, "tag": {}, **({"lat": 1, "lon": 2} if i % 2 else {})}
+        changes_data.append({"type": osm_type, "action": "create", "data": [element]})
+        entries.append(f'<{osm_type} old_id="-{i}" new_id="{i}" new_version="1"/>')
+    body = "<diffResult>" + "".join(reversed(entries)) + "</diffResult>"
+    add_response(PUT, "/changeset/create", body="4444")
+    add_response(POST, "/changeset/4444/upload", body=body)
+
+    auth_api.changeset_create()
+    result = auth_api.changeset_upload(changes_data)
+
+    assert [change["data"][0]["id"] for change in result] == list(range(1, 2001))
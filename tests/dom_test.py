@@ -3,6 +3,7 @@ import logging
 from unittest import mock
 
 import osmapi
+import pytest
 
 
 def test_dom_get_attributes():
@@ -50,3 +51,83 @@ def test_parse_date_unparsable_value_is_returned_unchanged(caplog):
         ("DEBUG", "osmapi.dom", "None does not match %Y-%m-%d %H:%M:%S UTC"),
         ("DEBUG", "osmapi.dom", "None does not match %Y-%m-%dT%H:%M:%SZ"),
     ]
+
+
+@pytest.mark.parametrize(
+    "date_string",
+    [
+        "2021-02-25T09:49:33Z",
+        "2021-02-25 09:49:33 UTC",
+        "1970-01-01T00:00:00Z",
+        "2024-02-29 23:59:59 UTC",
+        "2021-02-30T09:49:33Z",
+        "2021-02-25T24:00:00Z",
+        "2021-02-25X09:49:33Z",
+        "2021-02-25T09:49:33",
+        "2021-02-25T09:49:33+00:00",
+        "2021-W08-4T09:49:33Z",
+        "2021-02-25T09:49:33.5Z",
+    ],
+)
+def test_parse_date_fast_path_matches_strptime(date_string):
+    expected = date_string
+    for date_format in ["%Y-%m-%d %H:%M:%S UTC", "%Y-%m-%dT%H:%M:%SZ"]:
+        try:
+            expected = datetime.datetime.strptime(date_string, date_format)
+        except ValueError:
+            pass
+
+    assert osmapi.dom._parse_date(date_string) == expected
+
+
+@pytest.mark.parametrize(
+    "timestamps,expected",
+    [
+        ("datetime", datetime.datetime(2021, 2, 25, 9, 49, 33)),
+        ("epoch", 1614246573),
+        ("raw", "2021-02-25T09:49:33Z"),
+        ("lazy", "2021-02-25T09:49:33Z"),
+    ],
+)
+def test_timestamp_decoder(timestamps, expected):
+    decode = osmapi.dom.timestamp_decoder(timestamps)
+
+    assert decode("2021-02-25T09:49:33Z") == expected
+    assert decode(None) is None
+
+
+def test_timestamp_decoder_unparsable_value_is_returned_unchanged():
+    for timestamps in ["datetime", "epoch", "raw"]:
+        decode = osmapi.dom.timestamp_decoder(timestamps)
+        assert decode("2021-02-25") == "2021-02-25"
+
+
+def test_timestamp_decoder_unknown_mode():
+    with pytest.raises(ValueError, match="timestamps must be one of"):
+        osmapi.dom.timestamp_decoder("iso")
+    with pytest.raises(ValueError, match="timestamps must be one of"):
+        osmapi.dom._parse_attributes([("timestamp", "x")], "iso")
+
+
+def test_lazy_timestamp():
+    timestamp = osmapi.dom.timestamp_decoder("lazy")("2021-02-25 09:49:33 UTC")
+
+    assert isinstance(timestamp, osmapi.dom.LazyTimestamp)
+    assert timestamp == "2021-02-25 09:49:33 UTC"
+    assert timestamp.to_datetime() == datetime.datetime(2021, 2, 25, 9, 49, 33)
+    assert timestamp.to_epoch() == 1614246573
+    assert osmapi.dom.LazyTimestamp("never").to_datetime() == "never"
+
+
+def test_dom_get_attributes_timestamps():
+    mock_domelement = mock.Mock()
+    mock_domelement.attributes = {
+        "timestamp": "2021-12-10T21:28:03Z",
+        "created_at": "2021-12-10T21:28:03Z",
+        "closed_at": "2021-12-10T21:28:03Z",
+        "date": "2021-12-10T21:28:03Z",
+    }
+
+    result = osmapi.dom._dom_get_attributes(mock_domelement, timestamps="epoch")
+
+    assert result == dict.fromkeys(mock_domelement.attributes, 1639171683)
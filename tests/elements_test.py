@@ -0,0 +1,203 @@
+"""Tests for the compact element classes (`OsmApi(result_type="objects")`).
+
+Every read must return objects whose `to_dict()` is exactly what the default
+result type returns for the same response.
+"""
+
+import dataclasses
+
+import osmapi
+import pytest
+from osmapi import elements, parser
+from responses import GET
+
+from .conftest import API_BASE
+
+READS = [
+    ("node_get", (123,), "/node/123", "test_node_get"),
+    ("nodes_get", ([777, 176],), "/nodes", "test_nodes_get"),
+    ("node_history", (123,), "/node/123/history", "test_node_history"),
+    ("node_ways", (234,), "/node/234/ways", "test_node_ways"),
+    (
+        "node_relations",
+        (4295668179,),
+        "/node/4295668179/relations",
+        "test_node_relations",
+    ),
+    ("way_get", (321,), "/way/321", "test_way_get"),
+    ("ways_get", ([456, 678],), "/ways", "test_ways_get"),
+    ("way_history", (4294967296,), "/way/4294967296/history", "test_way_history"),
+    ("way_full", (4294967296,), "/way/4294967296/full", "test_way_full"),
+    ("relation_get", (321,), "/relation/321", "test_relation_get"),
+    (
+        "relation_history",
+        (2470397,),
+        "/relation/2470397/history",
+        "test_relation_history",
+    ),
+    ("relation_full", (2470397,), "/relation/2470397/full", "test_relation_full"),
+    ("relations_get", ([1532552, 1532553],), "/relations", "test_relations_get"),
+    ("map", (8.765, 47.287, 8.767, 47.289), "/map", "test_map"),
+    ("changeset_get", (123,), "/changeset/123", "test_changeset_get"),
+    (
+        "changeset_get",
+        (52924, True),
+        "/changeset/52924",
+        "test_changeset_get_with_comment",
+    ),
+    ("changesets_get", (), "/changesets", "test_changesets_get"),
+    (
+        "changeset_download",
+        (23123,),
+        "/changeset/23123/download",
+        "test_changeset_download",
+    ),
+]
+
+
+def to_dicts(result):
+    """Converts the objects in a result of a read back to dicts."""
+    if isinstance(result, list):
+        return [to_dicts(item) for item in result]
+    if isinstance(result, dict):
+        return {k: to_dicts(v) for k, v in result.items()}
+    if hasattr(result, "to_dict"):
+        return result.to_dict()
+    return result
+
+
+@pytest.fixture
+def objects_api():
+    api = osmapi.OsmApi(api=API_BASE, result_type="objects")
+    yield api
+    api.close()
+
+
+@pytest.mark.parametrize("method,args,path,fixture", READS)
+def test_objects_match_dicts(
+    api, objects_api, add_response, method, args, path, fixture
+):
+    add_response(GET, path, filename=f"{fixture}.xml")
+
+    result = getattr(objects_api, method)(*args)
+
+    assert to_dicts(result) == getattr(api, method)(*args)
+    assert result != getattr(api, method)(*args)
+
+
+def test_node_get_returns_a_node(objects_api, add_response):
+    add_response(GET, "/node/123", filename="test_node_get.xml")
+
+    node = objects_api.node_get(123)
+
+    assert isinstance(node, elements.Node)
+    assert node.id == 123
+    assert node.lat == 51.8753146
+    assert node.tag["amenity"] == "school"
+
+
+def test_relation_members_are_members(objects_api, add_response):
+    add_response(GET, "/relation/321", filename="test_relation_get.xml")
+
+    relation = objects_api.relation_get(321)
+
+    assert isinstance(relation, elements.Relation)
+    assert all(isinstance(member, elements.Member) for member in relation.member)
+    assert isinstance(relation.member, tuple)
+
+
+def test_map_records_hold_objects(objects_api, add_response):
+    add_response(GET, "/map", filename="test_map.xml")
+
+    result = objects_api.map(8.765, 47.287, 8.767, 47.289)
+
+    classes = {"node": elements.Node, "way": elements.Way}
+    classes["relation"] = elements.Relation
+    for record in result:
+        assert isinstance(record["data"], classes[record["type"]])
+
+
+def test_relation_full_recur_with_objects(objects_api, add_response):
+    for relation_id in (100, 200, 300):
+        add_response(
+            GET,
+            f"/relation/{relation_id}/full",
+            filename=f"test_relation_full_recur_{relation_id}.xml",
+        )
+
+    result = objects_api.relation_full_recur(100)
+
+    relations = [r["data"].id for r in result if r["type"] == "relation"]
+    assert set(relations) == {100, 200, 300}
+
+
+def test_objects_with_json_format(add_response):
+    api = osmapi.OsmApi(api=API_BASE, result_type="objects", format="json")
+    add_response(GET, "/way/321.json", filename="test_way_get.json")
+
+    way = api.way_get(321)
+
+    assert isinstance(way, elements.Way)
+    assert isinstance(way.nd, tuple)
+
+
+@pytest.mark.parametrize(
+    "parse,fixture",
+    [
+        (parser.parse_osm, "test_relation_full.xml"),
+        (parser.parse_osc, "test_changeset_download.xml"),
+    ],
+)
+def test_xml_parsers_build_the_objects_directly(
+    file_content, monkeypatch, parse, fixture
+):
+    data = file_content(fixture)
+
+    def from_dict(osm_type, data):
+        raise AssertionError(f"the {osm_type} was parsed to a dict first")
+
+    monkeypatch.setattr(elements, "from_dict", from_dict)
+    result = parse(data, result_type="objects")
+
+    assert to_dicts(result) == parse(data)
+    assert {type(r["data"]) for r in result} == {
+        elements.Node,
+        elements.Way,
+        elements.Relation,
+    }
+
+
+def test_objects_are_frozen_and_slotted():
+    node = elements.Node(id=1, lat=1.0, lon=2.0)
+
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        node.lat = 3.0
+    assert not hasattr(node, "__dict__")
+
+
+def test_to_dict_leaves_out_missing_attributes():
+    node = elements.Node.from_dict({"id": 1, "version": 2, "visible": False})
+
+    assert node.to_dict() == {"id": 1, "version": 2, "visible": False, "tag": {}}
+
+
+def test_from_dict_ignores_unknown_keys():
+    way = elements.Way.from_dict({"id": 1, "nd": [1, 2], "tag": {}, "foo": "bar"})
+
+    assert way == elements.Way(id=1, nd=(1, 2))
+
+
+def test_to_dict_returns_copies():
+    way = elements.Way(id=1, nd=(1, 2), tag={"a": "b"})
+
+    result = way.to_dict()
+    result["tag"]["a"] = "c"
+    result["nd"].append(3)
+
+    assert way.tag == {"a": "b"}
+    assert way.nd == (1, 2)
+
+
+def test_unknown_result_type():
+    with pytest.raises(ValueError, match="result_type must be one of"):
+        osmapi.OsmApi(api=API_BASE, result_type="tuples")
@@ -0,0 +1,143 @@
+"""Tests for gzip-compressed request bodies (`OsmApi(gzip_requests=True)`)."""
+
+import gzip
+import xml.etree.ElementTree as ET
+
+import osmapi
+import pytest
+from osmapi import http
+
+from .conftest import authenticated_session
+
+DIFF_RESULT = (
+    '<diffResult version="0.6">'
+    '<node old_id="-1" new_id="1000" new_version="1"/>'
+    '<node old_id="-2" new_id="1001" new_version="1"/>'
+    "</diffResult>"
+)
+
+
+@pytest.fixture
+def server_api(api_server):
+    def _server_api(**kwargs):
+        api = osmapi.OsmApi(
+            api=api_server.url, session=authenticated_session(), **kwargs
+        )
+        api_server.respond("PUT", "/api/0.6/changeset/create", "4444")
+        api_server.respond("PUT", "/api/0.6/changeset/4444/close", "")
+        return api
+
+    return _server_api
+
+
+def changes(count=2, note=""):
+    nodes = [
+        {"id": -i, "lat": 47.1, "lon": 8.5, "tag": {"note": note}}
+        for i in range(1, count + 1)
+    ]
+    return [{"type": "node", "action": "create", "data": nodes}]
+
+
+def test_upload_is_compressed_while_streamed(server_api, api_server):
+    api_server.respond("POST", "/api/0.6/changeset/4444/upload", DIFF_RESULT)
+    api = server_api(gzip_requests=True, gzip_min_size=100)
+
+    with api.changeset():
+        result = api.changeset_upload(changes(note="line one\nline two " * 100))
+
+    upload = api_server.requests[1]
+    assert upload.headers["Content-Encoding"] == "gzip"
+    assert upload.headers["Transfer-Encoding"] == "chunked"
+    assert len(upload.raw_body) < len(upload.body) / 10
+    root = ET.fromstring(upload.body)
+    assert [node.get("id") for node in root[0]] == ["-1", "-2"]
+    assert root[0][0][0].get("v") == "line one\nline two " * 100
+    assert [node["id"] for node in result[0]["data"]] == [1000, 1001]
+
+
+def test_large_body_is_compressed(server_api, api_server):
+    api_server.respond("PUT", "/api/0.6/node/1", "2")
+    api = server_api(gzip_requests=True, gzip_min_size=100)
+    api._current_changeset_id = 4444
+
+    api.node_update({"id": 1, "lat": 1, "lon": 2, "tag": {"note": "x" * 1000}})
+
+    request = api_server.requests[0]
+    assert request.headers["Content-Encoding"] == "gzip"
+    assert ET.fromstring(request.body)[0][0].get("v") == "x" * 1000
+
+
+def test_small_body_is_not_compressed(server_api, api_server):
+    api_server.respond("POST", "/api/0.6/changeset/4444/upload", DIFF_RESULT)
+    api = server_api(gzip_requests=True)
+
+    with api.changeset():
+        api.changeset_upload(changes())
+
+    for request in api_server.requests:
+        assert "Content-Encoding" not in request.headers
+    assert ET.fromstring(api_server.requests[1].body).tag == "osmChange"
+
+
+def test_no_compression_by_default(server_api, api_server):
+    api_server.respond("POST", "/api/0.6/changeset/4444/upload", DIFF_RESULT)
+    api = server_api()
+
+    with api.changeset():
+        api.changeset_upload(changes(note="x" * 10_000))
+
+    assert "Content-Encoding" not in api_server.requests[1].headers
+
+
+def test_gzip_body_can_be_iterated_again():
+    chunks = [b"<a>", b"b" * 1000, b"</a>"]
+    body = http.GzipBody(chunks)
+
+    first = b"".join(body)
+
+    assert first == b"".join(body)
+    assert gzip.decompress(first) == b"".join(chunks)
+
+
+@pytest.mark.parametrize(
+    "send,data,compressed",
+    [
+        ("short", b"short", False),
+        (b"short", b"short", False),
+        ("x" * 10, b"x" * 10, True),
+        (b"x" * 10, b"x" * 10, True),
+        ([b"x" * 5, b"x" * 4], b"x" * 9, False),
+        ([b"x" * 5, b"x" * 5, b"y"], b"x" * 10 + b"y", True),
+    ],
+)
+def test_gzip_body_threshold(send, data, compressed):
+    body, is_compressed = http._gzip_body(send, 10)
+
+    assert is_compressed == compressed
+    if compressed:
+        assert (
+            gzip.decompress(body if isinstance(body, bytes) else b"".join(body)) == data
+        )
+    else:
+        assert body == (send if isinstance(send, (str, bytes)) else data)
+
+
+def test_gzip_body_of_a_generator():
+    def chunks():
+        for _ in range(100):
+            yield b"x" * 100
+
+    body, is_compressed = http._gzip_body(chunks(), 1000)
+
+    assert is_compressed
+    assert gzip.decompress(b"".join(body)) == b"x" * 10_000
+
+
+def test_gzip_body_of_a_short_generator():
+    body, is_compressed = http._gzip_body((b"x" * 3 for _ in range(3)), 1000)
+
+    assert (body, is_compressed) == (b"x" * 9, False)
+
+
+def test_gzip_body_without_body():
+    assert http._gzip_body(None, 10) == (None, False)
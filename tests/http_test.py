@@ -1,12 +1,15 @@
 """Tests for the HTTP layer: status-code mapping and the retry loop."""
 
+import email.utils
+import os
+import time
 from unittest import mock
 
 import osmapi
 import pytest
 import requests
 
-from .conftest import API_BASE, make_http_response
+from .conftest import API_BASE, GENERATOR, make_http_response
 
 
 def test_http_request_get(mock_api):
@@ -15,7 +18,12 @@ def test_http_request_get(mock_api):
     response = api._session._http_request("GET", "/api/0.6/test", False, None)
 
     session.request.assert_called_with(
-        "GET", f"{API_BASE}/api/0.6/test", data=None, timeout=30, params=None
+        "GET",
+        f"{API_BASE}/api/0.6/test",
+        data=None,
+        timeout=30,
+        params=None,
+        headers={"User-Agent": GENERATOR},
     )
     assert response == "test response"
     assert session.request.call_count == 1
@@ -27,7 +35,12 @@ def test_http_request_put(mock_api):
     response = api._session._http_request("PUT", "/api/0.6/testput", False, "data")
 
     session.request.assert_called_with(
-        "PUT", f"{API_BASE}/api/0.6/testput", data="data", timeout=30, params=None
+        "PUT",
+        f"{API_BASE}/api/0.6/testput",
+        data="data",
+        timeout=30,
+        params=None,
+        headers={"User-Agent": GENERATOR},
     )
     assert response == "test response"
 
@@ -45,6 +58,7 @@ def test_http_request_delete(mock_api):
         data="delete data",
         timeout=30,
         params=None,
+        headers={"User-Agent": GENERATOR},
     )
     assert response == "test response"
 
@@ -55,12 +69,41 @@ def test_http_request_auth(mock_api):
     response = api._session._http_request("PUT", "/api/0.6/testauth", True, None)
 
     session.request.assert_called_with(
-        "PUT", f"{API_BASE}/api/0.6/testauth", data=None, timeout=30, params=None
+        "PUT",
+        f"{API_BASE}/api/0.6/testauth",
+        data=None,
+        timeout=30,
+        params=None,
+        headers={"User-Agent": GENERATOR},
     )
     assert session.auth == ("testuser", "testpassword")
     assert response == "test response"
 
 
+def test_session_passed_in_is_not_changed():
+    session = requests.Session()
+    session.headers["User-Agent"] = "my-script/1.0"
+    session.auth = ("user", "pass")
+    session.request = mock.Mock(return_value=make_http_response())
+
+    api = osmapi.OsmApi(api=API_BASE, session=session)
+    api._session._http_request("GET", "/api/0.6/test", False, None)
+    api._parallel_worker()._session._http_request("GET", "/api/0.6/test", False, None)
+
+    assert session.headers["User-Agent"] == "my-script/1.0"
+    assert session.auth == ("user", "pass")
+    for call in session.request.call_args_list:
+        assert call.kwargs["headers"] == {"User-Agent": GENERATOR}
+
+
+def test_session_created_has_the_user_agent():
+    api = osmapi.OsmApi(api=API_BASE, appid="test")
+
+    assert api._session._session.headers["User-Agent"] == f"test ({GENERATOR})"
+    assert api._session._headers == {}
+    api.close()
+
+
 def test_http_request_auth_without_session(unauthenticated_api):
     """Without a session there is no way to authenticate, so osmapi refuses."""
     api, session = unauthenticated_api
@@ -191,8 +234,7 @@ def test_http_retries_server_error_then_succeeds(mock_api):
 
     assert result == "ok"
     assert session.request.call_count == 3
-    # the first retry is immediate, only later ones wait
-    assert api._session._sleep.call_count == 1
+    assert api._session._sleep.call_count == 2
 
 
 def test_http_gives_up_after_max_retries_on_server_error(mock_api):
@@ -203,7 +245,7 @@ def test_http_gives_up_after_max_retries_on_server_error(mock_api):
 
     assert execinfo.value.status == 500
     assert session.request.call_count == api._session.MAX_RETRY_LIMIT
-    assert api._session._sleep.call_count == api._session.MAX_RETRY_LIMIT - 2
+    assert api._session._sleep.call_count == api._session.MAX_RETRY_LIMIT - 1
 
 
 def test_http_does_not_retry_client_error(mock_api):
@@ -235,7 +277,7 @@ def test_http_retries_unexpected_exception(mock_api):
         api._session._http("GET", "/api/0.6/test", False, None)
 
     assert session.request.call_count == api._session.MAX_RETRY_LIMIT
-    assert api._session._sleep.call_count == api._session.MAX_RETRY_LIMIT - 2
+    assert api._session._sleep.call_count == api._session.MAX_RETRY_LIMIT - 1
 
 
 def test_http_reraises_osm_api_error_after_max_retries(mock_api):
@@ -248,7 +290,7 @@ def test_http_reraises_osm_api_error_after_max_retries(mock_api):
     assert session.request.call_count == api._session.MAX_RETRY_LIMIT
 
 
-def test_http_recreates_session_between_retries(mock_api):
+def test_http_keeps_session_between_retries(mock_api):
     api, session = mock_api(
         responses=[make_http_response(status=500), make_http_response(content="ok")]
     )
@@ -256,15 +298,364 @@ def test_http_recreates_session_between_retries(mock_api):
 
     api._session._http("GET", "/api/0.6/test", False, None)
 
-    # _get_http_session() re-applies auth and the user-agent on every rebuild
-    assert session.headers.update.call_count == headers_updates_before + 1
+    # the session with its pooled connections is set up once and kept
+    assert api._session._session is session
+    assert session.headers.update.call_count == headers_updates_before
+    session.close.assert_not_called()
+
+
+def test_http_resets_pool_after_connection_error(mock_api):
+    api, session = mock_api(
+        side_effect=[
+            requests.exceptions.ConnectionError("reset"),
+            make_http_response(content="ok"),
+        ]
+    )
+    api._session._retry_policy = osmapi.http.RetryPolicy(reset_pool=True)
+
+    assert api._session._http("GET", "/api/0.6/test", False, None) == "ok"
+
+    session.close.assert_called_once_with()
+
+
+def test_http_keeps_pool_after_server_error(mock_api):
+    api, session = mock_api(
+        responses=[make_http_response(status=500), make_http_response(content="ok")]
+    )
+    api._session._retry_policy = osmapi.http.RetryPolicy(reset_pool=True)
+
+    api._session._http("GET", "/api/0.6/test", False, None)
+
+    session.close.assert_not_called()
+
+
+def test_pool_maxsize_mounts_adapter():
+    api = osmapi.OsmApi(api=API_BASE, pool_maxsize=32, pool_block=True)
+
+    session = api._session._session
+    adapter = session.get_adapter(f"{API_BASE}/api/0.6/node/1")
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block is True
+    assert session.get_adapter("https://example.com/") is not adapter
+    api.close()
+
+
+def test_pool_maxsize_leaves_a_session_passed_in_alone():
+    session = requests.Session()
+    adapters = dict(session.adapters)
+
+    with pytest.raises(ValueError, match="pool_maxsize only applies"):
+        osmapi.OsmApi(api=API_BASE, session=session, pool_maxsize=32)
+
+    assert session.adapters == adapters
+
+
+def test_parallel_workers_share_the_adapter():
+    api = osmapi.OsmApi(api=API_BASE, pool_maxsize=8)
+    url = f"{API_BASE}/api/0.6/changeset/create"
+    adapter = api._session._session.get_adapter(url)
+
+    workers = [api._parallel_worker() for _ in range(3)]
 
+    for worker in workers:
+        assert worker._session is not api._session
+        assert worker._session._session.get_adapter(url) is adapter
+    assert api._session._session.get_adapter(url) is adapter
+    api.close()
+
+
+def test_pool_maxsize_must_be_positive():
+    with pytest.raises(ValueError):
+        osmapi.OsmApi(api=API_BASE, pool_maxsize=0)
+
+
+def test_context_keeps_session():
+    api = osmapi.OsmApi(api=API_BASE)
+    session = api._session
+
+    with api as entered:
+        assert entered is api
+        assert api._session is session
+    with api:
+        assert api._session._session is session._session
 
-def test_sleep_waits_five_seconds():
+
+def test_sleep():
     session = osmapi.http.OsmApiSession(API_BASE, "osmapi/test")
 
     with mock.patch("osmapi.http.time.sleep") as sleep:
-        session._sleep()
+        session._sleep(1.5)
 
-    sleep.assert_called_once_with(5)
+    sleep.assert_called_once_with(1.5)
     session.close()
+
+
+def test_http_waits_with_exponential_backoff(mock_api):
+    api, session = mock_api(status=500)
+    api._session._retry_policy = osmapi.http.RetryPolicy(jitter=False)
+
+    with pytest.raises(osmapi.ApiError):
+        api._session._http("GET", "/api/0.6/test", False, None)
+
+    waits = [call.args[0] for call in api._session._sleep.call_args_list]
+    assert waits == [1, 2, 4, 8]
+
+
+def test_http_waits_with_jitter(mock_api):
+    api, session = mock_api(status=500)
+    api._session._retry_policy = osmapi.http.RetryPolicy(backoff=10, max_backoff=15)
+
+    with pytest.raises(osmapi.ApiError):
+        api._session._http("GET", "/api/0.6/test", False, None)
+
+    waits = [call.args[0] for call in api._session._sleep.call_args_list]
+    assert all(0 <= wait <= limit for wait, limit in zip(waits, [10, 15, 15, 15]))
+
+
+@pytest.mark.parametrize("status", [429, 503])
+def test_http_follows_retry_after(mock_api, status):
+    api, session = mock_api(
+        responses=[
+            make_http_response(status=status, headers={"Retry-After": "7"}),
+            make_http_response(content="ok"),
+        ]
+    )
+
+    assert api._session._http("GET", "/api/0.6/test", False, None) == "ok"
+
+    api._session._sleep.assert_called_once_with(7.0)
+
+
+def test_http_gives_up_when_retry_after_exceeds_the_budget(mock_api):
+    api, session = mock_api(
+        status=503, headers={"Retry-After": "Wed, 21 Oct 2099 07:28:00 GMT"}
+    )
+
+    with pytest.raises(osmapi.ApiError) as execinfo:
+        api._session._http("GET", "/api/0.6/test", False, None)
+
+    assert execinfo.value.retry_after > 120
+    assert session.request.call_count == 1
+    assert api._session._sleep.call_count == 0
+
+
+def test_http_gives_up_after_the_budget(mock_api, monkeypatch):
+    api, session = mock_api(status=500)
+    api._session._retry_policy = osmapi.http.RetryPolicy(
+        jitter=False, budget=10, max_attempts=10
+    )
+    clock = iter(range(0, 100, 3))
+    monkeypatch.setattr(osmapi.http.time, "monotonic", lambda: next(clock))
+
+    with pytest.raises(osmapi.ApiError):
+        api._session._http("GET", "/api/0.6/test", False, None)
+
+    # the waits of 1 and 2 seconds fit into the budget, the one of 4 not
+    assert session.request.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "method, path",
+    [("POST", "/api/0.6/changeset/1/upload"), ("PUT", "/api/0.6/node/create")],
+)
+def test_http_does_not_retry_non_idempotent_requests(mock_api, method, path):
+    api, session = mock_api(status=500)
+
+    with pytest.raises(osmapi.ApiError):
+        api._session._http(method, path, True, None)
+
+    assert session.request.call_count == 1
+
+
+def test_http_retries_all_requests_if_the_policy_allows(mock_api):
+    api, session = mock_api(
+        responses=[make_http_response(status=502), make_http_response(content="ok")]
+    )
+    api._session._retry_policy = osmapi.http.RetryPolicy(idempotent_only=False)
+
+    result = api._session._http("POST", "/api/0.6/changeset/1/upload", True, None)
+
+    assert result == "ok"
+    assert session.request.call_count == 2
+
+
+def test_retry_policy_from_osmapi():
+    policy = osmapi.http.RetryPolicy(max_attempts=2)
+    api = osmapi.OsmApi(api=API_BASE, retry_policy=policy)
+
+    assert api._session._retry_policy is policy
+    api.close()
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(None, None), ("120", 120.0), ("-3", 0.0), ("soon", None)],
+)
+def test_retry_after(value, expected):
+    assert osmapi.http._retry_after(value) == expected
+
+
+def test_retry_after_date():
+    date = email.utils.formatdate(time.time() + 60, usegmt=True)
+
+    assert 55 <= osmapi.http._retry_after(date) <= 60
+
+
+##################################################
+# Streamed responses                             #
+##################################################
+
+
+def streamed_response(chunks=(b"<osm/>",), status=200, side_effect=None):
+    response = make_http_response(status=status)
+    response.iter_content = mock.Mock(
+        return_value=iter(chunks), side_effect=side_effect
+    )
+    return response
+
+
+def test_get_stream(mock_api):
+    response = streamed_response([b"<osm>", b"</osm>"])
+    api, session = mock_api(responses=[response])
+
+    with api._session._get_stream("/api/0.6/map") as body:
+        assert list(body) == [b"<osm>", b"</osm>"]
+        assert response.close.call_count == 0
+
+    session.request.assert_called_with(
+        "GET",
+        f"{API_BASE}/api/0.6/map",
+        data=None,
+        timeout=30,
+        params=None,
+        stream=True,
+        headers={"User-Agent": GENERATOR},
+    )
+    response.iter_content.assert_called_with(chunk_size=api._session.STREAM_CHUNK_SIZE)
+    assert response.close.call_count == 1
+
+
+def test_get_stream_retries_server_error(mock_api):
+    api, session = mock_api(
+        responses=[make_http_response(status=503), streamed_response()]
+    )
+
+    with api._session._get_stream("/api/0.6/map") as body:
+        assert list(body) == [b"<osm/>"]
+
+    assert session.request.call_count == 2
+
+
+def test_get_stream_maps_errors_while_reading(mock_api):
+    """An error halfway through the body is not retried, but still typed."""
+    response = streamed_response(
+        side_effect=requests.exceptions.ConnectionError("reset")
+    )
+    api, session = mock_api(responses=[response])
+
+    with pytest.raises(osmapi.ConnectionApiError, match="reset"):
+        with api._session._get_stream("/api/0.6/map") as body:
+            list(body)
+
+    assert session.request.call_count == 1
+    assert response.close.call_count == 1
+
+
+def test_download_to_writes_the_chunks(mock_api, tmp_path):
+    response = streamed_response([b"<osm>", b"<node/>", b"</osm>"])
+    api, _ = mock_api(responses=[response])
+    target = tmp_path / "map.osm"
+
+    size = api._session._download_to("/api/0.6/map", target)
+
+    assert size == 18
+    assert target.read_bytes() == b"<osm><node/></osm>"
+    assert response.close.call_count == 1
+
+
+def test_download_to_removes_a_partial_file(mock_api, tmp_path):
+    def chunks():
+        yield b"<osm>"
+        raise requests.exceptions.ConnectionError("reset")
+
+    response = streamed_response(chunks())
+    api, session = mock_api(responses=[response])
+    target = tmp_path / "map.osm"
+
+    with pytest.raises(osmapi.ConnectionApiError, match="reset"):
+        api._session._download_to("/api/0.6/map", str(target))
+
+    assert not target.exists()
+    assert session.request.call_count == 1
+
+
+def test_download_to_keeps_an_existing_file_on_error(mock_api, tmp_path):
+    def chunks():
+        yield b"<osm>"
+        raise requests.exceptions.ConnectionError("reset")
+
+    api, _ = mock_api(responses=[streamed_response(chunks())])
+    target = tmp_path / "map.osm"
+    target.write_bytes(b"<osm/>")
+
+    with pytest.raises(osmapi.ConnectionApiError, match="reset"):
+        api._session._download_to("/api/0.6/map", target)
+
+    assert target.read_bytes() == b"<osm/>"
+    assert os.listdir(tmp_path) == ["map.osm"]
+
+
+def test_download_to_replaces_an_existing_file(mock_api, tmp_path):
+    api, _ = mock_api(responses=[streamed_response([b"<osm>", b"</osm>"])])
+    target = tmp_path / "map.osm"
+    target.write_bytes(b"<osm><node/></osm>")
+    target.chmod(0o640)
+
+    api._session._download_to("/api/0.6/map", target)
+
+    assert target.read_bytes() == b"<osm></osm>"
+    assert target.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["map.osm"]
+
+
+def test_download_to_creates_a_file_as_the_umask_allows(mock_api, tmp_path):
+    api, _ = mock_api(responses=[streamed_response([b"<osm/>"])])
+    target = tmp_path / "map.osm"
+    umask = os.umask(0o027)
+    try:
+        with mock.patch("os.umask", side_effect=AssertionError("umask changed")):
+            api._session._download_to("/api/0.6/map", target)
+    finally:
+        os.umask(umask)
+
+    assert target.stat().st_mode & 0o777 == 0o640
+
+
+def test_download_to_skips_a_taken_temporary_name(mock_api, tmp_path):
+    api, _ = mock_api(responses=[streamed_response([b"<osm/>"])])
+    (tmp_path / ".osmapi-00000000002a").write_bytes(b"taken")
+    target = tmp_path / "map.osm"
+
+    with mock.patch("random.getrandbits", side_effect=[42, 43]):
+        api._session._download_to("/api/0.6/map", target)
+
+    assert target.read_bytes() == b"<osm/>"
+    assert (tmp_path / ".osmapi-00000000002a").read_bytes() == b"taken"
+    assert sorted(os.listdir(tmp_path)) == [".osmapi-00000000002a", "map.osm"]
+
+
+def test_download_to_reports_an_unwritable_directory(mock_api, tmp_path):
+    api, _ = mock_api(responses=[streamed_response()])
+
+    with pytest.raises(FileNotFoundError):
+        api._session._download_to("/api/0.6/map", tmp_path / "missing" / "map.osm")
+
+
+def test_download_to_does_not_create_a_file_on_error(mock_api, tmp_path):
+    api, _ = mock_api(status=404)
+    target = tmp_path / "map.osm"
+
+    with pytest.raises(osmapi.ElementNotFoundApiError):
+        api._session._download_to("/api/0.6/map", target)
+
+    assert not target.exists()
@@ -0,0 +1,148 @@
+"""Tests for the journal of bulk uploads (`changeset_upload_bulk(journal=...)`)."""
+
+import json
+
+import osmapi
+import pytest
+from osmapi import journal
+
+
+def changes():
+    nodes = [
+        {"id": -i, "lat": 47.1, "lon": 8.5, "tag": {}, "version": 1}
+        for i in range(1, 5)
+    ]
+    ways = [{"id": -1, "nd": [-1, -4], "tag": {}, "version": 1}]
+    return [
+        {"type": "node", "action": "create", "data": nodes},
+        {"type": "way", "action": "create", "data": ways},
+    ]
+
+
+def entries(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def created(fake_api):
+    return sum(len(upload.findall("create/*")) for upload in fake_api.uploads)
+
+
+def test_parts_are_recorded(auth_api, fake_api, tmp_path):
+    path = tmp_path / "import.journal"
+
+    ids = auth_api.changeset_upload_bulk(changes(), max_elements=3, journal=path)
+
+    assert ids == {
+        "node": {-1: 1000, -2: 1001, -3: 1002, -4: 1003},
+        "way": {-1: 1004},
+        "relation": {},
+    }
+    recorded = entries(path)
+    assert [(e["status"], e["part"], e["changeset"]) for e in recorded] == [
+        ("started", 0, 1),
+        ("done", 0, 1),
+        ("started", 1, 2),
+        ("done", 1, 2),
+    ]
+    assert recorded[1]["diff"][0] == ["node", -1, 1000, 1]
+    assert recorded[0]["hash"] == recorded[1]["hash"] != recorded[2]["hash"]
+
+
+def test_resume_after_a_failed_upload(auth_api, fake_api, tmp_path):
+    path = tmp_path / "import.journal"
+    fake_api.failing_upload = 2
+    with pytest.raises(osmapi.ApiError):
+        auth_api.changeset_upload_bulk(changes(), max_elements=3, journal=path)
+
+    fresh = changes()
+    ids = auth_api.changeset_upload_bulk(fresh, max_elements=3, journal=path)
+
+    assert len(fake_api.uploads) == 3
+    assert created(fake_api) == 5 + 2
+    assert ids["node"] == {-1: 1000, -2: 1001, -3: 1002, -4: 1003}
+    assert fresh[0]["data"][0]["id"] == 1000
+    assert fake_api.uploads[2].find("create/way/nd").get("ref") == "1000"
+
+
+def test_resume_after_a_crash_once_the_part_was_applied(
+    auth_api, fake_api, tmp_path, monkeypatch
+):
+    path = tmp_path / "import.journal"
+    finish = journal.UploadJournal.finish
+
+    def crash(self, *args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(journal.UploadJournal, "finish", crash)
+    with pytest.raises(KeyboardInterrupt):
+        auth_api.changeset_upload_bulk(changes(), max_elements=3, journal=path)
+    monkeypatch.setattr(journal.UploadJournal, "finish", finish)
+
+    ids = auth_api.changeset_upload_bulk(changes(), max_elements=3, journal=path)
+
+    assert len(fake_api.uploads) == 2
+    assert created(fake_api) == 5
+    assert ids["node"] == {-1: 1000, -2: 1001, -3: 1002, -4: 1003}
+    assert [e["status"] for e in entries(path)] == [
+        "started",
+        "done",
+        "started",
+        "done",
+    ]
+
+
+def test_lost_response_is_not_sent_again(auth_api, fake_api, tmp_path):
+    fake_api.lost_upload = 1
+
+    ids = auth_api.changeset_upload_bulk(
+        changes(), max_elements=3, journal=tmp_path / "import.journal"
+    )
+
+    assert len(fake_api.uploads) == 2
+    assert ids["node"] == {-1: 1000, -2: 1001, -3: 1002, -4: 1003}
+    assert ids["way"] == {-1: 1004}
+
+
+def test_journal_of_other_changes(auth_api, fake_api, tmp_path):
+    path = tmp_path / "import.journal"
+    auth_api.changeset_upload_bulk(changes(), max_elements=3, journal=path)
+    other = changes()
+    other[0]["data"][0]["tag"] = {"amenity": "bench"}
+
+    with pytest.raises(osmapi.UploadJournalError, match="Part 0 differs"):
+        auth_api.changeset_upload_bulk(other, max_elements=3, journal=path)
+
+
+def test_incomplete_last_line_is_ignored(tmp_path):
+    path = tmp_path / "import.journal"
+    path.write_text(
+        '{"status":"started","part":0,"hash":"abc","changeset":1}\n'
+        '{"status":"done","part":0,"ha'
+    )
+
+    upload_journal = journal.UploadJournal(path)
+
+    assert list(upload_journal.started) == [0]
+    assert upload_journal.done == {}
+
+
+def test_invalid_line(tmp_path):
+    path = tmp_path / "import.journal"
+    path.write_text('{"status":\n{"status":"started","part":0}\n')
+
+    with pytest.raises(osmapi.UploadJournalError, match="Line 1"):
+        journal.UploadJournal(path)
+
+
+def test_reconcile_with_other_changeset():
+    downloaded = [
+        {"action": "create", "type": "way", "data": {"id": 5, "version": 1}},
+    ]
+
+    with pytest.raises(osmapi.UploadJournalError, match="fewer nodes"):
+        journal.reconcile(changes(), downloaded)
+
+
+def test_reconcile_with_empty_changeset():
+    assert journal.reconcile(changes(), []) is None
@@ -0,0 +1,104 @@
+"""Tests for reading in the JSON format (`OsmApi(format="json")`).
+
+The JSON fixtures hold the same data as the XML fixtures of the same name, so
+every read must return exactly what the XML path returns for them.
+"""
+
+import osmapi
+import pytest
+from responses import GET
+
+from .conftest import API_BASE
+
+READS = [
+    ("node_get", (123,), "/node/123", "test_node_get"),
+    ("node_get", (123, 2), "/node/123/2", "test_node_get"),
+    ("nodes_get", ([777, 176],), "/nodes", "test_nodes_get"),
+    ("node_history", (123,), "/node/123/history", "test_node_history"),
+    ("node_ways", (234,), "/node/234/ways", "test_node_ways"),
+    ("way_get", (321,), "/way/321", "test_way_get"),
+    ("way_history", (4294967296,), "/way/4294967296/history", "test_way_history"),
+    ("way_full", (4294967296,), "/way/4294967296/full", "test_way_full"),
+    (
+        "relation_history",
+        (2470397,),
+        "/relation/2470397/history",
+        "test_relation_history",
+    ),
+    ("relation_full", (2470397,), "/relation/2470397/full", "test_relation_full"),
+    ("relations_get", ([1532552, 1532553],), "/relations", "test_relations_get"),
+    ("map", (8.765, 47.287, 8.767, 47.289), "/map", "test_map"),
+    (
+        "notes_get",
+        (-1.4998534, 45.9667901, -1.4831815, 52.4710193),
+        "/notes",
+        "test_notes_get",
+    ),
+    ("note_get", (1111,), "/notes/1111", "test_note_get"),
+]
+
+
+@pytest.mark.parametrize("method,args,path,fixture", READS)
+def test_json_read_matches_xml_read(
+    api, json_api, add_response, method, args, path, fixture
+):
+    add_response(GET, path, filename=f"{fixture}.xml")
+    resp = add_response(GET, f"{path}.json", filename=f"{fixture}.json")
+
+    result = getattr(json_api, method)(*args)
+
+    assert resp.calls[-1].request.url.startswith(f"{API_BASE}/api/0.6{path}.json")
+    assert result == getattr(api, method)(*args)
+
+
+def test_json_format_keeps_the_query_string(json_api, add_response):
+    resp = add_response(GET, "/nodes.json", filename="test_nodes_get.json")
+
+    json_api.nodes_get([777, 176])
+
+    assert resp.calls[0].request.url == f"{API_BASE}/api/0.6/nodes.json?nodes=777,176"
+
+
+def test_json_format_deleted_element_defaults(json_api, add_response):
+    """`visible` is only in the JSON of a deleted element, `tags` only if set."""
+    add_response(
+        GET,
+        "/node/5/history.json",
+        body='{"elements": ['
+        '{"type": "node", "id": 5, "lat": 1, "lon": 2, "version": 1, '
+        '"timestamp": "2020-01-01T00:00:00Z", "tags": {"a": "b"}}, '
+        '{"type": "node", "id": 5, "version": 2, "visible": false, '
+        '"timestamp": "2020-01-02T00:00:00Z"}]}',
+    )
+
+    result = json_api.node_history(5)
+
+    assert result[1]["visible"] is True
+    assert result[1]["lat"] == 1.0 and isinstance(result[1]["lat"], float)
+    assert result[1]["tag"] == {"a": "b"}
+    assert result[2]["visible"] is False
+    assert result[2]["tag"] == {}
+    assert "lat" not in result[2]
+
+
+@pytest.mark.parametrize("body", ["<osm/>", "{}", '{"elements": [{"id": 1}]}'])
+def test_json_format_invalid_response(json_api, add_response, body):
+    add_response(GET, "/way/321/full.json", body=body)
+
+    with pytest.raises(
+        osmapi.JsonResponseInvalidError,
+        match="The JSON response from the OSM API is invalid",
+    ):
+        json_api.way_full(321)
+
+
+def test_json_format_missing_element(json_api, add_response):
+    add_response(GET, "/node/123.json", body='{"elements": []}')
+
+    with pytest.raises(osmapi.JsonResponseInvalidError, match="no node found"):
+        json_api.node_get(123)
+
+
+def test_format_is_validated():
+    with pytest.raises(ValueError, match="format must be 'xml' or 'json'"):
+        osmapi.OsmApi(api=API_BASE, format="yaml")
@@ -0,0 +1,161 @@
+"""Tests for the batched multi-fetch reads (`nodes_get`, `iter_nodes_get`, …)."""
+
+import json
+import re
+import threading
+import urllib.parse
+
+import osmapi
+import pytest
+from osmapi.OsmApi import _id_batches
+from responses import GET
+
+from .conftest import API_BASE
+
+
+def requested_ids(request):
+    query = urllib.parse.urlsplit(request.url).query
+    values = urllib.parse.parse_qs(query)
+    return [int(i) for i in next(iter(values.values()))[0].split(",")]
+
+
+@pytest.fixture
+def elements_api(mocked_responses):
+    """Answers `/nodes`, `/ways` and `/relations` with the requested elements.
+
+    Returns the ids of each request, `missing` ids are answered with a 404.
+    """
+    calls = []
+    missing = set()
+    lock = threading.Lock()
+
+    def answer(request):
+        ids = requested_ids(request)
+        with lock:
+            calls.append(ids)
+        if missing.intersection(ids):
+            return 404, {}, ""
+        osm_type = re.search(r"/(node|way|relation)s", request.url).group(1)
+        if ".json" in request.url:
+            body = {
+                "elements": [
+                    {"type": osm_type, "id": i, "version": 1, "tags": {}} for i in ids
+                ]
+            }
+            return 200, {}, json.dumps(body)
+        elements = "".join(f'<{osm_type} id="{i}" version="1"/>' for i in ids)
+        return 200, {}, f'<osm version="0.6">{elements}</osm>'
+
+    mocked_responses.add_callback(
+        GET, re.compile(rf"{API_BASE}/api/0\.6/(nodes|ways|relations).*"), answer
+    )
+    answer.calls = calls
+    answer.missing = missing
+    return answer
+
+
+@pytest.fixture
+def batched_api(api, monkeypatch):
+    monkeypatch.setattr(osmapi.OsmApi, "MULTI_FETCH_MAX_IDS", 3)
+    return api
+
+
+def test_batches_by_count():
+    assert _id_batches("", [1, 2, 3, 4, 5, 6, 7], 3, 100) == [
+        [1, 2, 3],
+        [4, 5, 6],
+        [7],
+    ]
+
+
+def test_batches_by_url_length():
+    url = "https://api/nodes?nodes="
+
+    batches = _id_batches(url, [1000, 2000, 3000, 4000], 100, len(url) + 10)
+
+    assert batches == [[1000, 2000], [3000, 4000]]
+    assert all(len(url + ",".join(map(str, b))) <= len(url) + 10 for b in batches)
+
+
+def test_duplicate_ids_are_fetched_once():
+    assert _id_batches("", [5, 6, 5, 7, 6], 10, 100) == [[5, 6, 7]]
+
+
+def test_nodes_get_in_batches(batched_api, elements_api):
+    result = batched_api.nodes_get(list(range(1, 9)), workers=3)
+
+    assert list(result) == list(range(1, 9))
+    assert result[5]["version"] == 1
+    assert sorted(elements_api.calls) == [[1, 2, 3], [4, 5, 6], [7, 8]]
+
+
+def test_ways_and_relations_get_in_batches(batched_api, elements_api):
+    ways = batched_api.ways_get([10, 11, 12, 13])
+    relations = batched_api.relations_get([20, 21, 22, 23], workers=1)
+
+    assert list(ways) == [10, 11, 12, 13]
+    assert list(relations) == [20, 21, 22, 23]
+    assert elements_api.calls[-2:] == [[20, 21, 22], [23]]
+
+
+def test_json_format_in_batches(json_api, elements_api, monkeypatch):
+    monkeypatch.setattr(osmapi.OsmApi, "MULTI_FETCH_MAX_IDS", 2)
+
+    result = json_api.nodes_get([1, 2, 3])
+
+    assert list(result) == [1, 2, 3]
+    assert len(elements_api.calls) == 2
+
+
+def test_limits_of_an_instance(api, elements_api):
+    api.MULTI_FETCH_MAX_IDS = 2
+
+    result = api.nodes_get([1, 2, 3, 4, 5], workers=1)
+
+    assert list(result) == [1, 2, 3, 4, 5]
+    assert elements_api.calls == [[1, 2], [3, 4], [5]]
+    assert osmapi.OsmApi.MULTI_FETCH_MAX_IDS == 1000
+
+
+def test_long_url_is_split(api, elements_api):
+    ids = list(range(10**9, 10**9 + 2000))
+
+    result = api.nodes_get(ids)
+
+    # 11 characters per id, at most 8000 characters per URL (with the host)
+    assert len(result) == 2000
+    assert [len(ids) for ids in sorted(elements_api.calls)] == [721, 721, 558]
+
+
+def test_iter_nodes_get(batched_api, elements_api):
+    batches = list(batched_api.iter_nodes_get(list(range(1, 8)), workers=2))
+
+    assert sorted(sorted(batch) for batch in batches) == [[1, 2, 3], [4, 5, 6], [7]]
+
+
+def test_iter_nodes_get_stops_when_closed(batched_api, elements_api):
+    batches = batched_api.iter_nodes_get(list(range(1, 31)), workers=1)
+
+    assert list(next(batches)) == [1, 2, 3]
+    batches.close()
+
+    assert len(elements_api.calls) == 1
+
+
+def test_missing_element(batched_api, elements_api):
+    elements_api.missing.add(5)
+
+    with pytest.raises(osmapi.ElementNotFoundApiError):
+        batched_api.nodes_get(list(range(1, 30)), workers=2)
+
+    assert len(elements_api.calls) < 10
+
+
+def test_empty_id_list(api, mocked_responses):
+    assert api.nodes_get([]) == {}
+    assert len(mocked_responses.calls) == 0
+
+
+def test_workers_must_be_positive(api):
+    with pytest.raises(ValueError):
+        api.nodes_get([1, 2], workers=0)
@@ -128,14 +128,19 @@ def test_node_create_with_session_auth(mock_api):
 
 
 def test_node_create_with_exception(mock_api):
-    api, session = mock_api(side_effect=Exception)
+    error = ValueError("connection dropped")
+    api, session = mock_api(side_effect=error)
     api._current_changeset_id = OPEN_CHANGESET_ID
 
-    with pytest.raises(
-        osmapi.MaximumRetryLimitReachedError, match="Give up after 5 retries"
-    ):
+    # a create is not idempotent, so it is not sent again and its error is
+    # raised as it is, not as `MaximumRetryLimitReachedError`
+    with pytest.raises(ValueError, match="^connection dropped$") as execinfo:
         api.node_create(dict(TEST_NODE))
 
+    assert execinfo.value is error
+    assert session.request.call_count == 1
+    assert api._session._sleep.call_count == 0
+
 
 def test_node_create_drops_timestamp(changeset_api, add_response, assert_request_xml):
     """`_do` strips a client-supplied timestamp, the server assigns its own."""
@@ -0,0 +1,150 @@
+"""Tests for `order_changes`, uploads sorted by the dependencies of the changes."""
+
+import osmapi
+import pytest
+from osmapi.changeset import order_changes
+
+
+def node(i):
+    return {"id": i, "lat": 47.1, "lon": 8.5, "tag": {}, "version": 1}
+
+
+def way(i, *nds):
+    return {"id": i, "nd": list(nds), "tag": {}, "version": 1}
+
+
+def relation(i, *relations):
+    members = [{"type": "relation", "ref": r, "role": ""} for r in relations]
+    return {"id": i, "member": members, "tag": {}, "version": 1}
+
+
+def summary(changes_data):
+    return [
+        (change["action"], change["type"], [e["id"] for e in change["data"]])
+        for change in changes_data
+    ]
+
+
+def test_creates_before_modifies_before_deletes():
+    changes = [
+        {"type": "node", "action": "delete", "data": [node(5)]},
+        {"type": "way", "action": "delete", "data": [way(6, 5)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+        {"type": "node", "action": "modify", "data": [node(7)]},
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+        {"type": "relation", "action": "delete", "data": [relation(8)]},
+        {"type": "node", "action": "create", "data": [node(-3)]},
+    ]
+
+    assert summary(order_changes(changes)) == [
+        ("create", "node", [-1, -2, -3]),
+        ("create", "way", [-1]),
+        ("modify", "node", [7]),
+        ("delete", "relation", [8]),
+        ("delete", "way", [6]),
+        ("delete", "node", [5]),
+    ]
+
+
+def test_elements_are_not_copied():
+    changes = [{"type": "node", "action": "create", "data": [node(-1)]}]
+
+    assert order_changes(changes)[0]["data"][0] is changes[0]["data"][0]
+
+
+def test_created_relations_after_their_members():
+    relations = [relation(-1, -2), relation(-2, -3, -4), relation(-3), relation(-4)]
+    changes = [{"type": "relation", "action": "create", "data": relations}]
+
+    assert summary(order_changes(changes)) == [
+        ("create", "relation", [-3, -4, -2, -1]),
+    ]
+
+
+def test_deleted_relations_before_their_members():
+    relations = [relation(3), relation(2, 3), relation(1, 2, 4), relation(4)]
+    changes = [{"type": "relation", "action": "delete", "data": relations}]
+
+    assert summary(order_changes(changes)) == [
+        ("delete", "relation", [1, 2, 3, 4]),
+    ]
+
+
+def test_relation_cycle_keeps_all_relations():
+    relations = [relation(-1, -2), relation(-2, -1), relation(-3, -3)]
+    changes = [{"type": "relation", "action": "create", "data": relations}]
+
+    result = summary(order_changes(changes))
+
+    assert sorted(result[0][2]) == [-3, -2, -1]
+
+
+def test_deep_relation_hierarchy():
+    relations = [relation(-i, -i - 1) for i in range(1, 5001)]
+    changes = [{"type": "relation", "action": "create", "data": relations}]
+
+    result = summary(order_changes(changes))
+
+    assert result[0][2] == list(range(-5000, 0))
+
+
+def test_unknown_action_is_kept_at_the_end():
+    changes = [
+        {"type": "node", "action": "touch", "data": [node(1)]},
+        {"type": "node", "action": "create", "data": [node(-1)]},
+    ]
+
+    assert summary(order_changes(changes)) == [
+        ("create", "node", [-1]),
+        ("touch", "node", [1]),
+    ]
+
+
+def test_changeset_upload_order(auth_api, fake_api):
+    changes = [
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+    ]
+
+    with auth_api.changeset():
+        with pytest.raises(osmapi.ApiError) as execinfo:
+            auth_api.changeset_upload(changes)
+        assert execinfo.value.status == 400
+        result = auth_api.changeset_upload(changes, order=True)
+
+    assert result is changes
+    assert [element.tag for element in fake_api.uploads[1][0]] == [
+        "node",
+        "node",
+    ]
+    assert changes[0]["data"][0]["nd"] == [-1, -2]
+    assert changes[0]["data"][0]["id"] == 1002
+
+
+def test_bulk_upload_never_refers_to_a_later_part(auth_api, fake_api):
+    changes = [
+        {"type": "relation", "action": "create", "data": [relation(-1, -2)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+        {"type": "relation", "action": "create", "data": [relation(-2)]},
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+    ]
+
+    ids = auth_api.changeset_upload_bulk(changes, max_elements=2)
+
+    assert ids == {
+        "node": {-1: 1000, -2: 1001},
+        "way": {-1: 1002},
+        "relation": {-2: 1003, -1: 1004},
+    }
+    assert fake_api.closed == [1, 2, 3]
+    assert changes[0]["data"][0]["member"][0]["ref"] == 1003
+
+
+def test_bulk_upload_without_order(auth_api, fake_api):
+    changes = [
+        {"type": "way", "action": "create", "data": [way(-1, -1)]},
+        {"type": "node", "action": "create", "data": [node(-1)]},
+    ]
+
+    with pytest.raises(osmapi.ApiError):
+        auth_api.changeset_upload_bulk(changes, max_elements=10, order=False)
@@ -0,0 +1,248 @@
+"""Tests for `changeset_upload_parallel`, uploads spread over several workers."""
+
+import threading
+import time
+from unittest import mock
+
+import osmapi
+import pytest
+import requests
+from osmapi import http
+from osmapi.changeset import _independent_parts
+
+from .conftest import API_BASE, authenticated_session
+
+
+def node(i, lat=47.1, lon=8.5):
+    return {"id": i, "lat": lat, "lon": lon, "tag": {}, "version": 1}
+
+
+def way(i, *nds):
+    return {"id": i, "nd": list(nds), "tag": {}, "version": 1}
+
+
+def ids_of(sequences):
+    return [
+        [[e["id"] for change in part for e in change["data"]] for part in parts]
+        for parts in sequences
+    ]
+
+
+def test_unrelated_elements_are_independent():
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1), node(-2), node(-3)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -3)]},
+    ]
+
+    assert ids_of(_independent_parts(changes, 3)) == [[[-1, -3, -1]], [[-2]]]
+
+
+def test_related_elements_stay_together():
+    changes = [
+        {"type": "node", "action": "modify", "data": [node(7)]},
+        {"type": "way", "action": "modify", "data": [way(6, 8)]},
+        {"type": "way", "action": "delete", "data": [way(5, 7)]},
+        {"type": "node", "action": "delete", "data": [node(7), node(8)]},
+    ]
+
+    sequences = _independent_parts(changes, 10)
+
+    assert ids_of(sequences) == [[[7, 6, 5, 7, 8]]]
+    assert [change["action"] for change in sequences[0][0]] == [
+        "modify",
+        "modify",
+        "delete",
+        "delete",
+    ]
+
+
+def test_parts_are_filled_by_location():
+    changes = [
+        {
+            "type": "node",
+            "action": "create",
+            "data": [
+                node(-1, 47.1, 8.5),
+                node(-2, -33.9, 151.2),
+                node(-3, 47.2, 8.6),
+                node(-4, -33.8, 151.1),
+            ],
+        },
+    ]
+
+    assert ids_of(_independent_parts(changes, 2)) == [[[-2, -4]], [[-1, -3]]]
+
+
+def test_large_group_is_split_in_order():
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+        {"type": "node", "action": "create", "data": [node(-3)]},
+    ]
+
+    assert ids_of(_independent_parts(changes, 2)) == [
+        [[-1, -2], [-1]],
+        [[-3]],
+    ]
+
+
+def test_parallel_upload(auth_api, fake_api):
+    nodes = [node(-i, 47 + i, 8) for i in range(1, 9)]
+    ways = [way(-i, -2 * i + 1, -2 * i) for i in range(1, 5)]
+    changes = [
+        {"type": "way", "action": "create", "data": ways},
+        {"type": "node", "action": "create", "data": nodes},
+    ]
+
+    ids = auth_api.changeset_upload_parallel(
+        changes, {"comment": "Import"}, workers=3, max_elements=3
+    )
+
+    assert sorted(ids["node"]) == list(range(-8, 0))
+    assert sorted(ids["way"]) == [-4, -3, -2, -1]
+    assert len(fake_api.uploads) == len(fake_api.closed) == 4
+    # each way was uploaded with its nodes, the fake API rejects others
+    sizes = [len(upload.findall("create/*")) for upload in fake_api.uploads]
+    assert sizes == [3] * 4
+    assert [w["id"] for w in ways] == [ids["way"][i] for i in range(-1, -5, -1)]
+    assert auth_api._current_changeset_id == 0
+
+
+def test_parallel_upload_of_a_large_group(auth_api, fake_api):
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1), node(-2)]},
+        {"type": "way", "action": "create", "data": [way(-1, -1, -2)]},
+    ]
+
+    ids = auth_api.changeset_upload_parallel(changes, workers=4, max_elements=2)
+
+    assert ids == {"node": {-1: 1000, -2: 1001}, "way": {-1: 1002}, "relation": {}}
+    assert fake_api.uploads[1].find("create/way/nd").get("ref") == "1000"
+
+
+def test_deletes_are_uploaded_after_the_modifies(auth_api, fake_api):
+    changes = [
+        {"type": "way", "action": "modify", "data": [way(6, 8)]},
+        {"type": "node", "action": "delete", "data": [node(7)]},
+    ]
+    # the way held node 7 before, the changes only show that it holds 8 now
+
+    auth_api.changeset_upload_parallel(changes, workers=2, max_elements=1)
+
+    assert [upload[0].tag for upload in fake_api.uploads] == ["modify", "delete"]
+
+
+def test_deleted_placeholders_get_their_ids(auth_api, fake_api):
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1)]},
+        {"type": "node", "action": "delete", "data": [node(-1)]},
+    ]
+
+    ids = auth_api.changeset_upload_parallel(changes, workers=2, max_elements=1)
+
+    assert ids["node"] == {-1: 1000}
+    assert fake_api.uploads[1].find("delete/node").get("id") == "1000"
+
+
+def test_failed_upload_stops_the_others(auth_api, fake_api):
+    fake_api.failing_upload = 1
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-i) for i in range(1, 6)]}
+    ]
+
+    with pytest.raises(osmapi.ApiError) as execinfo:
+        auth_api.changeset_upload_parallel(changes, workers=1, max_elements=1)
+
+    assert execinfo.value.status == 409
+    assert len(fake_api.uploads) == 1
+    assert fake_api.closed == [1]
+
+
+def test_error_of_the_first_failed_part_is_raised(auth_api, monkeypatch):
+    second_failed = threading.Event()
+
+    def upload_parts(self, parts, changeset_tags):
+        if parts == ["first"]:
+            second_failed.wait(5)
+            time.sleep(0.1)
+            raise osmapi.ApiError(502, "Bad Gateway", "")
+        second_failed.set()
+        raise osmapi.VersionMismatchApiError(409, "Conflict", "")
+
+    monkeypatch.setattr(osmapi.OsmApi, "_upload_parts", upload_parts)
+
+    with pytest.raises(osmapi.VersionMismatchApiError):
+        auth_api._upload_sequences([["first"], ["second"]], None, workers=2)
+
+
+def test_workers_are_released(auth_api, fake_api):
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-1)]},
+        {"type": "node", "action": "delete", "data": [node(5)]},
+    ]
+
+    with mock.patch.object(http.OsmApiSession, "_release", autospec=True) as release:
+        auth_api.changeset_upload_parallel(changes, workers=2, max_elements=1)
+
+    # one worker for the create and one for the delete
+    assert release.call_count == 2
+    assert auth_api._session not in [call.args[0] for call in release.call_args_list]
+
+
+def test_release_closes_only_the_own_pools():
+    api = osmapi.OsmApi(api=API_BASE, pool_maxsize=4)
+    worker = api._parallel_worker()
+    shared = api._session._adapter
+    own = [a for a in worker._session._session.adapters.values() if a is not shared]
+
+    with mock.patch.object(type(shared), "close", autospec=True) as close:
+        worker._session._release()
+
+    assert sorted(map(id, (call.args[0] for call in close.call_args_list))) == sorted(
+        map(id, own)
+    )
+    api.close()
+
+
+def test_release_leaves_a_session_passed_in_open():
+    api = osmapi.OsmApi(api=API_BASE, session=authenticated_session())
+
+    with mock.patch.object(requests.adapters.HTTPAdapter, "close") as close:
+        api._parallel_worker()._session._release()
+
+    close.assert_not_called()
+
+
+def test_already_open_changeset(changeset_api):
+    with pytest.raises(osmapi.ChangesetAlreadyOpenError):
+        changeset_api.changeset_upload_parallel([], max_elements=10)
+
+
+def test_workers_share_the_rate_limiter(fake_api):
+    limiter = mock.Mock(spec=http.RateLimiter)
+    api = osmapi.OsmApi(
+        api=API_BASE, session=authenticated_session(), rate_limiter=limiter
+    )
+    changes = [
+        {"type": "node", "action": "create", "data": [node(-i) for i in range(1, 5)]}
+    ]
+
+    api.changeset_upload_parallel(changes, workers=2, max_elements=1)
+
+    # create, upload and close for each of the 4 changesets
+    assert limiter.acquire.call_count == 12
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = http.RateLimiter(50)
+
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+
+    assert time.monotonic() - start >= 0.08
+
+
+def test_rate_limiter_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        http.RateLimiter(0)
@@ -0,0 +1,111 @@
+"""Tests for the response parsers in `osmapi.parser`."""
+
+import io
+import xml.dom.minidom
+
+import osmapi
+import pytest
+from osmapi import dom, parser
+
+
+def parse_osm_with_minidom(data):
+    """The DOM based implementation `parse_osm` used before it was streamed."""
+    osm = xml.dom.minidom.parseString(data).getElementsByTagName("osm")[0]
+    parse = {
+        "node": dom.dom_parse_node,
+        "way": dom.dom_parse_way,
+        "relation": dom.dom_parse_relation,
+    }
+    return [
+        {"type": elem.nodeName, "data": parse[elem.nodeName](elem)}
+        for elem in osm.childNodes
+        if elem.nodeName in parse
+    ]
+
+
+@pytest.mark.parametrize(
+    "filename", ["test_map.xml", "test_way_full.xml", "test_relation_full.xml"]
+)
+def test_parse_osm_matches_the_dom_parser(file_content, filename):
+    data = file_content(filename).encode("utf-8")
+
+    assert parser.parse_osm(data) == parse_osm_with_minidom(data)
+
+
+def test_iter_osm_reads_a_file_like_object(file_content):
+    data = file_content("test_map.xml").encode("utf-8")
+
+    result = parser.iter_osm(io.BytesIO(data))
+
+    assert next(result) == {
+        "type": "node",
+        "data": parse_osm_with_minidom(data)[0]["data"],
+    }
+    assert [elem["type"] for elem in result] == ["node", "way", "relation"]
+
+
+def test_iter_osm_reads_chunks(file_content):
+    """Chunk boundaries may fall anywhere, even inside of a tag."""
+    data = file_content("test_map.xml").encode("utf-8")
+    chunks = (data[i : i + 7] for i in range(0, len(data), 7))
+
+    assert list(parser.iter_osm(chunks)) == parse_osm_with_minidom(data)
+
+
+def test_iter_osm_drops_parsed_elements():
+    data = b"<osm>" + b'<node id="1" lat="1" lon="2"/>' * 3 + b"</osm>"
+
+    for parents, _ in parser._iter_elements(data, "osm", depth=1):
+        root = parents[0]
+
+    # every element is detached from the tree once it has been handed out
+    assert len(root) == 0
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"4444",
+        b'<?xml version="1.0"?><osmChange version="0.6"/>',
+        b'<osm><node id="1"></osm>',
+    ],
+)
+def test_parse_osm_invalid_response(data):
+    with pytest.raises(
+        osmapi.XmlResponseInvalidError,
+        match="The XML response from the OSM API is invalid",
+    ):
+        parser.parse_osm(data)
+
+
+def test_iter_osc_reads_a_file_like_object(file_content):
+    data = file_content("test_changeset_download.xml").encode("utf-8")
+
+    result = list(parser.iter_osc(io.BytesIO(data)))
+
+    assert result == parser.parse_osc(data)
+    assert len(result) == 16
+    assert {(elem["action"], elem["type"]) for elem in result} == {
+        ("create", "node"),
+        ("create", "way"),
+        ("create", "relation"),
+    }
+
+
+def test_iter_osc_takes_the_action_from_the_enclosing_block():
+    data = (
+        b'<osmChange version="0.6">'
+        b'<modify><way id="1" version="2"><nd ref="5"/></way>'
+        b'<node id="5" version="3" lat="1" lon="2"/></modify>'
+        b'<delete><relation id="7" version="4"/></delete>'
+        b"</osmChange>"
+    )
+
+    result = parser.iter_osc([data[:40], data[40:]])
+
+    assert [(elem["action"], elem["type"], elem["data"]["id"]) for elem in result] == [
+        ("modify", "way", 1),
+        ("modify", "node", 5),
+        ("delete", "relation", 7),
+    ]
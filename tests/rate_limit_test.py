@@ -0,0 +1,133 @@
+"""Tests for the rate limits of `http.RateLimiter` and `http.TokenBucket`."""
+
+import osmapi
+import pytest
+from osmapi import http
+
+from .conftest import API_BASE, make_http_response
+
+
+class Clock:
+    """Stands in for `time.monotonic` and `time.sleep`, sleeping takes no time."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(http.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_token_bucket_reserves_in_order(clock):
+    bucket = http.TokenBucket(10, capacity=1)
+
+    assert [round(bucket.reserve(), 6) for _ in range(3)] == [0.0, 0.1, 0.2]
+    clock.now += 1
+    assert bucket.reserve() == 0.0
+
+
+def test_token_bucket_throttle(clock):
+    bucket = http.TokenBucket(10, capacity=1, recovery=60)
+
+    bucket.throttle(5)
+
+    assert bucket.current_rate() == 5
+    assert bucket.reserve() == 5
+    clock.now += 30
+    assert bucket.current_rate() == 7.5
+    clock.now += 30
+    assert bucket.current_rate() == 10
+
+
+def test_token_bucket_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        http.TokenBucket(0)
+
+
+def test_rate_limiter_needs_a_limit():
+    with pytest.raises(ValueError):
+        http.RateLimiter()
+
+
+def test_reads_and_writes_are_limited_separately(clock):
+    limiter = http.RateLimiter(read_rate=2, write_rate=1)
+
+    for method in ("GET", "PUT", "GET", "POST", "GET"):
+        limiter.acquire(method)
+
+    # reads: 0, 0.5, 1.0; writes: 0, 1.0 (after the 0.5 already waited)
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_read_bytes_delay_the_next_read(clock):
+    limiter = http.RateLimiter(read_bytes=1000)
+
+    limiter.acquire("GET")
+    limiter.transfer("GET", 3000)
+    limiter.acquire("PUT")
+    limiter.acquire("GET")
+
+    assert clock.sleeps == [2.0]
+
+
+def test_write_bytes(clock):
+    limiter = http.RateLimiter(write_bytes=1000)
+
+    limiter.acquire("PUT", 500)
+    limiter.acquire("PUT", 2000)
+    limiter.acquire("GET")
+
+    assert clock.sleeps == [1.5]
+
+
+def test_limiter_is_shared_by_sessions(clock):
+    limiter = http.RateLimiter(2)
+    apis = [osmapi.OsmApi(api=API_BASE, rate_limiter=limiter) for _ in range(3)]
+    for api in apis:
+        api._session._session.request = lambda *args, **kwargs: make_http_response()
+
+    for api in apis:
+        api._session._get("/api/0.6/node/1")
+
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_session_counts_the_bytes(mock_api, clock):
+    api, session = mock_api(content=b"x" * 1500)
+    api._session._rate_limiter = http.RateLimiter(read_bytes=1000, write_bytes=100)
+
+    api._session._get("/api/0.6/node/1")
+    api._session._get("/api/0.6/node/1")
+    api._session._post("/api/0.6/changeset/1/upload", [b"a" * 100, b"b" * 100])
+    list(session.request.call_args.kwargs["data"])
+
+    assert clock.sleeps == [0.5, 1.0]
+
+
+def test_too_many_requests_throttles_the_limiter(mock_api, clock):
+    api, session = mock_api(
+        responses=[
+            make_http_response(status=429, headers={"Retry-After": "5"}),
+            make_http_response(content="ok"),
+        ]
+    )
+    api._session._rate_limiter = limiter = http.RateLimiter(read_rate=10)
+    api._session._sleep = clock.sleep
+
+    assert api._session._get("/api/0.6/node/1") == "ok"
+
+    # the limiter pauses as long as the retry waits anyway
+    assert clock.sleeps == [5.0]
+    assert limiter._reads.current_rate() == pytest.approx(5 + 5 * 5 / 60)
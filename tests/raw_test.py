@@ -0,0 +1,94 @@
+"""Tests for the unparsed reads (`*_raw` and `download_to`)."""
+
+import io
+
+import pytest
+import osmapi
+from responses import GET
+
+from .conftest import API_BASE
+
+RAW_READS = [
+    ("map", (8.765, 47.287, 8.767, 47.289), "/map", "test_map.xml"),
+    ("way_full", (4294967296,), "/way/4294967296/full", "test_way_full.xml"),
+    ("relation_full", (2470397,), "/relation/2470397/full", "test_relation_full.xml"),
+    (
+        "changeset_download",
+        (23123,),
+        "/changeset/23123/download",
+        "test_changeset_download.xml",
+    ),
+]
+
+
+@pytest.mark.parametrize("read,args,path,filename", RAW_READS)
+def test_raw_read(api, add_response, file_content, read, args, path, filename):
+    add_response(GET, path, filename=filename)
+
+    result = getattr(api, f"{read}_raw")(*args)
+
+    assert result == file_content(filename).encode("utf-8")
+
+
+@pytest.mark.parametrize("read,args,path,filename", RAW_READS)
+def test_download_to_path(
+    api, add_response, file_content, tmp_path, read, args, path, filename
+):
+    add_response(GET, path, filename=filename)
+    target = tmp_path / filename
+
+    size = api.download_to(target, read, *args)
+
+    assert target.read_bytes() == file_content(filename).encode("utf-8")
+    assert size == target.stat().st_size
+
+
+def test_download_to_file(api, add_response, file_content):
+    resp = add_response(GET, "/map", filename="test_map.xml")
+    f = io.BytesIO(b"header\n")
+    f.seek(0, io.SEEK_END)
+
+    api.download_to(f, "map", 8.765, 47.287, 8.767, 47.289)
+
+    assert resp.calls[0].request.url == (
+        f"{API_BASE}/api/0.6/map?bbox=8.765000,47.287000,8.767000,47.289000"
+    )
+    assert not f.closed
+    assert f.getvalue() == b"header\n" + file_content("test_map.xml").encode("utf-8")
+
+
+def test_download_to_in_chunks(api, add_response, file_content):
+    add_response(
+        GET, "/changeset/23123/download", filename="test_changeset_download.xml"
+    )
+    api._session.STREAM_CHUNK_SIZE = 100
+    f = io.BytesIO()
+    writes = []
+    f.write = lambda chunk, write=f.write: writes.append(write(chunk))
+
+    api.download_to(f, "changeset_download", 23123)
+
+    assert len(writes) > 1
+    assert max(writes) <= 100
+
+
+def test_raw_reads_ignore_the_json_format(json_api, add_response, file_content):
+    add_response(GET, "/way/4294967296/full", filename="test_way_full.xml")
+
+    result = json_api.way_full_raw(4294967296)
+
+    assert result == file_content("test_way_full.xml").encode("utf-8")
+
+
+def test_download_to_not_found(api, add_response, tmp_path):
+    add_response(GET, "/relation/1/full", status=404)
+
+    with pytest.raises(osmapi.ElementNotFoundApiError):
+        api.download_to(tmp_path / "relation.osm", "relation_full", 1)
+
+    assert not (tmp_path / "relation.osm").exists()
+
+
+def test_download_to_unknown_read(api, tmp_path):
+    with pytest.raises(ValueError, match="read must be one of 'map'"):
+        api.download_to(tmp_path / "node.osm", "node_get", 1)
@@ -0,0 +1,126 @@
+"""A local HTTP server for tests that need real requests on the wire.
+
+`responses` and the `mock_api` sessions never see what `requests` actually
+sends: the transfer encoding, the compression of a body or the connections.
+`ApiServer` is a real HTTP server on a free port of localhost that decodes
+the requests the way a server has to (chunked transfer encoding, gzip content
+encoding), records them and answers with the responses registered with
+`respond`.
+"""
+
+import gzip
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class RecordedRequest:
+    """A request as the server received it."""
+
+    method: str
+    path: str
+    headers: dict[str, str]
+    raw_body: bytes
+    """The body as it was sent (after undoing the chunked transfer encoding)"""
+    body: bytes
+    """The body after undoing the content encoding"""
+    client: tuple[str, int] | None = None
+    """The address of the client, one per connection"""
+
+
+class ApiServer:
+    """A local HTTP server, see the module documentation.
+
+    `url` is the base URL of the server. Responses are registered with
+    `respond`, requests without one are answered with a 404. `requests` holds
+    the received requests in order.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._responses = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.api_server = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}
+        )
+        self._thread.daemon = True
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def respond(self, method, path, body=b"", status=200, headers=None):
+        """Answers requests `method` to `path` with `body` and `status`.
+
+        `body` can also be a function, it is called with the
+        `RecordedRequest` and returns the body.
+        """
+        self._responses[(method, path)] = (status, body, headers or {})
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _answer(self, request):
+        self.requests.append(request)
+        status, body, headers = self._responses.get(
+            (request.method, request.path), (404, b"Not found", {})
+        )
+        if callable(body):
+            body = body(request)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        return status, body, headers
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    do_PUT = do_POST = do_DELETE = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        raw_body = self._read_body()
+        body = raw_body
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(raw_body)
+        request = RecordedRequest(
+            self.command,
+            self.path,
+            dict(self.headers),
+            raw_body,
+            body,
+            self.client_address,
+        )
+        status, content, headers = self.server.api_server._answer(request)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        chunks = []
+        while size := int(self.rfile.readline().split(b";")[0], 16):
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+        # the (empty) trailer ends with an empty line
+        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
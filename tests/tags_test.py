@@ -0,0 +1,107 @@
+"""Tests for the interned and shared tags (`dom.TagTable`)."""
+
+from types import MappingProxyType
+
+import osmapi
+import pytest
+from osmapi import dom, parser
+from responses import GET
+
+from .conftest import API_BASE
+
+DATA = (
+    b"<osm>"
+    b'<node id="1" lat="1" lon="2"><tag k="highway" v="crossing"/></node>'
+    b'<node id="2" lat="1" lon="2"><tag k="highway" v="crossing"/></node>'
+    b'<node id="3" lat="1" lon="2"/>'
+    b'<node id="4" lat="1" lon="2"/>'
+    b'<way id="5"><nd ref="1"/><tag k="highway" v="footway"/></way>'
+    b"</osm>"
+)
+
+
+def tags(elements):
+    return [e["data"]["tag"] for e in elements]
+
+
+def test_tag_keys_and_values_are_interned():
+    first, second, _, _, way = tags(parser.parse_osm(DATA))
+
+    assert first == second == {"highway": "crossing"}
+    assert first is not second
+    assert [*first][0] is [*second][0] is [*way][0]
+    assert first["highway"] is second["highway"]
+
+
+def test_shared_tags():
+    first, second, untagged, untagged_too, way = tags(
+        parser.parse_osm(DATA, shared_tags=True)
+    )
+
+    assert first is second
+    assert untagged is untagged_too
+    assert isinstance(first, MappingProxyType)
+    assert dict(untagged) == {}
+    assert dict(way) == {"highway": "footway"}
+    with pytest.raises(TypeError):
+        first["highway"] = "traffic_signals"
+
+
+def test_shared_tags_match_dicts(file_content):
+    data = file_content("test_map.xml").encode("utf-8")
+
+    assert [
+        {**e, "data": {**e["data"], "tag": dict(e["data"]["tag"])}}
+        for e in parser.parse_osm(data, shared_tags=True)
+    ] == parser.parse_osm(data)
+
+
+def test_shared_tags_are_per_response():
+    first = tags(parser.parse_osm(DATA, shared_tags=True))
+    second = tags(parser.parse_osm(DATA, shared_tags=True))
+
+    assert first[0] is not second[0]
+
+
+def test_tag_table_is_bounded(monkeypatch):
+    monkeypatch.setattr(dom.TagTable, "MAX_ENTRIES", 1)
+    tag_table = dom.TagTable(shared=True)
+
+    first = tag_table.tags([("a", "b")])
+    second = tag_table.tags([("a", "c")])
+
+    assert len(tag_table._strings) == 1
+    assert tag_table.tags([("a", "b")]) is first
+    assert tag_table.tags([("a", "c")]) is not second
+    assert second == {"a": "c"}
+
+
+def test_osmapi_shared_tags(add_response):
+    add_response(GET, "/map", body=DATA)
+    api = osmapi.OsmApi(api=API_BASE, shared_tags=True)
+
+    first, second, untagged, untagged_too, _ = tags(
+        api.map(8.765, 47.287, 8.767, 47.289)
+    )
+
+    assert first is second
+    assert untagged is untagged_too
+
+
+def test_osmapi_shared_tags_with_json(add_response):
+    add_response(GET, "/map.json", filename="test_map.json")
+    api = osmapi.OsmApi(api=API_BASE, format="json", shared_tags=True)
+
+    result = api.map(8.765, 47.287, 8.767, 47.289)
+
+    assert all(isinstance(e["data"]["tag"], MappingProxyType) for e in result)
+
+
+def test_osmapi_shared_tags_with_objects(add_response):
+    add_response(GET, "/way/4294967296/full", filename="test_way_full.xml")
+    api = osmapi.OsmApi(api=API_BASE, result_type="objects", shared_tags=True)
+
+    result = api.way_full(4294967296)
+
+    assert all(isinstance(e["data"].tag, MappingProxyType) for e in result)
+    assert result[0]["data"].to_dict()["tag"] == dict(result[0]["data"].tag)
@@ -0,0 +1,81 @@
+"""Tests for the timestamp decoding modes, `OsmApi(timestamps=...)`."""
+
+import datetime
+
+import osmapi
+import pytest
+from responses import GET
+
+from .conftest import API_BASE
+
+
+@pytest.fixture
+def timestamps_api():
+    """Factory for an OsmApi with the timestamp mode `timestamps`."""
+    apis = []
+
+    def _timestamps_api(timestamps, format="xml"):
+        api = osmapi.OsmApi(api=API_BASE, timestamps=timestamps, format=format)
+        apis.append(api)
+        return api
+
+    yield _timestamps_api
+    for api in apis:
+        api.close()
+
+
+@pytest.mark.parametrize(
+    "timestamps,expected",
+    [
+        ("datetime", datetime.datetime(2012, 4, 18, 11, 14, 26)),
+        ("epoch", 1334747666),
+        ("raw", "2012-04-18T11:14:26Z"),
+        ("lazy", "2012-04-18T11:14:26Z"),
+    ],
+)
+@pytest.mark.parametrize("format", ["xml", "json"])
+def test_node_get(add_response, timestamps_api, timestamps, expected, format):
+    extension = "json" if format == "json" else "xml"
+    add_response(GET, filename=f"test_node_get.{extension}")
+
+    result = timestamps_api(timestamps, format).node_get(123)
+
+    assert result["timestamp"] == expected
+    assert type(result["timestamp"]) is type(expected) or timestamps == "lazy"
+
+
+def test_map_lazy(add_response, timestamps_api):
+    add_response(GET, filename="test_map.xml")
+
+    result = timestamps_api("lazy").map(-1.5, 45.9, -1.4, 52.5)
+
+    for element in result:
+        timestamp = element["data"]["timestamp"]
+        assert isinstance(timestamp, osmapi.dom.LazyTimestamp)
+        assert isinstance(timestamp.to_datetime(), datetime.datetime)
+
+
+def test_changeset_get_epoch(add_response, timestamps_api):
+    add_response(GET, filename="test_changeset_get.xml")
+
+    result = timestamps_api("epoch").changeset_get(123)
+
+    assert result["created_at"] == 1252360656
+    assert result["closed_at"] == 1252364257
+
+
+def test_notes_get_raw(add_response, timestamps_api):
+    add_response(GET, filename="test_notes_get.xml")
+
+    result = timestamps_api("raw").notes_get(
+        -1.4998534, 45.9667901, -1.4831815, 52.4710193
+    )
+
+    assert result[2]["date_created"] == "2014-08-28 19:25:37 UTC"
+    assert result[2]["date_closed"] == "2014-09-27 09:21:41 UTC"
+    assert result[2]["comments"][0]["date"] == "2014-08-28 19:25:37 UTC"
+
+
+def test_timestamps_unknown():
+    with pytest.raises(ValueError, match="timestamps must be one of"):
+        osmapi.OsmApi(api=API_BASE, timestamps="iso")
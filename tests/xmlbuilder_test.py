@@ -5,7 +5,7 @@ import xml.etree.ElementTree as ET
 import pytest
 
 import osmapi
-from osmapi import xmlbuilder
+from osmapi import http, xmlbuilder
 
 from .conftest import API_BASE, OPEN_CHANGESET_ID
 
@@ -103,6 +103,51 @@ def test_xml_build_handles_unicode(build):
     assert root[0][0].attrib["v"] == "Zürich 東京"
 
 
+def test_xml_build_is_compact(build):
+    xml, _ = build("way", {"id": 2, "nd": [11, 12], "tag": {"a": "b"}})
+
+    assert b"\n<osm" in xml
+    assert b"\n" not in xml.split(b"\n", 1)[1]
+    assert b"  " not in xml
+
+
+def test_xml_build_pretty(changeset_api):
+    xml = xmlbuilder._xml_build(
+        "way", {"id": 2, "nd": [11, 12]}, data=changeset_api, pretty=True
+    )
+
+    assert b'\n    <nd ref="11" />\n' in xml
+
+
+@pytest.mark.parametrize(
+    "element_type,element_data",
+    [
+        ("node", {"id": 1, "lat": 47.1, "lon": 8.5, "version": 3}),
+        ("node", {"id": -1, "lat": 1, "lon": 2, "tag": {"a": 'x & "<y>"\r\n\t'}}),
+        ("way", {"id": 2, "nd": [11, 12], "tag": {"k\n": "Zürich 東京"}}),
+        ("way", {"id": 2, "nd": [], "visible": False}),
+        (
+            "relation",
+            {"id": 3, "member": [{"type": "way", "ref": 9, "role": 'a"b\nc'}]},
+        ),
+        ("changeset", {"tag": {"comment": "fix <b> & \t"}}),
+    ],
+)
+def test_xml_build_writes_what_elementtree_writes(
+    changeset_api, element_type, element_data
+):
+    element = xmlbuilder._xml_element(element_type, element_data, data=changeset_api)
+
+    assert xmlbuilder._xml_build(
+        element_type, element_data, False, data=changeset_api
+    ) == ET.tostring(element, encoding="unicode").encode("utf-8")
+
+
+def test_xml_build_rejects_values_that_are_not_strings(build):
+    with pytest.raises(TypeError, match="cannot serialize 5"):
+        build("node", {"id": 1, "tag": {"lanes": 5}})
+
+
 def test_node_update_sends_whitespace_in_tags_unharmed(changeset_api, add_response):
     """The same round trip, over the wire this time."""
     resp = add_response("PUT", "/node/876", body="7")
@@ -114,3 +159,104 @@ def test_node_update_sends_whitespace_in_tags_unharmed(changeset_api, add_respon
     assert resp.calls[0].request.url == f"{API_BASE}/api/0.6/node/876"
     sent = ET.fromstring(resp.calls[0].request.body)
     assert sent[0][0].attrib == {"k": "note", "v": "first\nsecond"}
+
+
+CHANGES = [
+    {
+        "type": "node",
+        "action": "create",
+        "data": [{"id": -i, "lat": 47.1, "lon": 8.5, "tag": {}} for i in range(1, 4)],
+    },
+    {
+        "type": "way",
+        "action": "modify",
+        "data": [{"id": 7, "version": 2, "nd": [-1, -2], "tag": {"a": "b\nc"}}],
+    },
+]
+
+
+def test_osmchange_body_is_the_whole_document(changeset_api):
+    body = xmlbuilder.OsmChangeBody(CHANGES, data=changeset_api)
+
+    root = ET.fromstring(b"".join(body))
+
+    assert root.tag == "osmChange"
+    assert root.attrib["generator"] == f"osmapi/{osmapi.__version__}"
+    assert [child.tag for child in root] == ["create", "modify"]
+    assert [node.attrib["id"] for node in root[0]] == ["-1", "-2", "-3"]
+    assert root[1][0].attrib["changeset"] == str(OPEN_CHANGESET_ID)
+    assert root[1][0][0].attrib == {"k": "a", "v": "b\nc"}
+
+
+def test_osmchange_body_is_sent_in_chunks(changeset_api):
+    body = xmlbuilder.OsmChangeBody(CHANGES, data=changeset_api, chunk_size=200)
+
+    chunks = list(body)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 200 for chunk in chunks[:-1])
+
+
+def test_osmchange_body_can_be_iterated_again(changeset_api):
+    body = xmlbuilder.OsmChangeBody(CHANGES, data=changeset_api, chunk_size=1)
+
+    assert b"".join(body) == b"".join(body)
+
+
+def test_osmchange_body_pretty(changeset_api):
+    compact = b"".join(xmlbuilder.OsmChangeBody(CHANGES, data=changeset_api))
+    pretty = b"".join(
+        xmlbuilder.OsmChangeBody(CHANGES, data=changeset_api, pretty=True)
+    )
+
+    assert compact.count(b"\n") == 1
+    assert b"<create>\n<node" in pretty
+    assert len(compact) < len(pretty)
+
+
+def test_osmchange_body_escapes_the_generator(changeset_api):
+    changeset_api._created_by = 'app "<1>" (osmapi)'
+
+    root = ET.fromstring(b"".join(xmlbuilder.OsmChangeBody([], data=changeset_api)))
+
+    assert root.attrib["generator"] == 'app "<1>" (osmapi)'
+
+
+def test_changeset_upload_streams_the_body(changeset_api, add_response):
+    resp = add_response(
+        "POST",
+        f"/changeset/{OPEN_CHANGESET_ID}/upload",
+        filename="test_changeset_upload_create_node.xml",
+    )
+    changes = [
+        {
+            "type": "node",
+            "action": "create",
+            "data": [{"lat": 47.1, "lon": 8.5, "tag": {}} for _ in range(2)],
+        }
+    ]
+
+    changeset_api.changeset_upload(changes)
+
+    request = resp.calls[0].request
+    assert request.headers["Transfer-Encoding"] == "chunked"
+    assert "Content-Length" not in request.headers
+    assert len(ET.fromstring(request.body)[0]) == 2
+
+
+def test_changeset_upload_retry_sends_the_whole_body(changeset_api, add_response):
+    changeset_api._session._retry_policy = http.RetryPolicy(idempotent_only=False)
+    add_response("POST", f"/changeset/{OPEN_CHANGESET_ID}/upload", status=503)
+    resp = add_response(
+        "POST",
+        f"/changeset/{OPEN_CHANGESET_ID}/upload",
+        filename="test_changeset_upload_create_node.xml",
+    )
+    changes = [
+        {"type": "node", "action": "create", "data": [{"lat": 47.1, "lon": 8.5}]}
+    ]
+
+    changeset_api.changeset_upload(changes)
+
+    assert resp.calls[0].request.body == resp.calls[1].request.body
+    assert ET.fromstring(resp.calls[1].request.body)[0][0].tag == "node"